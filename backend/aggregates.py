@@ -0,0 +1,68 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, func, case, true
+
+from models import Product, Order, OrderStatus
+from cache import TTLCache, cache_ttl
+
+# Dashboard stats are polled constantly; serve them from memory between writes
+dashboard_cache = TTLCache(
+    ttl=cache_ttl("DASHBOARD_CACHE_TTL", 5),
+    tables=["products", "orders", "order_items", "stock_transactions"]
+)
+
+
+async def compute_dashboard_stats(db: AsyncSession) -> dict:
+    """All dashboard counters in one aggregate query plus the recent orders"""
+    product_stats = select(
+        func.count(Product.id).label("total_products"),
+        func.coalesce(
+            func.sum(case((Product.quantity <= Product.reorder_level, 1), else_=0)), 0
+        ).label("low_stock_count"),
+        func.total(Product.quantity * Product.cost).label("inventory_value")
+    ).subquery()
+    order_stats = select(
+        func.count(Order.id).label("total_orders"),
+        func.coalesce(
+            func.sum(case((Order.status == OrderStatus.pending, 1), else_=0)), 0
+        ).label("pending_orders")
+    ).subquery()
+
+    # Both single-row aggregates come back as one row
+    result = await db.execute(
+        select(product_stats, order_stats).select_from(product_stats.join(order_stats, true()))
+    )
+    row = result.one()
+
+    # Order ids grow with created_at, so the primary key serves the recency sort
+    result = await db.execute(
+        select(Order.id, Order.order_date, Order.status, Order.total_amount)
+        .order_by(Order.id.desc())
+        .limit(5)
+    )
+    recent_orders = result.all()
+
+    return {
+        "total_products": row.total_products,
+        "low_stock_count": row.low_stock_count,
+        "total_orders": row.total_orders,
+        "pending_orders": row.pending_orders,
+        "inventory_value": round(row.inventory_value, 2),
+        "recent_orders": [
+            {
+                "id": o.id,
+                "order_date": o.order_date.isoformat(),
+                "status": o.status.value,
+                "total_amount": o.total_amount
+            } for o in recent_orders
+        ]
+    }
+
+
+async def get_dashboard_stats(db: AsyncSession) -> dict:
+    """Cached dashboard stats; recomputed after a write or when the TTL lapses"""
+    stats = dashboard_cache.get("stats")
+    if stats is None:
+        generation = dashboard_cache.generation
+        stats = await compute_dashboard_stats(db)
+        dashboard_cache.set("stats", stats, generation)
+    return stats
@@ -0,0 +1,148 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, delete, update, func
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from typing import Any, Awaitable, Callable, Dict, Iterable, Optional
+from datetime import datetime, timedelta
+import asyncio
+import hashlib
+import json
+import logging
+import os
+
+from database import AsyncSessionLocal
+from models import AICacheEntry
+
+logger = logging.getLogger(__name__)
+
+# Seconds a cached answer stays valid, per kind of AI call
+DEFAULT_TTL = float(os.getenv("AI_CACHE_TTL", str(24 * 3600)))
+TTLS = {
+    "forecast": float(os.getenv("AI_CACHE_FORECAST_TTL", str(6 * 3600))),
+    "categorize": float(os.getenv("AI_CACHE_CATEGORIZE_TTL", str(30 * 24 * 3600))),
+}
+MAX_ENTRIES = int(os.getenv("AI_CACHE_MAX_ENTRIES", "50000"))
+# Hits refresh the LRU timestamp at most this often, so reads stay read-only
+TOUCH_INTERVAL = timedelta(seconds=60)
+
+# In-flight calls by cache key (single-flight within this process)
+_inflight: Dict[str, asyncio.Future] = {}
+
+
+def make_key(kind: str, inputs: Any) -> str:
+    """Content address of an AI call: sha256 over its kind and prompt inputs"""
+    payload = json.dumps({"kind": kind, "inputs": inputs}, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+async def _lookup(key: str) -> Optional[str]:
+    now = datetime.utcnow()
+    async with AsyncSessionLocal() as session:
+        result = await session.execute(
+            select(AICacheEntry.response, AICacheEntry.last_accessed_at)
+            .where(AICacheEntry.key == key, AICacheEntry.expires_at > now)
+        )
+        row = result.one_or_none()
+        if row is None:
+            return None
+        if now - row.last_accessed_at > TOUCH_INTERVAL:
+            await session.execute(
+                update(AICacheEntry)
+                .where(AICacheEntry.key == key)
+                .values(last_accessed_at=now, hits=AICacheEntry.hits + 1)
+            )
+            await session.commit()
+        return row.response
+
+
+async def _store(key: str, kind: str, product_id: Optional[int], response: str) -> None:
+    now = datetime.utcnow()
+    ttl = TTLS.get(kind, DEFAULT_TTL)
+    values = {
+        "key": key,
+        "kind": kind,
+        "product_id": product_id,
+        "response": response,
+        "hits": 0,
+        "created_at": now,
+        "expires_at": now + timedelta(seconds=ttl),
+        "last_accessed_at": now
+    }
+    stmt = sqlite_insert(AICacheEntry).values(**values)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[AICacheEntry.key],
+        set_={k: stmt.excluded[k] for k in values if k != "key"}
+    )
+    async with AsyncSessionLocal() as session:
+        await session.execute(stmt)
+        await _evict(session, now)
+        await session.commit()
+
+
+async def _evict(session: AsyncSession, now: datetime) -> None:
+    """Drop expired entries, then the least recently used ones over the cap"""
+    await session.execute(delete(AICacheEntry).where(AICacheEntry.expires_at <= now))
+    result = await session.execute(select(func.count()).select_from(AICacheEntry))
+    excess = result.scalar() - MAX_ENTRIES
+    if excess > 0:
+        oldest = (
+            select(AICacheEntry.key)
+            .order_by(AICacheEntry.last_accessed_at)
+            .limit(excess)
+            .scalar_subquery()
+        )
+        await session.execute(delete(AICacheEntry).where(AICacheEntry.key.in_(oldest)))
+
+
+async def cached_call(
+    kind: str,
+    inputs: Any,
+    call: Callable[[], Awaitable[str]],
+    product_id: Optional[int] = None
+) -> str:
+    """Return a cached AI response, or make the call once for all concurrent callers"""
+    key = make_key(kind, inputs)
+
+    pending = _inflight.get(key)
+    if pending is None:
+        cached = await _lookup(key)
+        if cached is not None:
+            return cached
+        # Another caller may have started the same call during the lookup
+        pending = _inflight.get(key)
+    if pending is not None:
+        return await asyncio.shield(pending)
+
+    future = asyncio.get_running_loop().create_future()
+    _inflight[key] = future
+    try:
+        response = await call()
+        future.set_result(response)
+    except asyncio.CancelledError:
+        future.cancel()
+        raise
+    except Exception as e:
+        future.set_exception(e)
+        # Mark the exception retrieved when nobody else was waiting on it
+        future.exception()
+        raise
+    finally:
+        _inflight.pop(key, None)
+
+    try:
+        await _store(key, kind, product_id, response)
+    except Exception as e:
+        logger.warning(f"AI cache store failed: {e}")
+    return response
+
+
+async def invalidate_forecasts(db: AsyncSession, product_ids: Iterable[int]) -> None:
+    """Delete cached forecasts for products with new stock transactions
+
+    Runs inside the caller's transaction so it commits with the write.
+    """
+    product_ids = list(set(product_ids))
+    if product_ids:
+        await db.execute(
+            delete(AICacheEntry)
+            .where(AICacheEntry.kind == "forecast", AICacheEntry.product_id.in_(product_ids))
+        )
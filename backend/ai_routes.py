@@ -0,0 +1,259 @@
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select
+from functools import partial
+import asyncio
+import json
+import logging
+import os
+
+from database import get_db
+from models import Product
+from schemas import AIForecastRequest, AIReorderRequest, AICategorizationRequest
+from coldstart import LazyModule
+import ai_cache
+import metrics
+
+logger = logging.getLogger(__name__)
+
+# AI settings (override through env vars); AI_ENABLED=false leaves these routes out entirely
+AI_ENABLED = os.getenv("AI_ENABLED", "true").lower() in ("1", "true", "yes")
+AI_CONCURRENCY = int(os.getenv("AI_CONCURRENCY", "8"))
+AI_CALL_TIMEOUT = float(os.getenv("AI_CALL_TIMEOUT", "60"))
+AI_REORDER_BATCH_SIZE = int(os.getenv("AI_REORDER_BATCH_SIZE", "25"))
+ai_semaphore = asyncio.Semaphore(AI_CONCURRENCY)
+
+# The LLM client (litellm and friends) and the pandas forecasting model are
+# imported on first use or by the background warm-up, never at app import
+llm = LazyModule("emergentintegrations.llm.chat", warm=AI_ENABLED)
+forecasting = LazyModule("forecasting")
+
+# Categories the LLM may assign
+CATEGORIES = ["Electronics", "Food & Beverage", "Household", "Personal Care", "Clothing", "Other"]
+
+router = APIRouter()
+
+
+# Helper: AI Chat Instance
+def get_ai_chat():
+    try:
+        chat_class = llm.LlmChat
+    except ImportError as e:
+        raise HTTPException(status_code=503, detail=f"AI features are unavailable: {e}")
+    return chat_class(
+        api_key=os.getenv("EMERGENT_LLM_KEY"),
+        session_id="puregold-inventory-ai",
+        system_message="You are an AI assistant for Puregold inventory management. Provide helpful, concise insights."
+    ).with_model("openai", "gpt-5")
+
+
+# Helper: one LLM round trip under the shared concurrency cap and timeout
+async def send_ai_message(text: str):
+    chat = get_ai_chat()
+    message = llm.UserMessage(text=text)
+    async with ai_semaphore:
+        with metrics.time_llm_call():
+            return await asyncio.wait_for(chat.send_message(message), AI_CALL_TIMEOUT)
+
+
+# Helper: pull the JSON payload out of an LLM reply (tolerates prose and code fences)
+def parse_ai_json(text: str, opening: str = "[", closing: str = "]"):
+    start, end = text.find(opening), text.rfind(closing)
+    if start == -1 or end < start:
+        raise ValueError("No JSON found in AI response")
+    return json.loads(text[start:end + 1])
+
+
+# ==================== AI ROUTES ====================
+@router.post("/ai/forecast")
+async def ai_forecast(request: AIForecastRequest, db: AsyncSession = Depends(get_db)):
+    """Inventory forecast from the local demand model, with an optional AI narrative"""
+    lead_time = request.lead_time_days
+    if lead_time is None:
+        lead_time = forecasting.DEFAULT_LEAD_TIME_DAYS
+
+    plan = await forecasting.forecast(db, [request.product_id], request.days, lead_time)
+    if plan.empty:
+        raise HTTPException(status_code=404, detail="Product not found")
+    plan_row = forecasting.to_records(plan)[0]
+
+    cover = plan_row["days_of_cover"]
+    analysis = (
+        f"{plan_row['method'].upper()} estimate of {plan_row['daily_demand']} units/day "
+        f"from the last {forecasting.HISTORY_DAYS} days of sales; "
+        + (f"{cover} days of stock cover." if cover is not None else "no recent demand.")
+    )
+
+    # The LLM only narrates the numbers; its failure never fails the forecast
+    if request.narrative:
+        prompt = f"""Explain this inventory forecast for the next {request.days} days:
+
+Product: {plan_row['name']} (SKU: {plan_row['sku']})
+Current Stock: {plan_row['quantity']}
+Reorder Level: {plan_row['reorder_level']}
+Lead Time (days): {lead_time}
+Forecast: {json.dumps(plan_row)}
+
+Return 2-3 sentences of plain text for a store manager."""
+        try:
+            analysis = await ai_cache.cached_call(
+                "forecast", prompt, partial(send_ai_message, prompt), product_id=request.product_id
+            )
+        except Exception as e:
+            logger.error(f"AI forecast narrative error: {e!r}")
+
+    return {
+        "product_id": plan_row["id"],
+        "product_name": plan_row["name"],
+        "current_stock": plan_row["quantity"],
+        "forecast": {
+            "predicted_demand": plan_row["predicted_demand"],
+            "reorder_date": plan_row["reorder_date"],
+            "order_quantity": plan_row["order_quantity"],
+            "risk_level": plan_row["risk_level"],
+            "analysis": analysis
+        },
+        "metrics": plan_row
+    }
+
+
+@router.post("/ai/reorder-suggestions")
+async def ai_reorder_suggestions(request: AIReorderRequest, db: AsyncSession = Depends(get_db)):
+    """Get AI-powered reorder suggestions for every low-stock product"""
+    # Get low stock products
+    result = await db.execute(
+        select(
+            Product.id, Product.name, Product.sku, Product.quantity,
+            Product.reorder_level, Product.price, Product.cost
+        )
+        .where(Product.quantity <= Product.reorder_level)
+        .order_by(Product.id)
+    )
+    products = result.all()
+
+    if not products:
+        return {"message": "No products need reordering", "suggestions": []}
+
+    # Many products per prompt, batches fanned out concurrently
+    batches = [
+        products[i:i + AI_REORDER_BATCH_SIZE]
+        for i in range(0, len(products), AI_REORDER_BATCH_SIZE)
+    ]
+    results = await asyncio.gather(*(suggest_reorder_batch(batch) for batch in batches))
+
+    suggestions, failed = [], []
+    for batch, quantities in zip(batches, results):
+        for product in batch:
+            if product.id not in quantities:
+                failed.append(product.id)
+                continue
+            suggestions.append({
+                "product_id": product.id,
+                "product_name": product.name,
+                "sku": product.sku,
+                "current_stock": product.quantity,
+                "reorder_level": product.reorder_level,
+                "suggested_quantity": quantities[product.id]
+            })
+
+    # Products the LLM gave no quantity for, even after the retry
+    return {"suggestions": suggestions, "failed": failed}
+
+
+async def suggest_reorder_batch(products, retry: bool = True) -> dict:
+    """Ask for order quantities for a batch of products; returns {product_id: quantity}"""
+    try:
+        return await request_reorder_quantities(products)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"AI suggestion error for products {[p.id for p in products]}: {e!r}")
+    # Retry a failed batch once, split in half; products still without a quantity are left out
+    if not retry:
+        return {}
+    half = (len(products) + 1) // 2
+    halves = [part for part in (products[:half], products[half:]) if part]
+    quantities = {}
+    for result in await asyncio.gather(*(suggest_reorder_batch(part, retry=False) for part in halves)):
+        quantities.update(result)
+    return quantities
+
+
+async def request_reorder_quantities(products) -> dict:
+    """One reorder prompt for a batch of products; raises when the LLM call or its JSON fails"""
+    payload = [
+        {
+            "product_id": p.id,
+            "name": p.name,
+            "current_stock": p.quantity,
+            "reorder_level": p.reorder_level,
+            "price": p.price,
+            "cost": p.cost
+        } for p in products
+    ]
+    prompt = f"""These products need reordering:
+{json.dumps(payload)}
+
+For each product, suggest the optimal order quantity considering:
+- Stock level
+- Typical turnover
+- Cost efficiency
+
+Return only a JSON array with one object per product, with keys: product_id, suggested_quantity (integer)."""
+
+    response = await ai_cache.cached_call("reorder", prompt, partial(send_ai_message, prompt))
+    return {
+        int(item["product_id"]): item["suggested_quantity"]
+        for item in parse_ai_json(response)
+        if isinstance(item, dict) and "product_id" in item and "suggested_quantity" in item
+    }
+
+
+@router.post("/ai/categorize")
+async def ai_categorize_product(request: AICategorizationRequest):
+    """AI-powered product categorization"""
+    prompt = f"""Categorize this product and generate a professional description:
+        
+Product Name: {request.product_name}
+Description: {request.product_description or 'Not provided'}
+
+Return JSON with:
+1. category (single category from: {', '.join(CATEGORIES)})
+2. enhanced_description (professional, 2-3 sentences)
+3. tags (array of 3-5 relevant tags)"""
+
+    try:
+        response = await ai_cache.cached_call("categorize", prompt, partial(send_ai_message, prompt))
+        return {
+            "product_name": request.product_name,
+            "ai_response": response
+        }
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"AI categorization error: {e}")
+        raise HTTPException(status_code=500, detail="AI categorization failed")
+
+
+async def categorize_batch(products) -> dict:
+    """One categorization prompt for a batch of products; returns {product_id: category}
+
+    Answers outside CATEGORIES are dropped. Raises when the LLM call or its JSON fails.
+    """
+    payload = [
+        {"product_id": p.id, "name": p.name, "description": p.description or ""}
+        for p in products
+    ]
+    prompt = f"""Categorize these products:
+{json.dumps(payload)}
+
+Allowed categories: {', '.join(CATEGORIES)}
+
+Return only a JSON array with one object per product, with keys: product_id, category."""
+
+    response = await ai_cache.cached_call("categorize", prompt, partial(send_ai_message, prompt))
+    return {
+        int(item["product_id"]): item["category"]
+        for item in parse_ai_json(response)
+        if isinstance(item, dict) and "product_id" in item and item.get("category") in CATEGORIES
+    }
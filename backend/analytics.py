@@ -0,0 +1,354 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, func
+from typing import Awaitable, Callable, List, Optional
+from datetime import datetime, date, timedelta
+import numpy as np
+import pandas as pd
+import os
+
+from models import Product, Order, OrderItem, OrderStatus
+from cache import TTLCache, cache_ttl
+from conditional import collection_versions
+from serialization import dumps
+
+# Report settings (override through env vars)
+ABC_A_SHARE = float(os.getenv("ANALYTICS_ABC_A_SHARE", "0.8"))
+ABC_B_SHARE = float(os.getenv("ANALYTICS_ABC_B_SHARE", "0.95"))
+
+# Entries are keyed on the collection versions of the tables they read. Triggers
+# bump those in the writing transaction, so a write from any process makes
+# every later lookup miss; the TTL only bounds how long superseded entries
+# take up memory.
+SALES_TABLES = ("orders", "order_items")
+CATALOG_TABLES = ("products",)
+REPORT_TABLES = CATALOG_TABLES + SALES_TABLES
+
+# Sales scans cover years of order lines; the catalog changes with every
+# stock move and is cached separately
+sales_cache = TTLCache(ttl=cache_ttl("ANALYTICS_CACHE_TTL", 300), tables=[], max_entries=32)
+catalog_cache = TTLCache(ttl=cache_ttl("ANALYTICS_CACHE_TTL", 300), tables=[], max_entries=2)
+# Encoded responses per report and parameters; repeat views skip pandas and JSON encoding
+report_cache = TTLCache(ttl=cache_ttl("ANALYTICS_CACHE_TTL", 300), tables=[], max_entries=128)
+
+CATALOG_COLUMNS = ["id", "sku", "name", "category", "price", "cost", "quantity", "created_at"]
+SALES_COLUMNS = ["product_id", "day", "units", "revenue"]
+# Identify the product in every per-product report
+PRODUCT_COLUMNS = ["id", "sku", "name", "category", "quantity"]
+
+
+# ==================== DATA ====================
+def window_start(days: int, today: Optional[date] = None) -> date:
+    """First day of a window of `days` days ending today"""
+    today = today or datetime.utcnow().date()
+    return today - timedelta(days=days - 1)
+
+
+async def load_catalog(db: AsyncSession) -> pd.DataFrame:
+    """Every product's price, cost and stock position, indexed by id"""
+    # Versions are read before the data, so an entry is never older than its key
+    key = ("catalog", await collection_versions(db, CATALOG_TABLES))
+    catalog = catalog_cache.get(key)
+    if catalog is None:
+        result = await db.execute(
+            select(
+                Product.id, Product.sku, Product.name, Product.category, Product.price,
+                Product.cost, Product.quantity, Product.created_at
+            ).order_by(Product.id)
+        )
+        catalog = pd.DataFrame(result.all(), columns=CATALOG_COLUMNS).set_index("id")
+        catalog["category"] = catalog["category"].fillna("Uncategorized")
+        catalog_cache.set(key, catalog)
+    return catalog
+
+
+async def load_daily_sales(db: AsyncSession, days: int) -> pd.DataFrame:
+    """Units and revenue per product per day over the window, aggregated in SQL"""
+    since = window_start(days)
+    key = ("daily", since, await collection_versions(db, SALES_TABLES))
+    sales = sales_cache.get(key)
+    if sales is None:
+        day = func.date(Order.order_date)
+        result = await db.execute(
+            select(
+                OrderItem.product_id,
+                day,
+                func.sum(OrderItem.quantity),
+                func.total(OrderItem.quantity * OrderItem.price)
+            )
+            .join(Order, Order.id == OrderItem.order_id)
+            .where(
+                Order.status != OrderStatus.cancelled,
+                Order.order_date >= datetime.combine(since, datetime.min.time())
+            )
+            .group_by(OrderItem.product_id, day)
+        )
+        sales = pd.DataFrame(result.all(), columns=SALES_COLUMNS)
+        sales["day"] = pd.to_datetime(sales["day"])
+        sales["units"] = sales["units"].astype(int)
+        sales_cache.set(key, sales)
+    return sales
+
+
+async def load_last_sold(db: AsyncSession) -> pd.Series:
+    """Date of each product's most recent sale, all time"""
+    key = ("last_sold", await collection_versions(db, SALES_TABLES))
+    last_sold = sales_cache.get(key)
+    if last_sold is None:
+        result = await db.execute(
+            select(OrderItem.product_id, func.max(Order.order_date))
+            .join(Order, Order.id == OrderItem.order_id)
+            .where(Order.status != OrderStatus.cancelled)
+            .group_by(OrderItem.product_id)
+        )
+        rows = result.all()
+        last_sold = pd.Series(
+            pd.to_datetime([row[1] for row in rows]),
+            index=pd.Index([row[0] for row in rows], name="id"),
+            dtype="datetime64[ns]"
+        )
+        sales_cache.set(key, last_sold)
+    return last_sold
+
+
+# ==================== REPORTS ====================
+def product_totals(catalog: pd.DataFrame, sales: pd.DataFrame) -> pd.DataFrame:
+    """Catalog joined to units, revenue, selling days and last sale within the window"""
+    totals = sales.groupby("product_id").agg(
+        units=("units", "sum"),
+        revenue=("revenue", "sum"),
+        selling_days=("day", "nunique"),
+        last_sold=("day", "max")
+    )
+    report = catalog.join(totals, how="left")
+    report["revenue"] = report["revenue"].fillna(0.0)
+    report[["units", "selling_days"]] = report[["units", "selling_days"]].fillna(0).astype(int)
+    return report
+
+
+def sales_velocity(catalog: pd.DataFrame, sales: pd.DataFrame, days: int) -> pd.DataFrame:
+    """Units per day and days of cover per product, fastest movers first"""
+    report = product_totals(catalog, sales)
+    report["units_per_day"] = report["units"] / days
+    with np.errstate(divide="ignore", invalid="ignore"):
+        report["days_of_cover"] = np.where(
+            report["units_per_day"] > 0, report["quantity"] / report["units_per_day"], np.nan
+        )
+    return report.sort_values(["units_per_day", "revenue"], ascending=False)
+
+
+def abc_classification(catalog: pd.DataFrame, sales: pd.DataFrame) -> pd.DataFrame:
+    """Class A/B/C by each product's place in the cumulative revenue curve"""
+    report = product_totals(catalog, sales).sort_values("revenue", ascending=False)
+    total = report["revenue"].sum()
+    share = report["revenue"] / total if total > 0 else report["revenue"] * 0.0
+    # A product's class comes from the revenue share ranked ahead of it, so the
+    # product that crosses a threshold still belongs to the higher class
+    before = share.cumsum() - share
+    report["revenue_share"] = share
+    report["cumulative_share"] = share.cumsum()
+    report["abc_class"] = np.select(
+        [(report["revenue"] > 0) & (before < ABC_A_SHARE), (report["revenue"] > 0) & (before < ABC_B_SHARE)],
+        ["A", "B"],
+        "C"
+    )
+    return report
+
+
+def inventory_turnover(catalog: pd.DataFrame, sales: pd.DataFrame, days: int) -> pd.DataFrame:
+    """Cost of goods sold over on-hand inventory value, per category and overall
+
+    On-hand value stands in for average inventory, and both sides are valued at
+    the current product cost.
+    """
+    report = product_totals(catalog, sales)
+    report["cogs"] = report["units"] * report["cost"]
+    report["inventory_value"] = report["quantity"] * report["cost"]
+    by_category = report.groupby("category")[["units", "revenue", "cogs", "inventory_value"]].sum()
+    by_category.loc["All"] = by_category.sum()
+    by_category["units"] = by_category["units"].astype(int)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        turnover = np.where(
+            by_category["inventory_value"] > 0, by_category["cogs"] / by_category["inventory_value"], np.nan
+        )
+        by_category["turnover"] = turnover
+        by_category["annualized_turnover"] = turnover * 365 / days
+        by_category["days_of_inventory"] = np.where(
+            by_category["cogs"] > 0, by_category["inventory_value"] / (by_category["cogs"] / days), np.nan
+        )
+    return by_category.reset_index()
+
+
+def dead_stock(catalog: pd.DataFrame, sales: pd.DataFrame, last_sold: pd.Series, days: int) -> pd.DataFrame:
+    """Products holding stock with no sale in the window, largest tied-up value first
+
+    Products created inside the window have not had the chance to sell and are left out.
+    """
+    since = pd.Timestamp(window_start(days))
+    sold = catalog.index.isin(sales.loc[sales["units"] > 0, "product_id"].unique())
+    new = catalog["created_at"] >= since
+    report = catalog[(catalog["quantity"] > 0) & ~sold & ~new].copy()
+    report["stock_value"] = report["quantity"] * report["cost"]
+    report["last_sold"] = last_sold.reindex(report.index)
+    today = pd.Timestamp(datetime.utcnow().date())
+    report["days_since_sale"] = (today - report["last_sold"].dt.normalize()).dt.days
+    return report.sort_values("stock_value", ascending=False)
+
+
+def revenue_breakdown(catalog: pd.DataFrame, sales: pd.DataFrame, days: int) -> dict:
+    """Revenue and units per day (zero-filled), per category and per day and category"""
+    categories = catalog["category"].reindex(sales["product_id"]).fillna("Uncategorized")
+    lines = sales.assign(category=categories.to_numpy())
+    calendar = pd.date_range(pd.Timestamp(window_start(days)), periods=days, freq="D", name="day")
+
+    by_day = lines.groupby("day")[["units", "revenue"]].sum().reindex(calendar, fill_value=0)
+    by_category = lines.groupby("category")[["units", "revenue"]].sum()
+    by_category = by_category.sort_values("revenue", ascending=False)
+    total = by_category["revenue"].sum()
+    by_category["revenue_share"] = by_category["revenue"] / total if total > 0 else 0.0
+    by_day_category = lines.groupby(["day", "category"])[["units", "revenue"]].sum()
+
+    return {
+        "by_day": by_day.reset_index(),
+        "by_category": by_category.reset_index(),
+        "by_day_category": by_day_category.reset_index()
+    }
+
+
+# ==================== OUTPUT ====================
+def to_records(frame: pd.DataFrame, columns: List[str]) -> List[dict]:
+    """JSON-safe rows of the given columns (NaN/NaT become null, timestamps ISO dates)"""
+    frame = frame[columns].copy()
+    for column in columns:
+        if pd.api.types.is_datetime64_any_dtype(frame[column]):
+            frame[column] = frame[column].dt.strftime("%Y-%m-%d")
+        elif pd.api.types.is_float_dtype(frame[column]):
+            frame[column] = frame[column].round(4)
+    clean = frame.astype(object).where(pd.notna(frame), None)
+    return [
+        {k: (v.item() if isinstance(v, np.generic) else v) for k, v in row.items()}
+        for row in clean.to_dict(orient="records")
+    ]
+
+
+# ==================== CACHED REPORTS ====================
+async def _cached(db: AsyncSession, key: tuple, build: Callable[[], Awaitable[dict]]) -> bytes:
+    # Today's date is part of the key so windows roll over at midnight
+    key = (*key, datetime.utcnow().date(), await collection_versions(db, REPORT_TABLES))
+    report = report_cache.get(key)
+    if report is None:
+        report = dumps(await build())
+        report_cache.set(key, report)
+    return report
+
+
+async def velocity_report(db: AsyncSession, days: int, limit: int) -> bytes:
+    """Units sold per day for every SKU, fastest movers first"""
+    async def build():
+        catalog = await load_catalog(db)
+        sales = await load_daily_sales(db, days)
+        report = sales_velocity(catalog, sales, days).reset_index()
+        return {
+            "days": days,
+            "count": len(report),
+            "products": to_records(
+                report.head(limit),
+                PRODUCT_COLUMNS + ["units", "revenue", "selling_days", "units_per_day", "last_sold"]
+            )
+        }
+    return await _cached(db, ("velocity", days, limit), build)
+
+
+async def days_of_cover_report(db: AsyncSession, days: int, max_days: Optional[float], limit: int) -> bytes:
+    """Products that sold in the window by days of cover left, shortest first"""
+    async def build():
+        catalog = await load_catalog(db)
+        sales = await load_daily_sales(db, days)
+        report = sales_velocity(catalog, sales, days)
+        report = report[report["days_of_cover"].notna()].sort_values("days_of_cover")
+        if max_days is not None:
+            report = report[report["days_of_cover"] <= max_days]
+        report = report.reset_index()
+        return {
+            "days": days,
+            "count": len(report),
+            "products": to_records(report.head(limit), PRODUCT_COLUMNS + ["units_per_day", "days_of_cover"])
+        }
+    return await _cached(db, ("days_of_cover", days, max_days, limit), build)
+
+
+async def abc_report(db: AsyncSession, days: int, abc_class: Optional[str], limit: int) -> bytes:
+    """Per-class totals plus the products of one class (or all of them)"""
+    async def build():
+        catalog = await load_catalog(db)
+        sales = await load_daily_sales(db, days)
+        report = abc_classification(catalog, sales).reset_index()
+        summary = report.groupby("abc_class").agg(
+            products=("id", "size"), revenue=("revenue", "sum"), revenue_share=("revenue_share", "sum")
+        ).reindex(["A", "B", "C"], fill_value=0).reset_index()
+        if abc_class is not None:
+            report = report[report["abc_class"] == abc_class]
+        return {
+            "days": days,
+            "classes": to_records(summary, ["abc_class", "products", "revenue", "revenue_share"]),
+            "count": len(report),
+            "products": to_records(
+                report.head(limit),
+                PRODUCT_COLUMNS + ["revenue", "revenue_share", "cumulative_share", "abc_class"]
+            )
+        }
+    return await _cached(db, ("abc", days, abc_class, limit), build)
+
+
+async def turnover_report(db: AsyncSession, days: int) -> bytes:
+    """Turnover and days of inventory per category, with an "All" row"""
+    async def build():
+        catalog = await load_catalog(db)
+        sales = await load_daily_sales(db, days)
+        report = inventory_turnover(catalog, sales, days)
+        return {
+            "days": days,
+            "categories": to_records(
+                report,
+                ["category", "units", "revenue", "cogs", "inventory_value",
+                 "turnover", "annualized_turnover", "days_of_inventory"]
+            )
+        }
+    return await _cached(db, ("turnover", days), build)
+
+
+async def dead_stock_report(db: AsyncSession, days: int, limit: int) -> bytes:
+    """Unsold stock in the window and the value it ties up"""
+    async def build():
+        catalog = await load_catalog(db)
+        sales = await load_daily_sales(db, days)
+        last_sold = await load_last_sold(db)
+        report = dead_stock(catalog, sales, last_sold, days).reset_index()
+        return {
+            "days": days,
+            "count": len(report),
+            "stock_value": round(float(report["stock_value"].sum()), 2),
+            "products": to_records(
+                report.head(limit), PRODUCT_COLUMNS + ["stock_value", "last_sold", "days_since_sale"]
+            )
+        }
+    return await _cached(db, ("dead_stock", days, limit), build)
+
+
+async def revenue_report(db: AsyncSession, days: int) -> bytes:
+    """Revenue and units by day, by category and by day and category"""
+    async def build():
+        catalog = await load_catalog(db)
+        sales = await load_daily_sales(db, days)
+        breakdown = revenue_breakdown(catalog, sales, days)
+        return {
+            "days": days,
+            "by_day": to_records(breakdown["by_day"], ["day", "units", "revenue"]),
+            "by_category": to_records(
+                breakdown["by_category"], ["category", "units", "revenue", "revenue_share"]
+            ),
+            "by_day_category": to_records(
+                breakdown["by_day_category"], ["day", "category", "units", "revenue"]
+            )
+        }
+    return await _cached(db, ("revenue", days), build)
@@ -0,0 +1,100 @@
+from sqlalchemy import event
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+import os
+import re
+import time
+
+from database import engine
+
+# Matches the target table of INSERT / UPDATE / DELETE / REPLACE statements
+WRITE_STATEMENT = re.compile(
+    r"^\s*(?:INSERT|UPDATE|DELETE|REPLACE)\s+(?:OR\s+\w+\s+)?(?:INTO\s+|FROM\s+)?[\"`]?(\w+)",
+    re.IGNORECASE
+)
+
+
+class TTLCache:
+    """Small in-process cache with per-entry TTL, dropped when its tables are written
+
+    Read `generation` before loading a value and pass it to set(): a value
+    loaded while a write committed may predate it and is not stored.
+    """
+
+    def __init__(self, ttl: float, tables: Iterable[str], max_entries: int = 256):
+        self.ttl = ttl
+        self.tables = frozenset(tables)
+        self.max_entries = max_entries
+        self.generation = 0
+        self._entries: Dict[Any, Tuple[float, Any]] = {}
+        _caches.append(self)
+
+    def get(self, key: Any) -> Optional[Any]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            self._entries.pop(key, None)
+            return None
+        return value
+
+    def set(self, key: Any, value: Any, generation: Optional[int] = None) -> None:
+        if generation is not None and generation != self.generation:
+            return
+        if len(self._entries) >= self.max_entries:
+            self._entries.pop(next(iter(self._entries)))
+        self._entries[key] = (time.monotonic() + self.ttl, value)
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self.generation += 1
+
+
+_caches: List[TTLCache] = []
+
+
+def invalidate_tables(tables: Iterable[str]) -> None:
+    """Drop every cache that depends on one of the given tables"""
+    tables = set(tables)
+    for cache in _caches:
+        if cache.tables & tables:
+            cache.clear()
+
+
+def cache_ttl(name: str, default: float) -> float:
+    """Read a cache TTL (seconds) from the environment"""
+    return float(os.getenv(name, default))
+
+
+# ==================== WRITE INVALIDATION ====================
+# Writes are recorded per connection and invalidate caches when the
+# transaction commits; rolled-back writes leave the caches untouched.
+# The engine's commit event fires before the database commits, so caches are
+# dropped again once the connection returns to the pool: a read that ran
+# during the commit may have cached the old data.
+@event.listens_for(engine.sync_engine, "after_cursor_execute")
+def _record_write(conn, cursor, statement, parameters, context, executemany):
+    match = WRITE_STATEMENT.match(statement)
+    if match:
+        conn.info.setdefault("dirty_tables", set()).add(match.group(1).lower())
+
+
+@event.listens_for(engine.sync_engine, "commit")
+def _invalidate_on_commit(conn):
+    dirty = conn.info.pop("dirty_tables", None)
+    if dirty:
+        invalidate_tables(dirty)
+        conn.info.setdefault("committed_tables", set()).update(dirty)
+
+
+@event.listens_for(engine.sync_engine.pool, "checkin")
+def _invalidate_after_commit(dbapi_connection, connection_record):
+    # Connection.info is the pool record's info, so this sees what the commit recorded
+    committed = connection_record.info.pop("committed_tables", None)
+    if committed:
+        invalidate_tables(committed)
+
+
+@event.listens_for(engine.sync_engine, "rollback")
+def _forget_on_rollback(conn):
+    conn.info.pop("dirty_tables", None)
@@ -0,0 +1,99 @@
+from typing import Dict, List, Optional
+import asyncio
+import importlib
+import logging
+import os
+import time
+
+logger = logging.getLogger(__name__)
+
+# Import deferred modules in a worker thread once the app is serving (override through env vars)
+WARMUP_ENABLED = os.getenv("LAZY_WARMUP", "true").lower() in ("1", "true", "yes")
+
+# The server imports this module first, so this is (almost) when its import began
+STARTED = time.perf_counter()
+
+_phases: Dict[str, float] = {}
+_lazy: List["LazyModule"] = []
+_warmer: Optional[asyncio.Task] = None
+
+
+# ==================== TIMING ====================
+def mark(phase: str) -> float:
+    """Record seconds since the server import began; the first mark of a phase wins"""
+    return _phases.setdefault(phase, round(time.perf_counter() - STARTED, 4))
+
+
+def mark_first_request() -> None:
+    if "first_request" not in _phases:
+        logger.info(f"First request served {mark('first_request'):.3f}s after import began")
+
+
+def report() -> dict:
+    """Startup milestones in seconds since import began, plus deferred module state"""
+    return {
+        "phases": dict(_phases),
+        "deferred_modules": {module.name: module.loaded for module in _lazy}
+    }
+
+
+# ==================== DEFERRED IMPORTS ====================
+class LazyModule:
+    """Stands in for a heavy module, importing it on first attribute access
+
+    With warm=False the background warm-up skips it, so it is only imported
+    if something actually uses it.
+    """
+
+    def __init__(self, name: str, warm: bool = True):
+        self.name = name
+        self.warm = warm
+        self._module = None
+        _lazy.append(self)
+
+    @property
+    def loaded(self) -> bool:
+        return self._module is not None
+
+    def load(self):
+        if self._module is None:
+            started = time.perf_counter()
+            module = importlib.import_module(self.name)
+            _phases.setdefault(f"import:{self.name}", round(time.perf_counter() - started, 4))
+            self._module = module
+        return self._module
+
+    def __getattr__(self, attr: str):
+        return getattr(self.load(), attr)
+
+
+async def _warm_up() -> None:
+    for module in _lazy:
+        if module.loaded or not module.warm:
+            continue
+        try:
+            await asyncio.to_thread(module.load)
+        except Exception as e:
+            # Usually an optional stack that is not installed; its routes report it on use
+            logger.warning(f"Could not preload {module.name}: {e!r}")
+    mark("warm")
+    logger.info(f"Startup report: {report()}")
+
+
+def start_warmup() -> None:
+    global _warmer
+    if not WARMUP_ENABLED:
+        return
+    if _warmer is None or _warmer.done():
+        _warmer = asyncio.create_task(_warm_up())
+
+
+async def stop_warmup() -> None:
+    global _warmer
+    if _warmer is not None:
+        _warmer.cancel()
+        try:
+            await _warmer
+        except asyncio.CancelledError:
+            pass
+        _warmer = None
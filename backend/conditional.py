@@ -0,0 +1,145 @@
+from fastapi import Request, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Any, Optional, Sequence, Tuple
+import hashlib
+
+from models import CollectionVersion
+
+# Clients may keep responses but must revalidate them before every reuse;
+# without it browsers guess a freshness lifetime from Last-Modified
+CACHE_CONTROL = "private, no-cache"
+
+
+def make_etag(*parts: Any, weak: bool = True) -> str:
+    """ETag over the parts that identify one representation"""
+    digest = hashlib.blake2b("|".join(map(str, parts)).encode(), digest_size=12).hexdigest()
+    return f'W/"{digest}"' if weak else f'"{digest}"'
+
+
+def http_date(value: datetime) -> str:
+    # Stored datetimes are naive UTC
+    return format_datetime(value.replace(tzinfo=timezone.utc, microsecond=0), usegmt=True)
+
+
+def is_conditional(request: Request) -> bool:
+    return "if-none-match" in request.headers or "if-modified-since" in request.headers
+
+
+def is_not_modified(request: Request, etag: str, last_modified: Optional[datetime]) -> bool:
+    """Evaluate If-None-Match (weak comparison), or If-Modified-Since when it is absent"""
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        opaque = etag.removeprefix("W/")
+        tags = [tag.strip() for tag in if_none_match.split(",")]
+        return any(tag == "*" or tag.removeprefix("W/") == opaque for tag in tags)
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since is None or last_modified is None:
+        return False
+    try:
+        since = parsedate_to_datetime(if_modified_since)
+    except (TypeError, ValueError):
+        return False
+    if since.tzinfo is None:
+        return False
+    return last_modified.replace(tzinfo=timezone.utc, microsecond=0) <= since
+
+
+def set_validators(response: Response, etag: str, last_modified: Optional[datetime]) -> None:
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = CACHE_CONTROL
+    if last_modified is not None:
+        response.headers["Last-Modified"] = http_date(last_modified)
+
+
+def not_modified(etag: str, last_modified: Optional[datetime]) -> Response:
+    response = Response(status_code=304)
+    set_validators(response, etag, last_modified)
+    return response
+
+
+# ==================== COLLECTIONS ====================
+async def collection_version(db: AsyncSession, name: str) -> Tuple[int, Optional[datetime]]:
+    """Write counter and last write time of a table (0, None before its first write)"""
+    result = await db.execute(
+        select(CollectionVersion.version, CollectionVersion.updated_at).where(CollectionVersion.name == name)
+    )
+    row = result.one_or_none()
+    return (row.version, row.updated_at) if row else (0, None)
+
+
+async def collection_versions(db: AsyncSession, names: Sequence[str]) -> Tuple[int, ...]:
+    """Write counters of several tables in one read, in the order given"""
+    result = await db.execute(
+        select(CollectionVersion.name, CollectionVersion.version).where(CollectionVersion.name.in_(names))
+    )
+    versions = dict(result.all())
+    return tuple(versions.get(name, 0) for name in names)
+
+
+async def check_collection(
+    request: Request,
+    response: Response,
+    db: AsyncSession,
+    name: str
+) -> Optional[Response]:
+    """304 response when the client's copy of this list page is current, else None
+
+    The version is read before the page, so a write landing in between makes
+    the ETag older than the payload and the next request simply refetches.
+    Filters, limit and cursor are part of the ETag.
+    """
+    version, updated_at = await collection_version(db, name)
+    etag = make_etag(name, version, updated_at, sorted(request.query_params.multi_items()))
+    if is_not_modified(request, etag, updated_at):
+        return not_modified(etag, updated_at)
+    set_validators(response, etag, updated_at)
+    return None
+
+
+# ==================== SINGLE RESOURCES ====================
+def resource_etag(name: str, key: Any, updated_at: Optional[datetime], version: Optional[int] = None) -> str:
+    """Strong ETag from the row version when the table has one (usable in If-Match), else weak"""
+    if version is not None:
+        return make_etag(name, key, version, weak=False)
+    return make_etag(name, key, updated_at)
+
+
+def if_match_satisfied(if_match: str, etag: str) -> bool:
+    """Strong comparison, as If-Match requires: weak tags never match"""
+    tags = [tag.strip() for tag in if_match.split(",")]
+    return any(tag == "*" or (tag == etag and not tag.startswith("W/")) for tag in tags)
+
+
+async def check_resource(
+    request: Request,
+    db: AsyncSession,
+    model,
+    key: Any
+) -> Optional[Response]:
+    """304 response when the client's copy of one row is current, else None
+
+    Only conditional requests pay for the lookup, which reads the validator
+    columns by primary key without loading the row.
+    """
+    if not is_conditional(request):
+        return None
+    versioned = hasattr(model, "version")
+    columns = [model.updated_at, model.version] if versioned else [model.updated_at]
+    result = await db.execute(select(*columns).where(model.id == key))
+    row = result.one_or_none()
+    if row is None:
+        return None
+    etag = resource_etag(model.__tablename__, key, row.updated_at, row.version if versioned else None)
+    if is_not_modified(request, etag, row.updated_at):
+        return not_modified(etag, row.updated_at)
+    return None
+
+
+def set_resource_validators(response: Response, row) -> None:
+    """ETag and Last-Modified of a loaded row, matching what check_resource computes"""
+    etag = resource_etag(row.__tablename__, row.id, row.updated_at, getattr(row, "version", None))
+    set_validators(response, etag, row.updated_at)
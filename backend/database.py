@@ -1,5 +1,9 @@
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
 from sqlalchemy.orm import declarative_base
+from sqlalchemy.engine import make_url
+from sqlalchemy import event
+from typing import Awaitable, Callable, Dict, List, Sequence, TypeVar
+import asyncio
 import os
 from pathlib import Path
 
@@ -9,15 +13,178 @@ instance_folder.mkdir(exist_ok=True)
 
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite+aiosqlite:///./instance/puregold.db")
 
-engine = create_async_engine(DATABASE_URL, echo=False)
+# ==================== ENGINE PROFILE ====================
+# SQLite PRAGMAs applied to every new connection (override through env vars)
+SQLITE_PRAGMAS = {
+    "journal_mode": os.getenv("SQLITE_JOURNAL_MODE", "WAL"),
+    "synchronous": os.getenv("SQLITE_SYNCHRONOUS", "NORMAL"),
+    "mmap_size": int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024))),
+    # Negative values are KiB, so the default is a 64 MiB page cache per connection
+    "cache_size": int(os.getenv("SQLITE_CACHE_SIZE", "-65536")),
+    "busy_timeout": int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000")),
+    "temp_store": os.getenv("SQLITE_TEMP_STORE", "MEMORY"),
+}
+
+# Connection pool sizing
+POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+# Optional separate pool of read-only connections for GET routes
+READ_POOL_ENABLED = os.getenv("DB_READ_POOL", "false").lower() in ("1", "true", "yes")
+READ_POOL_SIZE = int(os.getenv("DB_READ_POOL_SIZE", str(POOL_SIZE * 2)))
+
+url = make_url(DATABASE_URL)
+is_sqlite = url.get_backend_name() == "sqlite"
+is_file_sqlite = is_sqlite and url.database not in (None, "", ":memory:")
+
+
+def sqlite_pragma_listener(read_only: bool = False, file_backed: bool = is_file_sqlite):
+    """Build a connect hook that configures each new SQLite connection"""
+    skipped = set()
+    if not file_backed:
+        skipped |= {"journal_mode", "mmap_size"}
+    if read_only:
+        # The journal mode is persistent in the file and owned by the writer
+        skipped.add("journal_mode")
+
+    def apply_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in SQLITE_PRAGMAS.items():
+                if name not in skipped:
+                    cursor.execute(f"PRAGMA {name}={value}")
+        finally:
+            cursor.close()
+
+    return apply_sqlite_pragmas
+
+
+def build_engine(database_url, pool_size: int, read_only: bool = False):
+    """Create an async engine with the configured pool and PRAGMAs"""
+    target = make_url(database_url)
+    sqlite = target.get_backend_name() == "sqlite"
+    file_backed = sqlite and target.database not in (None, "", ":memory:")
+    options = {"echo": False}
+    if file_backed or not sqlite:
+        options.update(
+            pool_size=pool_size,
+            max_overflow=MAX_OVERFLOW,
+            pool_timeout=POOL_TIMEOUT
+        )
+    new_engine = create_async_engine(target, **options)
+    if sqlite:
+        event.listen(new_engine.sync_engine, "connect", sqlite_pragma_listener(read_only, file_backed))
+    return new_engine
+
+
+def read_only_url():
+    """The same SQLite file opened in read-only URI mode"""
+    path = Path(url.database)
+    if not path.is_absolute():
+        path = Path.cwd() / path
+    return url.set(
+        database=f"file:{path}",
+        query={**url.query, "mode": "ro", "uri": "true"}
+    )
+
+
+engine = build_engine(url, POOL_SIZE)
 AsyncSessionLocal = async_sessionmaker(
-    engine, 
-    class_=AsyncSession, 
+    engine,
+    class_=AsyncSession,
+    expire_on_commit=False
+)
+
+# Readers share the write engine unless a dedicated read-only pool is enabled
+if READ_POOL_ENABLED and is_file_sqlite:
+    read_engine = build_engine(read_only_url(), READ_POOL_SIZE, read_only=True)
+else:
+    read_engine = engine
+ReadSessionLocal = async_sessionmaker(
+    read_engine,
+    class_=AsyncSession,
     expire_on_commit=False
 )
 
 Base = declarative_base()
 
+# ==================== STORE SHARDS ====================
+# Per-store stock lives in one SQLite file per store, so stores never wait on each
+# other's write lock; the main database stays the shared catalog (override through env vars)
+STORE_SHARD_DIR = Path(os.getenv(
+    "STORE_SHARD_DIR",
+    str((Path(url.database).resolve().parent if is_file_sqlite else instance_folder) / "stores")
+))
+STORE_SHARD_URL = os.getenv("STORE_SHARD_URL", f"sqlite+aiosqlite:///{STORE_SHARD_DIR}/store-{{store_id}}.db")
+STORE_SHARD_POOL_SIZE = int(os.getenv("STORE_SHARD_POOL_SIZE", "2"))
+
+# Tables that live in every store shard rather than in the catalog
+ShardBase = declarative_base()
+
+T = TypeVar("T")
+
+
+class ShardRouter:
+    """Engines and sessions of the per-store shards, opened on first use"""
+
+    def __init__(self, url_template: str, pool_size: int):
+        self.url_template = url_template
+        self.pool_size = pool_size
+        self._engines: Dict[int, object] = {}
+        self._sessions: Dict[int, async_sessionmaker] = {}
+        self._ready: set = set()
+        self._lock = asyncio.Lock()
+        self._engine_hooks: List[Callable] = []
+
+    def engine(self, store_id: int):
+        if store_id not in self._engines:
+            shard_url = make_url(self.url_template.format(store_id=store_id))
+            if shard_url.get_backend_name() == "sqlite" and shard_url.database not in (None, "", ":memory:"):
+                Path(shard_url.database).parent.mkdir(parents=True, exist_ok=True)
+            shard_engine = build_engine(shard_url, self.pool_size)
+            for hook in self._engine_hooks:
+                hook(shard_engine)
+            self._engines[store_id] = shard_engine
+            self._sessions[store_id] = async_sessionmaker(shard_engine, class_=AsyncSession, expire_on_commit=False)
+        return self._engines[store_id]
+
+    def session(self, store_id: int) -> AsyncSession:
+        self.engine(store_id)
+        return self._sessions[store_id]()
+
+    async def ensure(self, store_id: int) -> None:
+        """Create the shard's tables, once per store and process"""
+        if store_id in self._ready:
+            return
+        async with self._lock:
+            if store_id not in self._ready:
+                async with self.engine(store_id).begin() as conn:
+                    await conn.run_sync(ShardBase.metadata.create_all)
+                self._ready.add(store_id)
+
+    def add_engine_hook(self, hook: Callable) -> None:
+        """Run hook(engine) on every shard engine, including ones opened later"""
+        self._engine_hooks.append(hook)
+        for shard_engine in self._engines.values():
+            hook(shard_engine)
+
+    async def fan_out(self, store_ids: Sequence[int], query: Callable[[AsyncSession], Awaitable[T]]) -> Dict[int, T]:
+        """Run query(session) against every listed shard concurrently"""
+        async def run(store_id: int) -> T:
+            await self.ensure(store_id)
+            async with self.session(store_id) as session:
+                return await query(session)
+
+        results = await asyncio.gather(*(run(store_id) for store_id in store_ids))
+        return dict(zip(store_ids, results))
+
+    async def dispose(self) -> None:
+        for shard_engine in self._engines.values():
+            await shard_engine.dispose()
+
+
+shards = ShardRouter(STORE_SHARD_URL, STORE_SHARD_POOL_SIZE)
+
 async def get_db():
     async with AsyncSessionLocal() as session:
         try:
@@ -25,6 +192,14 @@ async def get_db():
         finally:
             await session.close()
 
+async def get_read_db():
+    """Session for read-only routes; uses the read pool when enabled"""
+    async with ReadSessionLocal() as session:
+        try:
+            yield session
+        finally:
+            await session.close()
+
 async def init_db():
     async with engine.begin() as conn:
-        await conn.run_sync(Base.metadata.create_all)
\ No newline at end of file
+        await conn.run_sync(Base.metadata.create_all)
@@ -0,0 +1,108 @@
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import AsyncIterator, Iterable, Optional, Set
+import asyncio
+import json
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+# Per-client buffer limit and keep-alive period (override through env vars)
+MAX_PENDING = int(os.getenv("EVENT_MAX_PENDING", "1000"))
+HEARTBEAT_SECONDS = float(os.getenv("EVENT_HEARTBEAT_SECONDS", "15"))
+
+
+@dataclass(eq=False)
+class Subscriber:
+    """One connected client: its filters and the events it has not read yet"""
+    product_ids: Optional[Set[int]] = None
+    category: Optional[str] = None
+    low_stock_only: bool = False
+    # product id -> latest unread event; a slow reader only ever sees the newest state
+    pending: "OrderedDict[int, dict]" = field(default_factory=OrderedDict)
+    overflowed: bool = False
+    wakeup: asyncio.Event = field(default_factory=asyncio.Event)
+
+    def wants(self, event: dict) -> bool:
+        if self.product_ids is not None and event["product_id"] not in self.product_ids:
+            return False
+        if self.category is not None and event["category"] != self.category:
+            return False
+        # Keep events that leave the low-stock list so clients can drop the row
+        if self.low_stock_only and not (event["low_stock"] or event["was_low_stock"]):
+            return False
+        return True
+
+    def push(self, event: dict) -> None:
+        if self.overflowed:
+            return
+        self.pending[event["product_id"]] = event
+        self.pending.move_to_end(event["product_id"])
+        if len(self.pending) > MAX_PENDING:
+            # Too far behind: drop the backlog and tell the client to refetch
+            self.pending.clear()
+            self.overflowed = True
+        self.wakeup.set()
+
+
+_subscribers: Set[Subscriber] = set()
+
+
+# ==================== PUBLISHING ====================
+def stock_event(product, previous_quantity: int) -> dict:
+    """Event payload from a product row (ORM object or Row) after its stock changed"""
+    return {
+        "product_id": product.id,
+        "sku": product.sku,
+        "name": product.name,
+        "category": product.category,
+        "quantity": product.quantity,
+        "previous_quantity": previous_quantity,
+        "reorder_level": product.reorder_level,
+        "low_stock": product.quantity <= product.reorder_level,
+        "was_low_stock": previous_quantity <= product.reorder_level
+    }
+
+
+def publish(events: Iterable[dict]) -> None:
+    """Fan events out to every matching subscriber; never blocks on slow clients
+
+    Call only after the change is committed. Delivery is in-process, so each
+    worker streams the changes made through that worker.
+    """
+    for event in events:
+        for subscriber in _subscribers:
+            if subscriber.wants(event):
+                subscriber.push(event)
+
+
+# ==================== STREAMING ====================
+def format_sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+async def stream(subscriber: Subscriber) -> AsyncIterator[str]:
+    """Server-Sent Events for one client until it disconnects"""
+    _subscribers.add(subscriber)
+    try:
+        yield format_sse("ready", {"max_pending": MAX_PENDING})
+        while True:
+            try:
+                await asyncio.wait_for(subscriber.wakeup.wait(), HEARTBEAT_SECONDS)
+            except asyncio.TimeoutError:
+                yield ": keep-alive\n\n"
+                continue
+            subscriber.wakeup.clear()
+
+            if subscriber.overflowed:
+                subscriber.overflowed = False
+                yield format_sse("resync", {"reason": "client fell behind"})
+                continue
+
+            batch = list(subscriber.pending.values())
+            subscriber.pending.clear()
+            for event in batch:
+                yield format_sse("stock", event)
+    finally:
+        _subscribers.discard(subscriber)
@@ -0,0 +1,173 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select
+from typing import List, Optional, Sequence
+from datetime import datetime, date, timedelta
+import numpy as np
+import pandas as pd
+import os
+
+from models import Product, StockDailyRollup
+
+# Model settings (override through env vars)
+HISTORY_DAYS = int(os.getenv("FORECAST_HISTORY_DAYS", "90"))
+SMOOTHING_ALPHA = float(os.getenv("FORECAST_ALPHA", "0.3"))
+DEFAULT_LEAD_TIME_DAYS = int(os.getenv("FORECAST_LEAD_TIME_DAYS", "7"))
+# Average inter-demand interval above which a series counts as intermittent (Syntetos-Boylan)
+INTERMITTENT_ADI = 1.32
+
+
+# ==================== DATA ====================
+async def load_products(db: AsyncSession, product_ids: Optional[Sequence[int]] = None) -> pd.DataFrame:
+    """Stock position of the products to forecast (all products when ids is None)"""
+    query = select(
+        Product.id, Product.name, Product.sku, Product.quantity, Product.reorder_level
+    ).order_by(Product.id)
+    if product_ids is not None:
+        query = query.where(Product.id.in_(product_ids))
+    result = await db.execute(query)
+    return pd.DataFrame(result.all(), columns=["id", "name", "sku", "quantity", "reorder_level"])
+
+
+async def load_daily_demand(
+    db: AsyncSession,
+    product_ids: Sequence[int],
+    history_days: int = HISTORY_DAYS,
+    today: Optional[date] = None
+) -> np.ndarray:
+    """Products x days matrix of outgoing units, oldest day first"""
+    today = today or datetime.utcnow().date()
+    since = today - timedelta(days=history_days - 1)
+    demand = np.zeros((len(product_ids), history_days))
+    if not len(product_ids):
+        return demand
+
+    # Daily rollups keep outgoing totals after raw transactions are archived
+    query = (
+        select(StockDailyRollup.product_id, StockDailyRollup.day, StockDailyRollup.out_quantity)
+        .where(StockDailyRollup.day >= since, StockDailyRollup.out_quantity > 0)
+    )
+    # Small id lists are filtered in SQL; whole-catalog runs just read every day in range
+    if len(product_ids) <= 500:
+        query = query.where(StockDailyRollup.product_id.in_(product_ids))
+    result = await db.execute(query)
+    rows = result.all()
+    if not rows:
+        return demand
+
+    ids, days, quantities = (np.asarray(col) for col in zip(*rows))
+    # Only the ~history_days distinct days need converting to offsets
+    unique_days, day_codes = np.unique(days, return_inverse=True)
+    offsets = np.array([(d - since).days for d in unique_days])
+    day_idx = offsets[day_codes]
+    row_idx = pd.Index(product_ids).get_indexer(ids)
+    keep = (row_idx >= 0) & (day_idx >= 0) & (day_idx < history_days)
+    np.add.at(demand, (row_idx[keep], day_idx[keep]), quantities[keep].astype(float))
+    return demand
+
+
+# ==================== MODELS ====================
+def simple_exponential_smoothing(demand: np.ndarray, alpha: float = SMOOTHING_ALPHA) -> np.ndarray:
+    """Final SES level per row; one pass over days, vectorized over products"""
+    warmup = min(7, demand.shape[1])
+    level = demand[:, :warmup].mean(axis=1)
+    for t in range(warmup, demand.shape[1]):
+        level = alpha * demand[:, t] + (1 - alpha) * level
+    return level
+
+
+def croston(demand: np.ndarray, alpha: float = SMOOTHING_ALPHA) -> np.ndarray:
+    """Croston's method (demand size / interval) per row, vectorized over products"""
+    n = demand.shape[0]
+    size = np.zeros(n)
+    interval = np.ones(n)
+    since_last = np.ones(n)
+    seen = np.zeros(n, dtype=bool)
+    for t in range(demand.shape[1]):
+        d = demand[:, t]
+        hit = d > 0
+        first, later = hit & ~seen, hit & seen
+        size = np.where(first, d, np.where(later, alpha * d + (1 - alpha) * size, size))
+        interval = np.where(
+            first, since_last,
+            np.where(later, alpha * since_last + (1 - alpha) * interval, interval)
+        )
+        seen |= hit
+        since_last = np.where(hit, 1, since_last + 1)
+    return np.where(seen, size / interval, 0.0)
+
+
+def daily_demand_rate(demand: np.ndarray, alpha: float = SMOOTHING_ALPHA):
+    """Pick Croston for intermittent series and SES otherwise; returns (rate, method)"""
+    nonzero = (demand > 0).sum(axis=1)
+    with np.errstate(divide="ignore"):
+        adi = np.where(nonzero > 0, demand.shape[1] / np.maximum(nonzero, 1), np.inf)
+    intermittent = adi > INTERMITTENT_ADI
+    rate = np.where(intermittent, croston(demand, alpha), simple_exponential_smoothing(demand, alpha))
+    method = np.where(intermittent, "croston", "ses")
+    return rate, method
+
+
+# ==================== FORECAST ====================
+def plan_replenishment(
+    products: pd.DataFrame,
+    rate: np.ndarray,
+    horizon_days: int,
+    lead_time_days: int,
+    today: date
+) -> pd.DataFrame:
+    """Reorder date, order quantity and risk from demand rate, reorder level and lead time"""
+    quantity = products["quantity"].to_numpy(dtype=float)
+    reorder_level = products["reorder_level"].to_numpy(dtype=float)
+    reorder_point = reorder_level + rate * lead_time_days
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        days_of_cover = np.where(rate > 0, quantity / rate, np.inf)
+        days_to_reorder = np.where(
+            quantity <= reorder_point, 0.0,
+            np.where(rate > 0, (quantity - reorder_point) / rate, np.inf)
+        )
+
+    order_quantity = np.ceil(np.maximum(0.0, rate * (horizon_days + lead_time_days) + reorder_level - quantity))
+    risk = np.select(
+        [days_of_cover <= lead_time_days, (days_of_cover <= horizon_days) | (quantity <= reorder_level)],
+        ["high", "medium"],
+        "low"
+    )
+    reorder_offsets = np.where(np.isfinite(days_to_reorder), np.floor(days_to_reorder), np.nan)
+
+    plan = products[["id", "name", "sku", "quantity", "reorder_level"]].copy()
+    plan["daily_demand"] = rate.round(3)
+    plan["predicted_demand"] = np.round(rate * horizon_days, 1)
+    plan["days_of_cover"] = np.where(np.isfinite(days_of_cover), np.round(days_of_cover, 1), np.nan)
+    plan["reorder_date"] = [
+        None if np.isnan(offset) else (today + timedelta(days=int(offset))).isoformat()
+        for offset in reorder_offsets
+    ]
+    plan["order_quantity"] = order_quantity.astype(int)
+    plan["risk_level"] = risk
+    return plan
+
+
+async def forecast(
+    db: AsyncSession,
+    product_ids: Optional[Sequence[int]] = None,
+    horizon_days: int = 30,
+    lead_time_days: int = DEFAULT_LEAD_TIME_DAYS
+) -> pd.DataFrame:
+    """Forecast the given products (or the whole catalog) in one vectorized pass"""
+    today = datetime.utcnow().date()
+    products = await load_products(db, product_ids)
+    demand = await load_daily_demand(db, products["id"].tolist(), today=today)
+    rate, method = daily_demand_rate(demand)
+    plan = plan_replenishment(products, rate, horizon_days, lead_time_days, today)
+    plan["method"] = method
+    return plan
+
+
+def to_records(plan: pd.DataFrame) -> List[dict]:
+    """JSON-safe rows (NaN/inf become null)"""
+    clean = plan.astype(object).where(pd.notna(plan), None)
+    return [
+        {k: (v.item() if isinstance(v, np.generic) else v) for k, v in row.items()}
+        for row in clean.to_dict(orient="records")
+    ]
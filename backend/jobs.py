@@ -0,0 +1,360 @@
+from fastapi import HTTPException
+from fastapi.exceptions import RequestValidationError
+from pydantic import BaseModel, ValidationError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, update, func, and_, or_, case
+from datetime import datetime, timedelta
+from typing import AsyncIterator, Awaitable, Callable, Dict, Iterator, List, NamedTuple, Optional, Type
+import asyncio
+import json
+import logging
+import os
+import random
+
+from database import AsyncSessionLocal
+from models import Job, JobKind, JobResult, JobStatus, Product
+from schemas import ForecastJobParams, CategorizeJobParams, ReorderJobParams
+import ai_routes
+import leases
+
+logger = logging.getLogger(__name__)
+
+# Job queue settings (override through env vars)
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "3"))
+JOB_RETRY_BACKOFF = float(os.getenv("JOB_RETRY_BACKOFF_S", "10"))
+JOB_POLL_INTERVAL = float(os.getenv("JOB_POLL_INTERVAL_S", "5"))
+# Products per checkpoint; a crash or retry redoes at most one chunk
+JOB_CHUNK_SIZE = int(os.getenv("JOB_CHUNK_SIZE", "200"))
+# Seconds shutdown waits for workers to reach a checkpoint before cancelling them
+JOB_STOP_GRACE = float(os.getenv("JOB_STOP_GRACE_S", "5"))
+# A running job whose owner has not checkpointed for this long is taken over
+# by another worker; it must exceed the time one chunk takes
+JOB_LEASE = float(os.getenv("JOB_LEASE_S", "300"))
+
+PRODUCT_COLUMNS = [
+    Product.id, Product.name, Product.sku, Product.description, Product.category,
+    Product.quantity, Product.reorder_level, Product.price, Product.cost
+]
+
+_workers: List[asyncio.Task] = []
+_wakeup = asyncio.Event()
+_stopping = False
+
+
+class JobType(NamedTuple):
+    params: Type[BaseModel]
+    select: Callable  # params -> select over PRODUCT_COLUMNS
+    process: Callable[..., Awaitable[list]]  # (params, rows) -> result items
+    apply: Optional[Callable[..., Awaitable[None]]] = None  # (db, params, items), in the checkpoint transaction
+    needs_ai: bool = False
+
+
+# ==================== JOB TYPES ====================
+def _all_products(params):
+    return select(*PRODUCT_COLUMNS)
+
+
+def _uncategorized_products(params):
+    return select(*PRODUCT_COLUMNS).where(or_(Product.category.is_(None), Product.category == ""))
+
+
+def _low_stock_products(params):
+    return select(*PRODUCT_COLUMNS).where(Product.quantity <= Product.reorder_level)
+
+
+def _batches(rows: list) -> Iterator[list]:
+    for start in range(0, len(rows), ai_routes.AI_REORDER_BATCH_SIZE):
+        yield rows[start:start + ai_routes.AI_REORDER_BATCH_SIZE]
+
+
+async def _forecast(params: ForecastJobParams, rows) -> list:
+    lead_time = params.lead_time_days
+    if lead_time is None:
+        lead_time = ai_routes.forecasting.DEFAULT_LEAD_TIME_DAYS
+    async with AsyncSessionLocal() as db:
+        plan = await ai_routes.forecasting.forecast(db, [row.id for row in rows], params.days, lead_time)
+    if params.risk_level:
+        plan = plan[plan["risk_level"] == params.risk_level]
+    return ai_routes.forecasting.to_records(plan)
+
+
+async def _categorize(params: CategorizeJobParams, rows) -> list:
+    batches = list(_batches(rows))
+    results = await asyncio.gather(*(ai_routes.categorize_batch(batch) for batch in batches))
+    categories = {pid: category for result in results for pid, category in result.items()}
+    return [
+        {"product_id": row.id, "name": row.name, "sku": row.sku, "category": categories.get(row.id)}
+        for row in rows
+    ]
+
+
+async def _apply_categories(db: AsyncSession, params: CategorizeJobParams, items: list) -> None:
+    if not params.apply:
+        return
+    categories = {item["product_id"]: item["category"] for item in items if item["category"] is not None}
+    if not categories:
+        return
+    # One UPDATE for the chunk; products someone categorized while the LLM was answering are left alone
+    await db.execute(
+        update(Product)
+        .where(Product.id.in_(categories), or_(Product.category.is_(None), Product.category == ""))
+        .values(
+            category=case(categories, value=Product.id),
+            version=Product.version + 1,
+            updated_at=datetime.utcnow()
+        )
+        .execution_options(synchronize_session=False)
+    )
+
+
+async def _reorder(params: ReorderJobParams, rows) -> list:
+    batches = list(_batches(rows))
+    results = await asyncio.gather(*(ai_routes.request_reorder_quantities(batch) for batch in batches))
+    quantities = {pid: quantity for result in results for pid, quantity in result.items()}
+    return [
+        {
+            "product_id": row.id,
+            "product_name": row.name,
+            "sku": row.sku,
+            "current_stock": row.quantity,
+            "reorder_level": row.reorder_level,
+            "suggested_quantity": quantities[row.id]
+        }
+        for row in rows if row.id in quantities
+    ]
+
+
+JOB_TYPES: Dict[JobKind, JobType] = {
+    JobKind.forecast: JobType(ForecastJobParams, _all_products, _forecast),
+    JobKind.categorize: JobType(
+        CategorizeJobParams, _uncategorized_products, _categorize, _apply_categories, needs_ai=True
+    ),
+    JobKind.reorder: JobType(ReorderJobParams, _low_stock_products, _reorder, needs_ai=True),
+}
+
+
+# ==================== SUBMITTING ====================
+async def submit(db: AsyncSession, kind: JobKind, params: dict, user_id: Optional[int]) -> Job:
+    """Validate the parameters and queue a job; a worker picks it up right away when idle"""
+    job_type = JOB_TYPES[kind]
+    if job_type.needs_ai and not ai_routes.AI_ENABLED:
+        raise HTTPException(status_code=503, detail="AI features are disabled")
+    try:
+        parsed = job_type.params.model_validate(params)
+    except ValidationError as e:
+        raise RequestValidationError([{**error, "loc": ("body", "params", *error["loc"])} for error in e.errors()])
+
+    job = Job(kind=kind, params=parsed.model_dump(), created_by=user_id)
+    db.add(job)
+    await db.commit()
+    await db.refresh(job)
+    _wakeup.set()
+    return job
+
+
+async def cancel(db: AsyncSession, job_id: int) -> Optional[Job]:
+    """Cancel a queued or running job; a running one stops at its next checkpoint"""
+    await db.execute(
+        update(Job)
+        .where(Job.id == job_id, Job.status.in_([JobStatus.queued, JobStatus.running]))
+        .values(status=JobStatus.cancelled, finished_at=datetime.utcnow())
+    )
+    await db.commit()
+    return await db.get(Job, job_id, populate_existing=True)
+
+
+async def iter_results(job_id: int) -> AsyncIterator[bytes]:
+    """The job's result items as one JSON array, spliced from the stored chunks"""
+    async with AsyncSessionLocal() as db:
+        chunks = await db.stream_scalars(
+            select(JobResult.items).where(JobResult.job_id == job_id).order_by(JobResult.id)
+        )
+        yield b"["
+        first = True
+        async for items in chunks:
+            if items == "[]":
+                continue
+            yield (b"" if first else b",") + items[1:-1].encode()
+            first = False
+        yield b"]"
+
+
+# ==================== RUNNING ====================
+async def _claim() -> Optional[Job]:
+    """Atomically take the oldest due job, or a running one whose owner stopped checkpointing
+
+    A job taken over from a dead owner resumes from its cursor without
+    counting another attempt.
+    """
+    now = datetime.utcnow()
+    claimable = or_(
+        and_(Job.status == JobStatus.queued, Job.run_after <= now),
+        and_(
+            Job.status == JobStatus.running,
+            or_(Job.heartbeat_at.is_(None), Job.heartbeat_at < now - timedelta(seconds=JOB_LEASE))
+        )
+    )
+    due = select(Job.id).where(claimable).order_by(Job.id).limit(1).scalar_subquery()
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(
+            update(Job)
+            .where(Job.id == due, claimable)
+            .values(
+                status=JobStatus.running,
+                owner=leases.OWNER,
+                heartbeat_at=now,
+                attempts=case((Job.status == JobStatus.queued, Job.attempts + 1), else_=Job.attempts),
+                started_at=func.coalesce(Job.started_at, now)
+            )
+            .returning(Job)
+        )
+        job = result.scalar_one_or_none()
+        await db.commit()
+    return job
+
+
+async def _run(job: Job) -> None:
+    """Process the job chunk by chunk from its cursor, checkpointing after each one"""
+    job_type = JOB_TYPES[job.kind]
+    params = job_type.params.model_validate(job.params)
+    query = job_type.select(params)
+
+    if job.total is None:
+        async with AsyncSessionLocal() as db:
+            total = await db.scalar(select(func.count()).select_from(query.subquery()))
+            await db.execute(update(Job).where(Job.id == job.id, Job.owner == leases.OWNER).values(total=total))
+            await db.commit()
+
+    cursor = job.cursor
+    while True:
+        if _stopping:
+            # stop_workers hands it back to the queue; it resumes from the cursor
+            return
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(query.where(Product.id > cursor).order_by(Product.id).limit(JOB_CHUNK_SIZE))
+            rows = result.all()
+        if not rows:
+            break
+
+        # No connection is held while the chunk runs, which may mean LLM round trips
+        items = await job_type.process(params, rows)
+        cursor = rows[-1].id
+
+        async with AsyncSessionLocal() as db:
+            checkpoint = await db.execute(
+                update(Job)
+                .where(Job.id == job.id, Job.status == JobStatus.running, Job.owner == leases.OWNER)
+                .values(progress=Job.progress + len(rows), cursor=cursor, heartbeat_at=datetime.utcnow())
+            )
+            if checkpoint.rowcount == 0:
+                logger.info(f"Job {job.id} was cancelled or taken over by another worker")
+                return
+            if job_type.apply:
+                await job_type.apply(db, params, items)
+            db.add(JobResult(job_id=job.id, items=json.dumps(items)))
+            await db.commit()
+
+    await _finish(job.id, JobStatus.succeeded)
+    logger.info(f"Job {job.id} ({job.kind.value}) succeeded")
+
+
+async def _finish(
+    job_id: int,
+    status: JobStatus,
+    error: Optional[str] = None,
+    run_after: Optional[datetime] = None
+) -> None:
+    """Leave the running state: finished, or queued again when run_after is given"""
+    values = {"status": status, "error": error}
+    if run_after is not None:
+        values["run_after"] = run_after
+    else:
+        values["finished_at"] = datetime.utcnow()
+    async with AsyncSessionLocal() as db:
+        await db.execute(
+            update(Job)
+            .where(Job.id == job_id, Job.status == JobStatus.running, Job.owner == leases.OWNER)
+            .values(**values)
+        )
+        await db.commit()
+
+
+async def _fail(job: Job, error: str, retry: bool) -> None:
+    """Queue the job again after an exponential backoff, or fail it for good"""
+    if retry and job.attempts < JOB_MAX_ATTEMPTS:
+        delay = JOB_RETRY_BACKOFF * 2 ** (job.attempts - 1) * random.uniform(0.5, 1.5)
+        logger.warning(f"Job {job.id} attempt {job.attempts} failed, retrying in {delay:.0f}s: {error}")
+        await _finish(job.id, JobStatus.queued, error, run_after=datetime.utcnow() + timedelta(seconds=delay))
+    else:
+        logger.error(f"Job {job.id} failed after {job.attempts} attempts: {error}")
+        await _finish(job.id, JobStatus.failed, error)
+
+
+async def _work_forever() -> None:
+    while not _stopping:
+        _wakeup.clear()
+        try:
+            job = await _claim()
+        except Exception as e:
+            logger.error(f"Could not claim a job: {e}")
+            job = None
+
+        if job is None:
+            try:
+                await asyncio.wait_for(_wakeup.wait(), JOB_POLL_INTERVAL)
+            except asyncio.TimeoutError:
+                pass
+            continue
+
+        try:
+            await _run(job)
+        except HTTPException as e:
+            # Raised for conditions retrying cannot fix, e.g. the AI stack is not installed
+            await _fail(job, str(e.detail), retry=False)
+        except Exception as e:
+            await _fail(job, repr(e), retry=True)
+
+
+async def release() -> int:
+    """Requeue the jobs this process is running; any worker resumes them from their cursor"""
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(
+            update(Job)
+            .where(Job.status == JobStatus.running, Job.owner == leases.OWNER)
+            .values(status=JobStatus.queued, owner=None, attempts=Job.attempts - 1, run_after=datetime.utcnow())
+        )
+        await db.commit()
+    return result.rowcount
+
+
+async def start_workers() -> None:
+    global _stopping
+    if _workers:
+        return
+    _stopping = False
+    _workers.extend(asyncio.create_task(_work_forever()) for _ in range(JOB_WORKERS))
+
+
+async def stop_workers() -> None:
+    """Let workers stop at their next checkpoint, cancelling those still busy after the grace period
+
+    Cancelling in the middle of a database call can leave its connection
+    broken, so idle workers are woken and left to exit on their own.
+    """
+    global _stopping
+    _stopping = True
+    _wakeup.set()
+    if _workers:
+        _, busy = await asyncio.wait(_workers, timeout=JOB_STOP_GRACE)
+        for worker in busy:
+            worker.cancel()
+        for worker in busy:
+            try:
+                await worker
+            except asyncio.CancelledError:
+                pass
+    _workers.clear()
+    released = await release()
+    if released:
+        logger.info(f"Requeued {released} interrupted jobs")
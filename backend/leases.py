@@ -0,0 +1,33 @@
+from sqlalchemy import delete
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from datetime import datetime, timedelta
+import os
+import socket
+import uuid
+
+from database import AsyncSessionLocal
+from models import Lease
+
+# Names this process in leases and job ownership; unique across restarts and hosts
+OWNER = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+
+async def acquire(name: str, ttl: float) -> bool:
+    """Take or renew the named lease for `ttl` seconds; False while another process holds it"""
+    now = datetime.utcnow()
+    stmt = sqlite_insert(Lease).values(name=name, owner=OWNER, expires_at=now + timedelta(seconds=ttl))
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[Lease.name],
+        set_={"owner": stmt.excluded.owner, "expires_at": stmt.excluded.expires_at},
+        where=(Lease.owner == OWNER) | (Lease.expires_at < now)
+    ).returning(Lease.owner)
+    async with AsyncSessionLocal() as db:
+        owner = (await db.execute(stmt)).scalar_one_or_none()
+        await db.commit()
+    return owner == OWNER
+
+
+async def release(name: str) -> None:
+    async with AsyncSessionLocal() as db:
+        await db.execute(delete(Lease).where(Lease.name == name, Lease.owner == OWNER))
+        await db.commit()
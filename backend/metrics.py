@@ -0,0 +1,279 @@
+from sqlalchemy import event
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+import asyncio
+import logging
+import os
+import time
+
+from database import engine, read_engine, shards
+import coldstart
+
+logger = logging.getLogger(__name__)
+
+# Statements slower than this are logged with their query plan; 0 disables the log
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "0"))
+# Distinct slow statements whose plans are kept, so each is explained once
+SLOW_QUERY_PLAN_CACHE = int(os.getenv("SLOW_QUERY_PLAN_CACHE", "256"))
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+LLM_BUCKETS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60, 120)
+STATEMENT_BUCKETS = (1, 2, 3, 5, 10, 20, 50, 100, 200, 500)
+OPERATIONS = {"SELECT", "INSERT", "UPDATE", "DELETE", "REPLACE", "WITH", "PRAGMA"}
+# Only queries have a plan worth logging; slow DDL and PRAGMAs are skipped
+EXPLAINABLE = OPERATIONS - {"PRAGMA"}
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Counter:
+    def __init__(self, name: str, help: str, labels: Sequence[str] = ()):
+        self.name, self.help, self.labels = name, help, tuple(labels)
+        self.values: Dict[Tuple[str, ...], float] = {}
+        _registry.append(self)
+
+    def inc(self, labels: Tuple[str, ...] = (), amount: float = 1) -> None:
+        self.values[labels] = self.values.get(labels, 0) + amount
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        for labels, value in sorted(self.values.items()):
+            lines.append(f"{self.name}{_labels(self.labels, labels)} {value:g}")
+        return lines
+
+
+class Gauge(Counter):
+    def dec(self, labels: Tuple[str, ...] = (), amount: float = 1) -> None:
+        self.inc(labels, -amount)
+
+    def render(self) -> List[str]:
+        lines = super().render()
+        lines[1] = f"# TYPE {self.name} gauge"
+        return lines
+
+
+class Histogram:
+    def __init__(self, name: str, help: str, labels: Sequence[str], buckets: Iterable[float]):
+        self.name, self.help, self.labels = name, help, tuple(labels)
+        self.buckets = tuple(sorted(buckets))
+        # labels -> [per-bucket counts..., sum, count]
+        self.series: Dict[Tuple[str, ...], List[float]] = {}
+        _registry.append(self)
+
+    def observe(self, labels: Tuple[str, ...], value: float) -> None:
+        series = self.series.get(labels)
+        if series is None:
+            series = self.series[labels] = [0] * (len(self.buckets) + 2)
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                series[i] += 1
+                break
+        series[-2] += value
+        series[-1] += 1
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        for labels, series in sorted(self.series.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets, series):
+                cumulative += count
+                le = 'le="%g"' % bound
+                lines.append(f"{self.name}_bucket{_labels(self.labels, labels, le)} {cumulative}")
+            le = 'le="+Inf"'
+            lines.append(f"{self.name}_bucket{_labels(self.labels, labels, le)} {series[-1]}")
+            lines.append(f"{self.name}_sum{_labels(self.labels, labels)} {series[-2]:.6f}")
+            lines.append(f"{self.name}_count{_labels(self.labels, labels)} {series[-1]}")
+        return lines
+
+
+_registry: list = []
+
+http_requests = Counter("http_requests_total", "HTTP requests by route and status", ("method", "route", "status"))
+http_in_progress = Gauge("http_requests_in_progress", "HTTP requests currently being served")
+http_latency = Histogram(
+    "http_request_duration_seconds", "Time to serve a request, including the response body",
+    ("method", "route"), LATENCY_BUCKETS
+)
+http_statements = Histogram(
+    "http_request_sql_statements", "SQL statements executed per request",
+    ("method", "route"), STATEMENT_BUCKETS
+)
+http_db_time = Histogram(
+    "http_request_db_seconds", "Time spent executing SQL per request",
+    ("method", "route"), LATENCY_BUCKETS
+)
+db_statements = Counter("db_statements_total", "SQL statements executed", ("operation",))
+db_time = Counter("db_statement_seconds_total", "Time spent executing SQL statements", ("operation",))
+db_slow_statements = Counter(
+    "db_slow_statements_total", "Statements slower than SLOW_QUERY_MS", ("method", "route")
+)
+llm_latency = Histogram(
+    "llm_call_duration_seconds", "LLM round trips made by AI routes, excluding queueing",
+    ("method", "route", "outcome"), LLM_BUCKETS
+)
+
+
+# ==================== REQUEST CONTEXT ====================
+class RequestStats:
+    """SQL work done while serving one request; shared with the tasks it spawns"""
+    __slots__ = ("scope", "statements", "db_seconds")
+
+    def __init__(self, scope: dict):
+        self.scope = scope
+        self.statements = 0
+        self.db_seconds = 0.0
+
+    def labels(self) -> Tuple[str, str]:
+        # The router stores the matched route in the scope; templates keep label cardinality bounded
+        route = self.scope.get("route")
+        return self.scope["method"], getattr(route, "path", "unmatched")
+
+
+current_request: ContextVar[Optional[RequestStats]] = ContextVar("current_request", default=None)
+
+
+def _request_labels() -> Tuple[str, str]:
+    stats = current_request.get()
+    return stats.labels() if stats else ("", "background")
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording latency, status and SQL totals per route"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats(scope)
+        token = current_request.set(stats)
+        status_code = 500
+
+        async def send_with_status(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        http_in_progress.inc()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = time.perf_counter() - started
+            http_in_progress.dec()
+            current_request.reset(token)
+            labels = stats.labels()
+            http_requests.inc((*labels, str(status_code)))
+            http_latency.observe(labels, elapsed)
+            http_statements.observe(labels, stats.statements)
+            http_db_time.observe(labels, stats.db_seconds)
+            coldstart.mark_first_request()
+
+
+@contextmanager
+def time_llm_call():
+    """Record one LLM round trip for the current route, tagged ok / timeout / error"""
+    started = time.perf_counter()
+    outcome = "ok"
+    try:
+        yield
+    except asyncio.TimeoutError:
+        outcome = "timeout"
+        raise
+    except Exception:
+        outcome = "error"
+        raise
+    finally:
+        llm_latency.observe((*_request_labels(), outcome), time.perf_counter() - started)
+
+
+def render() -> str:
+    lines = []
+    for metric in _registry:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+# ==================== SQL INSTRUMENTATION ====================
+_plans: Dict[str, str] = {}
+
+
+def _operation(statement: str) -> str:
+    keyword = statement.lstrip()[:10].split(None, 1)
+    keyword = keyword[0].upper() if keyword else ""
+    return keyword if keyword in OPERATIONS else "OTHER"
+
+
+def _query_plan(conn, statement: str, parameters) -> str:
+    """EXPLAIN QUERY PLAN on the statement's own connection, cached per statement"""
+    plan = _plans.get(statement)
+    if plan is None:
+        try:
+            explain = conn.connection.dbapi_connection.cursor()
+            try:
+                explain.execute(f"EXPLAIN QUERY PLAN {statement}", parameters or ())
+                plan = "\n".join(f"  {row[-1]}" for row in explain.fetchall())
+            finally:
+                explain.close()
+        except Exception as e:
+            plan = f"  (no plan: {e})"
+        if len(_plans) >= SLOW_QUERY_PLAN_CACHE:
+            _plans.pop(next(iter(_plans)))
+        _plans[statement] = plan
+    return plan
+
+
+def _start_timer(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+
+def _stop_timer(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info["query_started"].pop()
+    operation = _operation(statement)
+    db_statements.inc((operation,))
+    db_time.inc((operation,), elapsed)
+
+    stats = current_request.get()
+    if stats is not None:
+        stats.statements += 1
+        stats.db_seconds += elapsed
+
+    if SLOW_QUERY_MS and elapsed * 1000 >= SLOW_QUERY_MS and operation in EXPLAINABLE:
+        labels = _request_labels()
+        db_slow_statements.inc(labels)
+        # executemany batches have no single parameter set to explain with
+        plan = "  (executemany)" if executemany else _query_plan(conn, statement, parameters)
+        logger.warning(f"Slow query {elapsed * 1000:.1f}ms on {' '.join(labels).strip()}: {statement}\n{plan}")
+
+
+def _drop_timer(exception_context):
+    # Failed statements never reach after_cursor_execute
+    conn = exception_context.connection
+    if conn is not None and conn.info.get("query_started"):
+        conn.info["query_started"].pop()
+
+
+def instrument(target) -> None:
+    event.listen(target.sync_engine, "before_cursor_execute", _start_timer)
+    event.listen(target.sync_engine, "after_cursor_execute", _stop_timer)
+    event.listen(target.sync_engine, "handle_error", _drop_timer)
+
+
+for _engine in {engine, read_engine}:
+    instrument(_engine)
+# Store shard engines are opened on demand
+shards.add_engine_hook(instrument)
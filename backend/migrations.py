@@ -0,0 +1,219 @@
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine
+from sqlalchemy.exc import OperationalError
+from typing import Awaitable, Callable, List, Tuple
+from datetime import datetime
+import logging
+
+from database import engine
+
+logger = logging.getLogger(__name__)
+
+Migration = Callable[[AsyncConnection], Awaitable[None]]
+
+# (version, name, upgrade) in the order they were written
+MIGRATIONS: List[Tuple[int, str, Migration]] = []
+
+
+def migration(version: int, name: str):
+    """Register an upgrade step; versions are applied once, in ascending order"""
+    def register(fn: Migration) -> Migration:
+        MIGRATIONS.append((version, name, fn))
+        return fn
+    return register
+
+
+# ==================== HELPERS ====================
+# Fresh databases get the full schema from create_all, so every step must be
+# a no-op when its change is already present.
+async def column_exists(conn: AsyncConnection, table: str, column: str) -> bool:
+    result = await conn.exec_driver_sql(f"PRAGMA table_info({table})")
+    return any(row[1] == column for row in result)
+
+
+async def add_column(conn: AsyncConnection, table: str, column: str, ddl: str) -> None:
+    if await column_exists(conn, table, column):
+        return
+    try:
+        await conn.exec_driver_sql(f"ALTER TABLE {table} ADD COLUMN {column} {ddl}")
+    except OperationalError as e:
+        # Another worker starting at the same time added it after our check
+        if "duplicate column" not in str(e.orig).lower():
+            raise
+
+
+async def execute_all(conn: AsyncConnection, statements: List[str]) -> None:
+    for statement in statements:
+        await conn.exec_driver_sql(statement)
+
+
+def version_triggers(table: str) -> List[str]:
+    """Seed the table's collection_versions row and bump it on every insert, update and delete"""
+    statements = [
+        "INSERT OR IGNORE INTO collection_versions (name, version, updated_at) "
+        f"VALUES ('{table}', 1, datetime('now'))"
+    ]
+    for operation in ("INSERT", "UPDATE", "DELETE"):
+        statements.append(
+            f"CREATE TRIGGER IF NOT EXISTS {table}_version_{operation.lower()} "
+            f"AFTER {operation} ON {table} BEGIN "
+            "INSERT INTO collection_versions (name, version, updated_at) "
+            f"VALUES ('{table}', 1, datetime('now')) "
+            "ON CONFLICT (name) DO UPDATE SET version = version + 1, updated_at = excluded.updated_at; "
+            "END"
+        )
+    return statements
+
+
+# ==================== MIGRATIONS ====================
+@migration(1, "Composite and partial indexes for hot queries")
+async def add_hot_path_indexes(conn: AsyncConnection) -> None:
+    await execute_all(conn, [
+        # Forecasts and per-product history: WHERE product_id = ? ORDER BY transaction_date
+        "CREATE INDEX IF NOT EXISTS ix_stock_transactions_product_date "
+        "ON stock_transactions (product_id, transaction_date)",
+        # Transaction feed keyset pagination on (transaction_date, id)
+        "CREATE INDEX IF NOT EXISTS ix_stock_transactions_transaction_date "
+        "ON stock_transactions (transaction_date)",
+        # Dashboard / order list: WHERE status = ? ORDER BY created_at
+        "CREATE INDEX IF NOT EXISTS ix_orders_status_created "
+        "ON orders (status, created_at)",
+        # selectinload of order items by order_id
+        "CREATE INDEX IF NOT EXISTS ix_order_items_order_id ON order_items (order_id)",
+        # Low-stock alerts and counts scan only the rows below their reorder level
+        "CREATE INDEX IF NOT EXISTS ix_products_low_stock "
+        "ON products (id) WHERE quantity <= reorder_level",
+    ])
+
+
+@migration(2, "Full-text search indexes over products")
+async def add_product_search(conn: AsyncConnection) -> None:
+    # Both indexes are external-content tables: they store only the index and
+    # read column values back from products. Triggers keep them in sync, and
+    # the update trigger only fires for the indexed columns so stock changes
+    # never touch the search index.
+    await execute_all(conn, [
+        "CREATE VIRTUAL TABLE IF NOT EXISTS products_fts USING fts5("
+        "name, sku, description, category, content='products', content_rowid='id', "
+        "tokenize='unicode61 remove_diacritics 2', prefix='1 2 3')",
+        # Substring index used for typo-tolerant fallback matching
+        "CREATE VIRTUAL TABLE IF NOT EXISTS products_fts_trigram USING fts5("
+        "name, sku, content='products', content_rowid='id', tokenize='trigram')",
+        "CREATE TRIGGER IF NOT EXISTS products_search_insert AFTER INSERT ON products BEGIN "
+        "INSERT INTO products_fts (rowid, name, sku, description, category) "
+        "VALUES (new.id, new.name, new.sku, new.description, new.category); "
+        "INSERT INTO products_fts_trigram (rowid, name, sku) VALUES (new.id, new.name, new.sku); "
+        "END",
+        "CREATE TRIGGER IF NOT EXISTS products_search_delete AFTER DELETE ON products BEGIN "
+        "INSERT INTO products_fts (products_fts, rowid, name, sku, description, category) "
+        "VALUES ('delete', old.id, old.name, old.sku, old.description, old.category); "
+        "INSERT INTO products_fts_trigram (products_fts_trigram, rowid, name, sku) "
+        "VALUES ('delete', old.id, old.name, old.sku); "
+        "END",
+        "CREATE TRIGGER IF NOT EXISTS products_search_update "
+        "AFTER UPDATE OF name, sku, description, category ON products BEGIN "
+        "INSERT INTO products_fts (products_fts, rowid, name, sku, description, category) "
+        "VALUES ('delete', old.id, old.name, old.sku, old.description, old.category); "
+        "INSERT INTO products_fts_trigram (products_fts_trigram, rowid, name, sku) "
+        "VALUES ('delete', old.id, old.name, old.sku); "
+        "INSERT INTO products_fts (rowid, name, sku, description, category) "
+        "VALUES (new.id, new.name, new.sku, new.description, new.category); "
+        "INSERT INTO products_fts_trigram (rowid, name, sku) VALUES (new.id, new.name, new.sku); "
+        "END",
+        # Index the rows that existed before the triggers
+        "INSERT INTO products_fts (products_fts) VALUES ('rebuild')",
+        "INSERT INTO products_fts_trigram (products_fts_trigram) VALUES ('rebuild')",
+    ])
+
+
+@migration(3, "Daily stock rollups maintained on insert")
+async def add_stock_rollups(conn: AsyncConnection) -> None:
+    columns = (
+        "product_id, day, in_quantity, out_quantity, "
+        "adjustment_count, adjustment_quantity, transaction_count"
+    )
+    # Enum columns store member names, hence 'in_stock' / 'out_stock'
+    await execute_all(conn, [
+        # Rows are only ever added to the rollups: archiving raw rows must not subtract them
+        "CREATE TRIGGER IF NOT EXISTS stock_transactions_rollup AFTER INSERT ON stock_transactions BEGIN "
+        f"INSERT INTO stock_daily_rollups ({columns}) "
+        "VALUES (new.product_id, date(new.transaction_date), "
+        "CASE WHEN new.transaction_type = 'in_stock' THEN new.quantity ELSE 0 END, "
+        "CASE WHEN new.transaction_type = 'out_stock' THEN new.quantity ELSE 0 END, "
+        "CASE WHEN new.transaction_type = 'adjustment' THEN 1 ELSE 0 END, "
+        "CASE WHEN new.transaction_type = 'adjustment' THEN new.quantity ELSE 0 END, 1) "
+        "ON CONFLICT (product_id, day) DO UPDATE SET "
+        "in_quantity = in_quantity + excluded.in_quantity, "
+        "out_quantity = out_quantity + excluded.out_quantity, "
+        "adjustment_count = adjustment_count + excluded.adjustment_count, "
+        "adjustment_quantity = adjustment_quantity + excluded.adjustment_quantity, "
+        "transaction_count = transaction_count + 1; "
+        "END",
+        # Backfill from the rows recorded before the trigger existed
+        f"INSERT OR REPLACE INTO stock_daily_rollups ({columns}) "
+        "SELECT product_id, date(transaction_date), "
+        "sum(CASE WHEN transaction_type = 'in_stock' THEN quantity ELSE 0 END), "
+        "sum(CASE WHEN transaction_type = 'out_stock' THEN quantity ELSE 0 END), "
+        "sum(CASE WHEN transaction_type = 'adjustment' THEN 1 ELSE 0 END), "
+        "sum(CASE WHEN transaction_type = 'adjustment' THEN quantity ELSE 0 END), "
+        "count(*) "
+        "FROM stock_transactions GROUP BY product_id, date(transaction_date)",
+    ])
+
+
+@migration(4, "Supplier updated_at and collection version counters")
+async def add_collection_versions(conn: AsyncConnection) -> None:
+    await add_column(conn, "suppliers", "updated_at", "DATETIME")
+    await conn.exec_driver_sql("UPDATE suppliers SET updated_at = created_at WHERE updated_at IS NULL")
+
+    # Triggers catch every write path (ORM, bulk upserts, raw UPDATEs), so a
+    # collection ETag is one primary-key read that cannot miss a change
+    await execute_all(conn, version_triggers("products") + version_triggers("suppliers"))
+
+
+@migration(5, "Product version column for optimistic concurrency")
+async def add_product_version(conn: AsyncConnection) -> None:
+    await add_column(conn, "products", "version", "INTEGER NOT NULL DEFAULT 1")
+
+
+@migration(6, "Job owner and heartbeat for worker leases")
+async def add_job_lease(conn: AsyncConnection) -> None:
+    await add_column(conn, "jobs", "owner", "VARCHAR(100)")
+    await add_column(conn, "jobs", "heartbeat_at", "DATETIME")
+
+
+@migration(7, "Collection versions for orders and order items")
+async def add_order_versions(conn: AsyncConnection) -> None:
+    # Analytics caches key on these, so sales reports follow writes from every process
+    await execute_all(conn, version_triggers("orders") + version_triggers("order_items"))
+
+
+# ==================== RUNNER ====================
+async def run_migrations(target: AsyncEngine = engine) -> List[int]:
+    """Apply pending migrations, each in its own transaction; returns applied versions"""
+    async with target.begin() as conn:
+        await conn.exec_driver_sql(
+            "CREATE TABLE IF NOT EXISTS schema_migrations ("
+            "version INTEGER PRIMARY KEY, name VARCHAR(200) NOT NULL, applied_at DATETIME NOT NULL)"
+        )
+        result = await conn.exec_driver_sql("SELECT version FROM schema_migrations")
+        done = {row[0] for row in result}
+
+    applied = []
+    for version, name, upgrade in sorted(MIGRATIONS, key=lambda m: m[0]):
+        if version in done:
+            continue
+        logger.info(f"Applying migration {version}: {name}")
+        async with target.begin() as conn:
+            await upgrade(conn)
+            # OR IGNORE: another worker may have applied the same step concurrently
+            await conn.exec_driver_sql(
+                "INSERT OR IGNORE INTO schema_migrations (version, name, applied_at) VALUES (?, ?, ?)",
+                (version, name, datetime.utcnow().isoformat(sep=" "))
+            )
+        applied.append(version)
+
+    if applied:
+        # Refresh planner statistics so the new indexes are picked up
+        async with target.begin() as conn:
+            await conn.exec_driver_sql("PRAGMA optimize")
+    return applied
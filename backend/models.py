@@ -1,8 +1,8 @@
-from sqlalchemy import Column, String, Integer, Float, ForeignKey, DateTime, Text, Enum
+from sqlalchemy import Column, String, Integer, Float, ForeignKey, Date, DateTime, Text, Enum, Index, JSON
 from sqlalchemy.orm import relationship
 from datetime import datetime
 import enum
-from database import Base
+from database import Base, ShardBase
 
 class UserRole(str, enum.Enum):
     admin = "admin"
@@ -20,6 +20,18 @@ class TransactionType(str, enum.Enum):
     out_stock = "out"
     adjustment = "adjustment"
 
+class JobKind(str, enum.Enum):
+    forecast = "forecast"  # forecast every product
+    categorize = "categorize"  # categorize every uncategorized product
+    reorder = "reorder"  # reorder plan for every low-stock product
+
+class JobStatus(str, enum.Enum):
+    queued = "queued"
+    running = "running"
+    succeeded = "succeeded"
+    failed = "failed"
+    cancelled = "cancelled"
+
 class User(Base):
     __tablename__ = "users"
     
@@ -43,6 +55,7 @@ class Supplier(Base):
     phone = Column(String(20))
     address = Column(Text)
     created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
     products = relationship("Product", back_populates="supplier")
 
@@ -59,12 +72,19 @@ class Product(Base):
     quantity = Column(Integer, default=0, nullable=False)
     reorder_level = Column(Integer, default=10, nullable=False)
     supplier_id = Column(Integer, ForeignKey("suppliers.id"))
+    # Bumped by every write; UPDATEs compare-and-swap on it instead of locking
+    version = Column(Integer, default=1, nullable=False)
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
     supplier = relationship("Supplier", back_populates="products")
     order_items = relationship("OrderItem", back_populates="product")
     transactions = relationship("StockTransaction", back_populates="product")
+    
+    __table_args__ = (
+        # Partial index: low-stock queries only touch rows below their reorder level
+        Index("ix_products_low_stock", "id", sqlite_where=quantity <= reorder_level),
+    )
 
 class Order(Base):
     __tablename__ = "orders"
@@ -80,12 +100,16 @@ class Order(Base):
     
     created_by_user = relationship("User", back_populates="orders")
     order_items = relationship("OrderItem", back_populates="order", cascade="all, delete-orphan")
+    
+    __table_args__ = (
+        Index("ix_orders_status_created", "status", "created_at"),
+    )
 
 class OrderItem(Base):
     __tablename__ = "order_items"
     
     id = Column(Integer, primary_key=True, index=True)
-    order_id = Column(Integer, ForeignKey("orders.id"), nullable=False)
+    order_id = Column(Integer, ForeignKey("orders.id"), nullable=False, index=True)
     product_id = Column(Integer, ForeignKey("products.id"), nullable=False)
     quantity = Column(Integer, nullable=False)
     price = Column(Float, nullable=False)
@@ -102,7 +126,161 @@ class StockTransaction(Base):
     quantity = Column(Integer, nullable=False)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     notes = Column(Text)
-    transaction_date = Column(DateTime, default=datetime.utcnow, nullable=False)
+    transaction_date = Column(DateTime, default=datetime.utcnow, nullable=False, index=True)
     
     product = relationship("Product", back_populates="transactions")
-    user = relationship("User", back_populates="transactions")
\ No newline at end of file
+    user = relationship("User", back_populates="transactions")
+    
+    __table_args__ = (
+        Index("ix_stock_transactions_product_date", "product_id", "transaction_date"),
+    )
+
+class StockSnapshot(Base):
+    __tablename__ = "stock_snapshots"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    product_id = Column(Integer, ForeignKey("products.id"), nullable=False)
+    snapshot_date = Column(DateTime, default=datetime.utcnow, nullable=False)
+    quantity = Column(Integer, nullable=False)
+    
+    __table_args__ = (
+        Index("ix_stock_snapshots_product_date", "product_id", "snapshot_date"),
+    )
+
+class StockDailyRollup(Base):
+    __tablename__ = "stock_daily_rollups"
+    
+    # Maintained by a trigger on stock_transactions inserts; kept when raw rows are archived
+    product_id = Column(Integer, primary_key=True)
+    day = Column(Date, primary_key=True)
+    in_quantity = Column(Integer, default=0, nullable=False)
+    out_quantity = Column(Integer, default=0, nullable=False)
+    adjustment_count = Column(Integer, default=0, nullable=False)
+    adjustment_quantity = Column(Integer, default=0, nullable=False)  # sum of the quantities set
+    transaction_count = Column(Integer, default=0, nullable=False)
+    
+    __table_args__ = (
+        Index("ix_stock_daily_rollups_day", "day"),
+    )
+
+class StockArchiveFile(Base):
+    __tablename__ = "stock_archive_files"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    path = Column(String(255), nullable=False, unique=True)  # relative to the archive directory
+    first_id = Column(Integer, nullable=False)
+    last_id = Column(Integer, nullable=False)
+    first_date = Column(DateTime, nullable=False)
+    last_date = Column(DateTime, nullable=False, index=True)
+    rows = Column(Integer, nullable=False)
+    archived_before = Column(DateTime, nullable=False)  # retention cutoff of the run that wrote it
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+class CollectionVersion(Base):
+    __tablename__ = "collection_versions"
+    
+    # Bumped by triggers on every insert, update and delete of the named table
+    name = Column(String(50), primary_key=True)
+    version = Column(Integer, default=0, nullable=False)
+    updated_at = Column(DateTime, nullable=False)
+
+class Lease(Base):
+    __tablename__ = "leases"
+    
+    # One row per singleton task; a process holds it until expires_at unless it renews
+    name = Column(String(50), primary_key=True)
+    owner = Column(String(100), nullable=False)
+    expires_at = Column(DateTime, nullable=False)
+
+class UserSession(Base):
+    __tablename__ = "user_sessions"
+    
+    token_hash = Column(String(64), primary_key=True)  # sha256 of the bearer token
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    expires_at = Column(DateTime, nullable=False, index=True)
+
+class AICacheEntry(Base):
+    __tablename__ = "ai_cache"
+    
+    key = Column(String(64), primary_key=True)  # sha256 of the prompt inputs
+    kind = Column(String(32), nullable=False)
+    product_id = Column(Integer, nullable=True)
+    response = Column(Text, nullable=False)
+    hits = Column(Integer, default=0, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    expires_at = Column(DateTime, nullable=False, index=True)
+    last_accessed_at = Column(DateTime, default=datetime.utcnow, nullable=False, index=True)
+    
+    __table_args__ = (
+        Index("ix_ai_cache_kind_product", "kind", "product_id"),
+    )
+
+class Job(Base):
+    __tablename__ = "jobs"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    kind = Column(Enum(JobKind), nullable=False)
+    params = Column(JSON, nullable=False, default=dict)
+    status = Column(Enum(JobStatus), default=JobStatus.queued, nullable=False)
+    progress = Column(Integer, default=0, nullable=False)  # items processed so far
+    total = Column(Integer)  # items to process, counted when the job first runs
+    cursor = Column(Integer, default=0, nullable=False)  # last product id processed; resume point
+    attempts = Column(Integer, default=0, nullable=False)
+    error = Column(Text)  # last failure, kept while the job retries
+    run_after = Column(DateTime, default=datetime.utcnow, nullable=False)  # retry backoff
+    owner = Column(String(100))  # process running the job (leases.OWNER)
+    heartbeat_at = Column(DateTime)  # renewed at every checkpoint; others reclaim the job once it goes stale
+    created_by = Column(Integer, ForeignKey("users.id"))
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    started_at = Column(DateTime)
+    finished_at = Column(DateTime)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    __table_args__ = (
+        Index("ix_jobs_status_run_after", "status", "run_after"),
+    )
+
+class JobResult(Base):
+    __tablename__ = "job_results"
+    
+    # One row per processed chunk, written in the same transaction as the job's progress
+    id = Column(Integer, primary_key=True)
+    job_id = Column(Integer, ForeignKey("jobs.id", ondelete="CASCADE"), nullable=False, index=True)
+    items = Column(Text, nullable=False)  # JSON array
+
+class Store(Base):
+    __tablename__ = "stores"
+    
+    # Catalog row of a branch; its stock lives in the branch's own shard database
+    id = Column(Integer, primary_key=True, index=True)
+    code = Column(String(20), unique=True, nullable=False, index=True)
+    name = Column(String(100), nullable=False)
+    address = Column(Text)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+# ==================== STORE SHARD TABLES ====================
+# Created in every store's shard; product_id and user_id refer to catalog rows
+class StoreStock(ShardBase):
+    __tablename__ = "store_stock"
+    
+    product_id = Column(Integer, primary_key=True)
+    quantity = Column(Integer, default=0, nullable=False)
+    reorder_level = Column(Integer, nullable=False)  # copied from the product on the first move, per store after that
+    version = Column(Integer, default=1, nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+class StoreStockTransaction(ShardBase):
+    __tablename__ = "store_stock_transactions"
+    
+    id = Column(Integer, primary_key=True)
+    product_id = Column(Integer, nullable=False)
+    transaction_type = Column(Enum(TransactionType), nullable=False)
+    quantity = Column(Integer, nullable=False)
+    user_id = Column(Integer, nullable=False)
+    notes = Column(Text)
+    transaction_date = Column(DateTime, default=datetime.utcnow, nullable=False, index=True)
+    
+    __table_args__ = (
+        Index("ix_store_stock_transactions_product_date", "product_id", "transaction_date"),
+    )
@@ -0,0 +1,78 @@
+from fastapi import HTTPException, Query, Response
+from sqlalchemy import and_, or_, Date, DateTime
+from typing import Optional, Sequence, Any, List
+from datetime import date, datetime
+import base64
+import json
+import os
+
+# Page size limits (override through env vars)
+DEFAULT_PAGE_SIZE = int(os.getenv("PAGE_SIZE_DEFAULT", "50"))
+MAX_PAGE_SIZE = int(os.getenv("PAGE_SIZE_MAX", "500"))
+
+# Response header carrying the cursor of the next page (absent on the last page)
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+class PageParams:
+    """Query parameters shared by every keyset-paginated list endpoint"""
+
+    def __init__(
+        self,
+        limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+        cursor: Optional[str] = Query(None, description="Opaque cursor from the X-Next-Cursor header"),
+    ):
+        self.limit = limit
+        self.cursor = cursor
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    """Encode the sort-key values of the last row into an opaque cursor"""
+    payload = [v.isoformat() if isinstance(v, (date, datetime)) else v for v in values]
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, keys: Sequence) -> List[Any]:
+    """Decode a cursor back into typed sort-key values for the given columns"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if not isinstance(values, list) or len(values) != len(keys):
+            raise ValueError("cursor arity mismatch")
+        return [
+            datetime.fromisoformat(v) if isinstance(col.type, DateTime)
+            else date.fromisoformat(v) if isinstance(col.type, Date)
+            else v
+            for col, v in zip(keys, values)
+        ]
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def keyset_predicate(keys: Sequence, values: Sequence[Any], descending: bool = False):
+    """Row-value comparison (k1, k2, ...) > (v1, v2, ...) expanded for SQLite"""
+    clauses = []
+    for i, col in enumerate(keys):
+        prefix = [keys[j] == values[j] for j in range(i)]
+        step = col < values[i] if descending else col > values[i]
+        clauses.append(and_(*prefix, step))
+    return or_(*clauses)
+
+
+def paginate(stmt, keys: Sequence, page: PageParams, descending: bool = False):
+    """Apply keyset ordering, the cursor predicate and limit + 1 to a select"""
+    if page.cursor:
+        stmt = stmt.where(keyset_predicate(keys, decode_cursor(page.cursor, keys), descending))
+    order = [k.desc() if descending else k.asc() for k in keys]
+    return stmt.order_by(*order).limit(page.limit + 1)
+
+
+def finish_page(rows: Sequence, keys: Sequence, page: PageParams, response: Response) -> list:
+    """Trim the look-ahead row and publish the next cursor header"""
+    rows = list(rows)
+    if len(rows) > page.limit:
+        rows = rows[:page.limit]
+        last = rows[-1]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor([getattr(last, k.key) for k in keys])
+    return rows
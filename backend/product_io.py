@@ -0,0 +1,149 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from pydantic import ValidationError
+from typing import Any, AsyncIterator, Dict, Iterator, List, Tuple, IO
+from datetime import datetime
+import csv
+import io
+import json
+import os
+
+from database import ReadSessionLocal
+from models import Product
+from schemas import ProductCreate
+import snapshots
+
+IMPORT_BATCH_SIZE = int(os.getenv("PRODUCT_IMPORT_BATCH_SIZE", "1000"))
+EXPORT_CHUNK_SIZE = int(os.getenv("PRODUCT_EXPORT_CHUNK_SIZE", "1000"))
+MAX_REPORTED_ERRORS = 1000
+
+# Columns read on import and written on export, in file order
+PRODUCT_COLUMNS = [
+    "sku", "name", "description", "category", "price", "cost",
+    "quantity", "reorder_level", "supplier_id"
+]
+
+FORMATS = {"csv": "text/csv", "ndjson": "application/x-ndjson"}
+
+
+# ==================== IMPORT ====================
+def iter_records(stream: IO[bytes], fmt: str) -> Iterator[Tuple[int, Any]]:
+    """Yield (row number, raw record or parse error) without reading the whole file"""
+    text = io.TextIOWrapper(stream, encoding="utf-8-sig", newline="")
+    if fmt == "csv":
+        for line_no, record in enumerate(csv.DictReader(text), start=2):
+            # Blank cells mean "not provided" so model/column defaults apply
+            yield line_no, {k: v for k, v in record.items() if k and v not in ("", None)}
+    else:
+        for line_no, line in enumerate(text, start=1):
+            if not line.strip():
+                continue
+            try:
+                yield line_no, json.loads(line)
+            except json.JSONDecodeError as e:
+                yield line_no, e
+
+
+async def upsert_batch(db: AsyncSession, rows: List[dict]) -> Tuple[int, int]:
+    """Insert-or-update one batch by SKU; returns (created, updated) counts"""
+    result = await db.execute(select(Product.sku).where(Product.sku.in_([r["sku"] for r in rows])))
+    existing = set(result.scalars())
+
+    # executemany needs one parameter shape, so group rows by the fields they set
+    groups: Dict[frozenset, List[dict]] = {}
+    for row in rows:
+        groups.setdefault(frozenset(row), []).append(row)
+
+    for fields, group in groups.items():
+        stmt = sqlite_insert(Product)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[Product.sku],
+            set_={
+                **{f: stmt.excluded[f] for f in fields if f != "sku"},
+                "version": Product.version + 1,
+                "updated_at": datetime.utcnow()
+            }
+        )
+        await db.execute(stmt, group)
+
+    # Imported quantities bypass stock transactions, so re-base their history
+    await snapshots.take_snapshot(
+        db, select(Product.id).where(Product.sku.in_([r["sku"] for r in rows]))
+    )
+    await db.commit()
+    updated = sum(1 for r in rows if r["sku"] in existing)
+    return len(rows) - updated, updated
+
+
+async def import_products(db: AsyncSession, stream: IO[bytes], fmt: str) -> dict:
+    """Stream-parse an upload and upsert it in batched transactions"""
+    created = updated = failed = 0
+    errors = []
+    batch: Dict[str, dict] = {}
+
+    def record_error(row_no, message):
+        nonlocal failed
+        failed += 1
+        if len(errors) < MAX_REPORTED_ERRORS:
+            errors.append({"row": row_no, "error": message})
+
+    try:
+        for row_no, record in iter_records(stream, fmt):
+            if isinstance(record, Exception):
+                record_error(row_no, f"Invalid JSON: {record}")
+                continue
+            try:
+                product = ProductCreate.model_validate(record)
+            except ValidationError as e:
+                record_error(row_no, "; ".join(
+                    f"{'.'.join(map(str, err['loc']))}: {err['msg']}" for err in e.errors()
+                ))
+                continue
+            # A later row for the same SKU in one batch wins
+            batch[product.sku] = product.model_dump(exclude_unset=True)
+            if len(batch) >= IMPORT_BATCH_SIZE:
+                c, u = await upsert_batch(db, list(batch.values()))
+                created, updated = created + c, updated + u
+                batch.clear()
+    except (csv.Error, UnicodeDecodeError) as e:
+        record_error(None, f"Unreadable {fmt} input: {e}")
+
+    if batch:
+        c, u = await upsert_batch(db, list(batch.values()))
+        created, updated = created + c, updated + u
+
+    return {
+        "created": created,
+        "updated": updated,
+        "failed": failed,
+        "errors": errors
+    }
+
+
+# ==================== EXPORT ====================
+async def export_products(fmt: str) -> AsyncIterator[str]:
+    """Stream the catalog from a server-side cursor, one chunk at a time"""
+    columns = [getattr(Product, c) for c in PRODUCT_COLUMNS]
+    # The request-scoped session is closed before a streamed body is sent
+    async with ReadSessionLocal() as session:
+        result = await session.stream(
+            select(*columns).order_by(Product.id),
+            execution_options={"yield_per": EXPORT_CHUNK_SIZE}
+        )
+        if fmt == "csv":
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            writer.writerow(PRODUCT_COLUMNS)
+            async for rows in result.partitions(EXPORT_CHUNK_SIZE):
+                writer.writerows(rows)
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+            if buffer.tell():
+                yield buffer.getvalue()
+        else:
+            async for rows in result.partitions(EXPORT_CHUNK_SIZE):
+                yield "".join(
+                    json.dumps(dict(zip(PRODUCT_COLUMNS, row))) + "\n" for row in rows
+                )
@@ -1,7 +1,7 @@
-from pydantic import BaseModel, EmailStr, Field
-from typing import Optional, List
-from datetime import datetime
-from models import UserRole, OrderStatus, TransactionType
+from pydantic import BaseModel, EmailStr, Field, AliasChoices
+from typing import Optional, List, Any, Dict
+from datetime import date, datetime
+from models import UserRole, OrderStatus, TransactionType, JobKind, JobStatus
 
 # User Schemas
 class UserBase(BaseModel):
@@ -37,6 +37,7 @@ class SupplierCreate(SupplierBase):
 class SupplierResponse(SupplierBase):
     id: int
     created_at: datetime
+    updated_at: datetime
     
     class Config:
         from_attributes = True
@@ -68,12 +69,36 @@ class ProductUpdate(BaseModel):
 
 class ProductResponse(ProductBase):
     id: int
+    version: int
     created_at: datetime
     updated_at: datetime
     
     class Config:
         from_attributes = True
 
+class ProductSearchHit(BaseModel):
+    product: ProductResponse
+    match: str
+    score: float
+
+class CategoryFacet(BaseModel):
+    category: Optional[str] = None
+    count: int
+
+class SupplierFacet(BaseModel):
+    supplier_id: Optional[int] = None
+    supplier_name: Optional[str] = None
+    count: int
+
+class ProductSearchFacets(BaseModel):
+    categories: List[CategoryFacet]
+    suppliers: List[SupplierFacet]
+
+class ProductSearchResponse(BaseModel):
+    query: str
+    results: List[ProductSearchHit]
+    facets: Optional[ProductSearchFacets] = None
+
 # Order Schemas
 class OrderItemCreate(BaseModel):
     product_id: int
@@ -99,7 +124,8 @@ class OrderResponse(BaseModel):
     total_amount: float
     created_by: int
     notes: Optional[str] = None
-    items: List[OrderItemResponse]
+    # ORM orders expose their lines as the `order_items` relationship
+    items: List[OrderItemResponse] = Field(validation_alias=AliasChoices("items", "order_items"))
     created_at: datetime
     
     class Config:
@@ -112,6 +138,9 @@ class StockTransactionCreate(BaseModel):
     quantity: int = Field(..., gt=0)
     notes: Optional[str] = None
 
+class StockTransactionBulkCreate(BaseModel):
+    transactions: List[StockTransactionCreate] = Field(..., min_length=1, max_length=1000)
+
 class StockTransactionResponse(BaseModel):
     id: int
     product_id: int
@@ -124,14 +153,100 @@ class StockTransactionResponse(BaseModel):
     class Config:
         from_attributes = True
 
+class StockRollupResponse(BaseModel):
+    product_id: int
+    day: date
+    in_quantity: int
+    out_quantity: int
+    adjustment_count: int
+    adjustment_quantity: int
+    transaction_count: int
+    
+    class Config:
+        from_attributes = True
+
 # AI Schemas
 class AIForecastRequest(BaseModel):
     product_id: int
     days: int = Field(default=30, ge=1, le=365)
+    lead_time_days: Optional[int] = Field(default=None, ge=0, le=365)
+    narrative: bool = False  # ask the LLM to explain the local forecast
 
 class AIReorderRequest(BaseModel):
     threshold: Optional[float] = 0.8
 
 class AICategorizationRequest(BaseModel):
     product_name: str
-    product_description: Optional[str] = None
\ No newline at end of file
+    product_description: Optional[str] = None
+
+# Job Schemas
+class JobCreate(BaseModel):
+    kind: JobKind
+    params: Dict[str, Any] = Field(default_factory=dict)
+
+class ForecastJobParams(BaseModel):
+    days: int = Field(default=30, ge=1, le=365)
+    lead_time_days: Optional[int] = Field(default=None, ge=0, le=365)
+    risk_level: Optional[str] = Field(default=None, pattern="^(low|medium|high)$")  # keep only this risk
+    
+    class Config:
+        extra = "forbid"
+
+class CategorizeJobParams(BaseModel):
+    apply: bool = True  # write the categories to the products, not just report them
+    
+    class Config:
+        extra = "forbid"
+
+class ReorderJobParams(BaseModel):
+    class Config:
+        extra = "forbid"
+
+class JobResponse(BaseModel):
+    id: int
+    kind: JobKind
+    params: Dict[str, Any]
+    status: JobStatus
+    progress: int
+    total: Optional[int] = None
+    attempts: int
+    error: Optional[str] = None
+    created_by: Optional[int] = None
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    
+    class Config:
+        from_attributes = True
+
+# Store Schemas
+class StoreCreate(BaseModel):
+    code: str = Field(..., min_length=1, max_length=20)
+    name: str
+    address: Optional[str] = None
+
+class StoreResponse(StoreCreate):
+    id: int
+    created_at: datetime
+    
+    class Config:
+        from_attributes = True
+
+class StoreStockResponse(BaseModel):
+    product_id: int
+    sku: Optional[str] = None  # None once the product is deleted from the catalog
+    name: Optional[str] = None
+    quantity: int
+    reorder_level: int
+    updated_at: Optional[datetime] = None
+
+class StoreQuantity(BaseModel):
+    store_id: int
+    quantity: int
+
+class StockTotalResponse(BaseModel):
+    product_id: int
+    sku: Optional[str] = None
+    name: Optional[str] = None
+    total_quantity: int
+    stores: List[StoreQuantity]
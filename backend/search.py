@@ -0,0 +1,241 @@
+from fastapi import HTTPException, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, func, literal, literal_column, desc, table, column
+from typing import List, Optional
+import os
+import re
+
+from models import Product, Supplier
+from pagination import PageParams, encode_cursor, decode_cursor, keyset_predicate, NEXT_CURSOR_HEADER
+
+# Column weights for bm25 ranking: name, sku, description, category
+PREFIX_WEIGHTS = (10.0, 8.0, 1.0, 2.0)
+FUZZY_WEIGHTS = (10.0, 8.0)
+MAX_TERMS = 8
+FACET_LIMIT = 20
+# Broad queries (one or two letters) can match most of the catalog; only the
+# newest RANK_WINDOW matches are ranked so typeahead cost stays bounded, and
+# older matches follow them newest first
+RANK_WINDOW = int(os.getenv("SEARCH_RANK_WINDOW", "1000"))
+
+PREFIX_TIER, FUZZY_TIER = 0, 1
+# Sections of a tier's results: the ranked window, then the matches older than it
+RANKED, OLDER = 0, 1
+TIER_NAMES = {PREFIX_TIER: "prefix", FUZZY_TIER: "fuzzy"}
+INDEXES = {
+    PREFIX_TIER: ("products_fts", PREFIX_WEIGHTS),
+    FUZZY_TIER: ("products_fts_trigram", FUZZY_WEIGHTS)
+}
+
+
+# ==================== QUERY PARSING ====================
+def tokenize(q: str) -> List[str]:
+    """Lowercase word tokens, split the same way as the unicode61 tokenizer"""
+    return re.findall(r"[^\W_]+", q.lower())[:MAX_TERMS]
+
+
+def prefix_expression(terms: List[str]) -> str:
+    """Every term must match the start of a word: "wire"* "head"*"""
+    return " ".join(f'"{t}"*' for t in terms)
+
+
+def fuzzy_expression(terms: List[str]) -> Optional[str]:
+    """Any trigram of any term; rows sharing more trigrams rank higher, so typos still match"""
+    grams = {t[i:i + 3] for t in terms for i in range(len(t) - 2)}
+    if not grams:
+        return None
+    return " OR ".join(f'"{g}"' for g in sorted(grams))
+
+
+# ==================== MATCHING ====================
+def matches(tier: int, expression: str, floor: Optional[int] = None, below: Optional[int] = None):
+    """(rowid, score) of the index rows matching the expression; lower score is better
+
+    `floor` keeps rowids at or above it, `below` those under it.
+    """
+    index, weights = INDEXES[tier]
+    fts = table(index, column("rowid"))
+    # FTS5 takes the table name itself as the MATCH target and bm25() argument
+    name = literal_column(index)
+    query = select(fts.c.rowid.label("id"), func.bm25(name, *weights).label("score"))
+    query = query.where(name.op("MATCH")(expression))
+    if floor is not None:
+        query = query.where(fts.c.rowid >= floor)
+    if below is not None:
+        query = query.where(fts.c.rowid < below)
+    return query.subquery()
+
+
+async def rank_floor(db, tier: int, expression: str, category, supplier_id) -> Optional[int]:
+    """Lowest rowid among the RANK_WINDOW newest matches, or None if there are fewer"""
+    index, _ = INDEXES[tier]
+    fts = table(index, column("rowid"))
+    query = (
+        select(fts.c.rowid)
+        .where(literal_column(index).op("MATCH")(expression))
+        .order_by(fts.c.rowid.desc())
+        .offset(RANK_WINDOW - 1)
+        .limit(1)
+    )
+    if category is not None or supplier_id is not None:
+        query = filtered(query.join(Product, Product.id == fts.c.rowid), category, supplier_id)
+    return await db.scalar(query)
+
+
+def filtered(query, category: Optional[str], supplier_id: Optional[int]):
+    if category is not None:
+        query = query.where(Product.category == category)
+    if supplier_id is not None:
+        query = query.where(Product.supplier_id == supplier_id)
+    return query
+
+
+def expressions(terms: List[str], fuzzy: bool) -> dict:
+    """MATCH expression per tier; the fuzzy tier needs a term of three or more letters"""
+    tiers = {PREFIX_TIER: prefix_expression(terms)}
+    fuzzy_match = fuzzy_expression(terms) if fuzzy else None
+    if fuzzy_match is not None:
+        tiers[FUZZY_TIER] = fuzzy_match
+    return tiers
+
+
+def _section_order(query, section: int) -> list:
+    """Best score first in the ranked window, newest first after it"""
+    if section == RANKED:
+        return [query.c.score, query.c.id]
+    return [query.c.id.desc()]
+
+
+async def _section_page(db, tier, expression, section, floor, after, limit, category, supplier_id):
+    if section == RANKED:
+        hits = matches(tier, expression, floor=floor)
+    else:
+        hits = matches(tier, expression, below=floor)
+    page = select(hits.c.id, hits.c.score).order_by(*_section_order(hits, section)).limit(limit)
+    if category is not None or supplier_id is not None:
+        page = filtered(page.join(Product, Product.id == hits.c.id), category, supplier_id)
+    if after is not None and section == RANKED:
+        page = page.where(keyset_predicate([hits.c.score, hits.c.id], after))
+    elif after is not None:
+        page = page.where(hits.c.id < after[1])
+    # Order and cut on (id, score) alone, then load the full rows for the page
+    page = page.subquery()
+    result = await db.execute(
+        select(Product, page.c.score)
+        .join(page, page.c.id == Product.id)
+        .order_by(*_section_order(page, section))
+    )
+    return [(tier, section, product, score) for product, score in result]
+
+
+async def _tier_page(db, tier, expression, section, after, limit, category, supplier_id):
+    """The ranked window of the tier's matches, then every older match by id, newest first"""
+    floor = await rank_floor(db, tier, expression, category, supplier_id)
+    rows = []
+    if section == RANKED:
+        rows = await _section_page(db, tier, expression, RANKED, floor, after, limit, category, supplier_id)
+        after = None
+    if len(rows) < limit and floor is not None:
+        rows += await _section_page(
+            db, tier, expression, OLDER, floor, after, limit - len(rows), category, supplier_id
+        )
+    return rows
+
+
+async def search_products(
+    db: AsyncSession,
+    q: str,
+    page: PageParams,
+    response: Response,
+    category: Optional[str] = None,
+    supplier_id: Optional[int] = None,
+    fuzzy: bool = True
+) -> List[dict]:
+    """Ranked prefix matches; typo-tolerant trigram matches when nothing matches exactly
+
+    Pages are keyset-paginated on (tier, section, score, id); the cursor
+    remembers the tier, so later pages of a fuzzy search stay fuzzy. Past the
+    RANK_WINDOW newest matches, results continue by id instead of rank.
+    """
+    terms = tokenize(q)
+    if not terms:
+        return []
+    tiers = expressions(terms, fuzzy)
+
+    tier, section, after = PREFIX_TIER, RANKED, None
+    if page.cursor:
+        tier, section, score, product_id = decode_cursor(
+            page.cursor, [literal(0), literal(0), literal(0.0), Product.id]
+        )
+        if tier not in INDEXES or section not in (RANKED, OLDER):
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        after = [score, product_id]
+
+    wanted = page.limit + 1
+    rows = []
+    if tier == PREFIX_TIER:
+        rows = await _tier_page(db, tier, tiers[tier], section, after, wanted, category, supplier_id)
+        if not rows and not page.cursor:
+            tier = FUZZY_TIER
+    if tier == FUZZY_TIER and tier in tiers:
+        rows = await _tier_page(db, tier, tiers[tier], section, after, wanted, category, supplier_id)
+
+    if len(rows) > page.limit:
+        rows = rows[:page.limit]
+        last_tier, last_section, last, last_score = rows[-1]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor([last_tier, last_section, last_score, last.id])
+
+    return [
+        {"product": product, "match": TIER_NAMES[tier], "score": round(-score, 4)}
+        for tier, _, product, score in rows
+    ]
+
+
+# ==================== FACETS ====================
+async def search_facets(
+    db: AsyncSession,
+    q: str,
+    category: Optional[str] = None,
+    supplier_id: Optional[int] = None,
+    match: str = TIER_NAMES[PREFIX_TIER]
+) -> dict:
+    """Category and supplier counts over the match set ("prefix" or "fuzzy") the results came from
+
+    Each facet applies the other facet's filter but not its own, so the
+    client can show what selecting a different value would return.
+    """
+    terms = tokenize(q)
+    tier = FUZZY_TIER if match == TIER_NAMES[FUZZY_TIER] else PREFIX_TIER
+    tiers = expressions(terms, tier == FUZZY_TIER) if terms else {}
+    if tier not in tiers:
+        return {"categories": [], "suppliers": []}
+    hits = matches(tier, tiers[tier])
+    count = func.count().label("count")
+
+    result = await db.execute(
+        filtered(
+            select(Product.category, count).join(hits, hits.c.id == Product.id),
+            None, supplier_id
+        )
+        .group_by(Product.category)
+        .order_by(desc("count"))
+        .limit(FACET_LIMIT)
+    )
+    categories = [{"category": row.category, "count": row.count} for row in result]
+
+    result = await db.execute(
+        filtered(
+            select(Product.supplier_id, Supplier.name, count)
+            .join(hits, hits.c.id == Product.id)
+            .outerjoin(Supplier, Supplier.id == Product.supplier_id),
+            category, None
+        )
+        .group_by(Product.supplier_id, Supplier.name)
+        .order_by(desc("count"))
+        .limit(FACET_LIMIT)
+    )
+    suppliers = [
+        {"supplier_id": row.supplier_id, "supplier_name": row.name, "count": row.count}
+        for row in result
+    ]
+    return {"categories": categories, "suppliers": suppliers}
@@ -0,0 +1,60 @@
+from fastapi import Response
+from pydantic import BaseModel
+from datetime import date, datetime
+from enum import Enum
+from typing import Any, Dict, List, Sequence, Type
+import json
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - stdlib fallback keeps the API working without it
+    orjson = None
+
+
+def _default(value: Any) -> Any:
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Enum):
+        return value.value
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps(payload: Any) -> bytes:
+    """Compact JSON bytes; datetimes as ISO 8601 and enums as their value, like Pydantic"""
+    if orjson is not None:
+        return orjson.dumps(payload)
+    return json.dumps(payload, default=_default, separators=(",", ":")).encode()
+
+
+class FastJSONResponse(Response):
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+# ==================== ROW PAYLOADS ====================
+def columns_for(schema: Type[BaseModel], model, exclude: Sequence[str] = ()) -> list:
+    """The model columns a response schema exposes, in schema field order
+
+    Selecting exactly these keeps the schema the contract (e.g. no password
+    for users) while skipping ORM hydration. Nested fields go in `exclude`.
+    """
+    return [getattr(model, name) for name in schema.model_fields if name not in exclude]
+
+
+def row_dicts(rows: Sequence) -> List[Dict[str, Any]]:
+    return [row._asdict() for row in rows]
+
+
+def json_list(rows: List[Dict[str, Any]], response: Response) -> Response:
+    """Encode a list payload directly, skipping response_model validation
+
+    Headers set on the injected response (e.g. the next-page cursor) are
+    carried over, since FastAPI ignores them when a Response is returned.
+    """
+    headers = {
+        k: v for k, v in response.headers.items()
+        if k not in ("content-length", "content-type")
+    }
+    return FastJSONResponse(rows, headers=headers)
@@ -1,29 +1,57 @@
-from fastapi import FastAPI, APIRouter, Depends, HTTPException, status
+# First import, so the startup report measures the rest of the server import
+import coldstart
+
+from fastapi import FastAPI, APIRouter, Depends, HTTPException, Query, Request, Response, UploadFile, File
+from fastapi.responses import StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func
+from sqlalchemy import select, update, insert, case
+from sqlalchemy.orm import selectinload
 from dotenv import load_dotenv
 from pathlib import Path
 import os
 import logging
-from typing import List
-from datetime import datetime, timedelta
-import json
+from typing import List, Optional
+from datetime import date, datetime
 
 # Local imports
-from database import get_db, init_db
-from models import User, Product, Order, OrderItem, Supplier, StockTransaction, OrderStatus, TransactionType
+from database import get_db, get_read_db, init_db, shards
+from pagination import PageParams, paginate, finish_page, NEXT_CURSOR_HEADER
+import aggregates
+import ai_routes
+import conditional
+import product_io
+import ai_cache
+import migrations
+import sessions
+import snapshots
+import events
+import search
+import metrics
+import stock_writer
+import stock_archive
+import jobs
+import stores
+from serialization import columns_for, row_dicts, json_list
+from sessions import SessionUser, get_current_user, bearer
+from fastapi.security import HTTPAuthorizationCredentials
+from models import (
+    User, Product, Order, OrderItem, Supplier, StockTransaction, StockDailyRollup, OrderStatus, TransactionType,
+    Job, JobKind, JobStatus, Store, StoreStock, StoreStockTransaction
+)
 from schemas import (
     UserCreate, UserLogin, UserResponse,
-    ProductCreate, ProductUpdate, ProductResponse,
-    OrderCreate, OrderResponse,
+    ProductCreate, ProductUpdate, ProductResponse, ProductSearchResponse,
+    OrderCreate, OrderResponse, OrderItemResponse,
     SupplierCreate, SupplierResponse,
-    StockTransactionCreate, StockTransactionResponse,
-    AIForecastRequest, AIReorderRequest, AICategorizationRequest
+    StockTransactionCreate, StockTransactionBulkCreate, StockTransactionResponse, StockRollupResponse,
+    JobCreate, JobResponse,
+    StoreCreate, StoreResponse, StoreStockResponse, StockTotalResponse
 )
 
-# AI Integration
-from emergentintegrations.llm.chat import LlmChat, UserMessage
+# pandas-backed modules load on first use or in the background after startup
+analytics = coldstart.LazyModule("analytics")
+forecasting = ai_routes.forecasting
 
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
@@ -41,17 +69,6 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-# Global variable to store current user (simple session management)
-current_user_store = {}
-
-# Helper: AI Chat Instance
-def get_ai_chat():
-    return LlmChat(
-        api_key=os.getenv("EMERGENT_LLM_KEY"),
-        session_id="puregold-inventory-ai",
-        system_message="You are an AI assistant for Puregold inventory management. Provide helpful, concise insights."
-    ).with_model("openai", "gpt-5")
-
 # ==================== AUTHENTICATION ROUTES ====================
 @api_router.post("/auth/register", response_model=UserResponse)
 async def register(user_data: UserCreate, db: AsyncSession = Depends(get_db)):
@@ -88,16 +105,14 @@ async def login(credentials: UserLogin, db: AsyncSession = Depends(get_db)):
     if not user or user.password != credentials.password:
         raise HTTPException(status_code=401, detail="Invalid credentials")
     
-    # Store user session (simple approach)
-    current_user_store[credentials.username] = {
-        "id": user.id,
-        "username": user.username,
-        "role": user.role.value,
-        "email": user.email
-    }
+    # Persist the session so every worker process can resolve the token
+    token = await sessions.create_session(db, user)
     
     return {
         "message": "Login successful",
+        "token": token,
+        "token_type": "bearer",
+        "expires_in": int(sessions.SESSION_TTL.total_seconds()),
         "user": {
             "id": user.id,
             "username": user.username,
@@ -106,12 +121,36 @@ async def login(credentials: UserLogin, db: AsyncSession = Depends(get_db)):
         }
     }
 
+@api_router.post("/auth/logout")
+async def logout(
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(bearer),
+    db: AsyncSession = Depends(get_db)
+):
+    """Revoke the current session"""
+    if credentials is not None:
+        await sessions.revoke_session(db, credentials.credentials)
+    return {"message": "Logged out"}
+
+@api_router.get("/auth/me")
+async def get_me(current_user: SessionUser = Depends(get_current_user)):
+    """Get the user behind the current session"""
+    return {
+        "id": current_user.id,
+        "username": current_user.username,
+        "email": current_user.email,
+        "role": current_user.role
+    }
+
 @api_router.get("/auth/users", response_model=List[UserResponse])
-async def get_all_users(db: AsyncSession = Depends(get_db)):
-    """Get all users"""
-    result = await db.execute(select(User))
-    users = result.scalars().all()
-    return users
+async def get_all_users(
+    response: Response,
+    page: PageParams = Depends(),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """Get users, one keyset page at a time"""
+    keys = [User.id]
+    result = await db.execute(paginate(select(*columns_for(UserResponse, User)), keys, page))
+    return json_list(row_dicts(finish_page(result.all(), keys, page, response)), response)
 
 # ==================== PRODUCT ROUTES ====================
 @api_router.post("/products", response_model=ProductResponse)
@@ -124,47 +163,163 @@ async def create_product(product: ProductCreate, db: AsyncSession = Depends(get_
     
     new_product = Product(**product.model_dump())
     db.add(new_product)
+    await db.flush()
+    await snapshots.take_snapshot(db, [new_product.id])
     await db.commit()
     await db.refresh(new_product)
     
     return new_product
 
+@api_router.post("/products/import")
+async def import_products(
+    file: UploadFile = File(...),
+    format: Optional[str] = Query(None, pattern="^(csv|ndjson)$"),
+    db: AsyncSession = Depends(get_db)
+):
+    """Bulk upsert products by SKU from a CSV or NDJSON upload"""
+    fmt = format
+    if fmt is None:
+        suffix = Path(file.filename or "").suffix.lower()
+        fmt = {".csv": "csv", ".ndjson": "ndjson", ".jsonl": "ndjson"}.get(suffix)
+    if fmt is None:
+        raise HTTPException(status_code=400, detail="Unknown file format, pass ?format=csv or ?format=ndjson")
+    
+    return await product_io.import_products(db, file.file, fmt)
+
+@api_router.get("/products/export")
+async def export_products(format: str = Query("csv", pattern="^(csv|ndjson)$")):
+    """Stream the whole catalog as CSV or NDJSON"""
+    return StreamingResponse(
+        product_io.export_products(format),
+        media_type=product_io.FORMATS[format],
+        headers={"Content-Disposition": f'attachment; filename="products.{format}"'}
+    )
+
+@api_router.get("/products/search", response_model=ProductSearchResponse)
+async def search_products(
+    response: Response,
+    q: str = Query(..., min_length=1, max_length=200),
+    page: PageParams = Depends(),
+    category: Optional[str] = None,
+    supplier_id: Optional[int] = None,
+    fuzzy: bool = True,
+    facets: bool = True,
+    db: AsyncSession = Depends(get_read_db)
+):
+    """Ranked full-text product search with typo-tolerant fallback and facets"""
+    results = await search.search_products(db, q, page, response, category, supplier_id, fuzzy)
+    # Facets describe the whole result set, so only the first page computes them
+    facet_counts = None
+    if facets and not page.cursor:
+        match = results[0]["match"] if results else "prefix"
+        facet_counts = await search.search_facets(db, q, category, supplier_id, match)
+    
+    return {"query": q, "results": results, "facets": facet_counts}
+
 @api_router.get("/products", response_model=List[ProductResponse])
-async def get_products(db: AsyncSession = Depends(get_db)):
-    """Get all products"""
-    result = await db.execute(select(Product))
-    products = result.scalars().all()
-    return products
+async def get_products(
+    request: Request,
+    response: Response,
+    page: PageParams = Depends(),
+    category: Optional[str] = None,
+    supplier_id: Optional[int] = None,
+    db: AsyncSession = Depends(get_read_db)
+):
+    """Get products, one keyset page at a time"""
+    unchanged = await conditional.check_collection(request, response, db, "products")
+    if unchanged is not None:
+        return unchanged
+    
+    query = select(*columns_for(ProductResponse, Product))
+    if category is not None:
+        query = query.where(Product.category == category)
+    if supplier_id is not None:
+        query = query.where(Product.supplier_id == supplier_id)
+    
+    keys = [Product.id]
+    result = await db.execute(paginate(query, keys, page))
+    return json_list(row_dicts(finish_page(result.all(), keys, page, response)), response)
 
 @api_router.get("/products/{product_id}", response_model=ProductResponse)
-async def get_product(product_id: int, db: AsyncSession = Depends(get_db)):
+async def get_product(
+    product_id: int,
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_read_db)
+):
     """Get a single product"""
+    unchanged = await conditional.check_resource(request, db, Product, product_id)
+    if unchanged is not None:
+        return unchanged
+    
     result = await db.execute(select(Product).where(Product.id == product_id))
     product = result.scalar_one_or_none()
     
     if not product:
         raise HTTPException(status_code=404, detail="Product not found")
     
+    conditional.set_resource_validators(response, product)
     return product
 
 @api_router.put("/products/{product_id}", response_model=ProductResponse)
-async def update_product(product_id: int, product_data: ProductUpdate, db: AsyncSession = Depends(get_db)):
-    """Update a product"""
-    result = await db.execute(select(Product).where(Product.id == product_id))
-    product = result.scalar_one_or_none()
-    
-    if not product:
-        raise HTTPException(status_code=404, detail="Product not found")
-    
-    # Update fields
+async def update_product(
+    product_id: int,
+    product_data: ProductUpdate,
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_db)
+):
+    """Update a product; with If-Match, only while it still has that ETag"""
     update_data = product_data.model_dump(exclude_unset=True)
-    for key, value in update_data.items():
-        setattr(product, key, value)
+    if_match = request.headers.get("if-match")
     
-    product.updated_at = datetime.utcnow()
+    # Compare-and-swap on what this write depends on, re-reading when another write got in between
+    for attempt in range(stock_writer.WRITE_ATTEMPTS):
+        if attempt:
+            await stock_writer.backoff(attempt)
+        result = await db.execute(
+            select(Product.id, Product.quantity, Product.version, Product.updated_at)
+            .where(Product.id == product_id)
+        )
+        current = result.one_or_none()
+        
+        if not current:
+            raise HTTPException(status_code=404, detail="Product not found")
+        
+        etag = conditional.resource_etag("products", current.id, current.updated_at, current.version)
+        if if_match is not None and not conditional.if_match_satisfied(if_match, etag):
+            raise HTTPException(status_code=412, detail="Product was modified, reload it and retry")
+        
+        # The ETag the client saw, or the quantity the stock event reports as the previous level;
+        # other edits overwrite whole fields and cannot lose anything
+        guard = Product.id == product_id
+        if if_match is not None:
+            guard = guard & (Product.version == current.version)
+        elif "quantity" in update_data:
+            guard = guard & (Product.quantity == current.quantity)
+        
+        result = await db.scalars(
+            update(Product)
+            .where(guard)
+            .values(**update_data, version=Product.version + 1, updated_at=datetime.utcnow())
+            .returning(Product)
+        )
+        product = result.one_or_none()
+        if product is not None:
+            break
+        await db.rollback()
+    else:
+        raise HTTPException(status_code=409, detail="Product changed while saving, please retry")
+    
+    # Direct quantity edits bypass stock transactions, so re-base the history
+    if "quantity" in update_data:
+        await snapshots.take_snapshot(db, [product.id])
     await db.commit()
-    await db.refresh(product)
     
+    if "quantity" in update_data and product.quantity != current.quantity:
+        events.publish([events.stock_event(product, current.quantity)])
+    
+    conditional.set_resource_validators(response, product)
     return product
 
 @api_router.delete("/products/{product_id}")
@@ -182,7 +337,7 @@ async def delete_product(product_id: int, db: AsyncSession = Depends(get_db)):
     return {"message": "Product deleted successfully"}
 
 @api_router.get("/products/low-stock/alerts")
-async def get_low_stock_alerts(db: AsyncSession = Depends(get_db)):
+async def get_low_stock_alerts(db: AsyncSession = Depends(get_read_db)):
     """Get products with low stock"""
     result = await db.execute(
         select(Product).where(Product.quantity <= Product.reorder_level)
@@ -214,21 +369,40 @@ async def create_supplier(supplier: SupplierCreate, db: AsyncSession = Depends(g
     return new_supplier
 
 @api_router.get("/suppliers", response_model=List[SupplierResponse])
-async def get_suppliers(db: AsyncSession = Depends(get_db)):
-    """Get all suppliers"""
-    result = await db.execute(select(Supplier))
-    suppliers = result.scalars().all()
-    return suppliers
+async def get_suppliers(
+    request: Request,
+    response: Response,
+    page: PageParams = Depends(),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """Get suppliers, one keyset page at a time"""
+    unchanged = await conditional.check_collection(request, response, db, "suppliers")
+    if unchanged is not None:
+        return unchanged
+    
+    keys = [Supplier.id]
+    result = await db.execute(paginate(select(*columns_for(SupplierResponse, Supplier)), keys, page))
+    return json_list(row_dicts(finish_page(result.all(), keys, page, response)), response)
 
 @api_router.get("/suppliers/{supplier_id}", response_model=SupplierResponse)
-async def get_supplier(supplier_id: int, db: AsyncSession = Depends(get_db)):
+async def get_supplier(
+    supplier_id: int,
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_read_db)
+):
     """Get a single supplier"""
+    unchanged = await conditional.check_resource(request, db, Supplier, supplier_id)
+    if unchanged is not None:
+        return unchanged
+    
     result = await db.execute(select(Supplier).where(Supplier.id == supplier_id))
     supplier = result.scalar_one_or_none()
     
     if not supplier:
         raise HTTPException(status_code=404, detail="Supplier not found")
     
+    conditional.set_resource_validators(response, supplier)
     return supplier
 
 @api_router.delete("/suppliers/{supplier_id}")
@@ -247,84 +421,170 @@ async def delete_supplier(supplier_id: int, db: AsyncSession = Depends(get_db)):
 
 # ==================== ORDER ROUTES ====================
 @api_router.post("/orders", response_model=OrderResponse)
-async def create_order(order_data: OrderCreate, db: AsyncSession = Depends(get_db)):
-    """Create a new order"""
-    # For now, use the first user as creator (in real app, use authenticated user)
-    result = await db.execute(select(User).limit(1))
-    user = result.scalar_one_or_none()
+async def create_order(
+    order_data: OrderCreate,
+    current_user: SessionUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """Create a new order in a fixed number of statements"""
+    user_id = current_user.id
+    
+    # Merge repeated lines for the same product into one requested quantity
+    requested = {}
+    for item in order_data.items:
+        requested[item.product_id] = requested.get(item.product_id, 0) + item.quantity
     
-    if not user:
-        raise HTTPException(status_code=400, detail="No users found. Please create a user first.")
+    if not requested:
+        raise HTTPException(status_code=400, detail="Order has no items")
     
-    # Create order
-    new_order = Order(
-        created_by=user.id,
-        notes=order_data.notes,
-        status=OrderStatus.pending
+    # Load every line-item product in one IN query
+    result = await db.execute(
+        select(Product.id, Product.name, Product.price).where(Product.id.in_(requested))
     )
+    products = {row.id: row for row in result}
     
-    total_amount = 0.0
-    order_items = []
+    for product_id in requested:
+        if product_id not in products:
+            raise HTTPException(status_code=404, detail=f"Product {product_id} not found")
     
-    # Process order items
-    for item in order_data.items:
-        # Get product
-        result = await db.execute(select(Product).where(Product.id == item.product_id))
-        product = result.scalar_one_or_none()
-        
-        if not product:
-            raise HTTPException(status_code=404, detail=f"Product {item.product_id} not found")
-        
-        if product.quantity < item.quantity:
-            raise HTTPException(
-                status_code=400, 
-                detail=f"Insufficient stock for {product.name}. Available: {product.quantity}"
+    # Decrement all stock in one conditional UPDATE; every row must match or nothing is sold
+    needed = case(requested, value=Product.id)
+    for attempt in range(stock_writer.WRITE_ATTEMPTS):
+        if attempt:
+            await stock_writer.backoff(attempt)
+        result = await db.execute(
+            update(Product)
+            .where(Product.id.in_(requested), Product.quantity >= needed)
+            .values(
+                quantity=Product.quantity - needed,
+                version=Product.version + 1,
+                updated_at=datetime.utcnow()
             )
-        
-        # Create order item
-        order_item = OrderItem(
-            product_id=product.id,
-            quantity=item.quantity,
-            price=product.price
+            .returning(
+                Product.id, Product.sku, Product.name, Product.category,
+                Product.quantity, Product.reorder_level
+            )
+            .execution_options(synchronize_session=False)
         )
-        order_items.append(order_item)
-        
-        # Update stock
-        product.quantity -= item.quantity
+        updated = result.all()
+        if len(updated) == len(requested):
+            break
         
-        # Calculate total
-        total_amount += product.price * item.quantity
-        
-        # Create stock transaction
-        transaction = StockTransaction(
-            product_id=product.id,
-            transaction_type=TransactionType.out_stock,
-            quantity=item.quantity,
-            user_id=user.id,
-            notes=f"Order created"
+        # A product was short when the UPDATE ran; retry if stock has come in since
+        await db.rollback()
+        result = await db.execute(
+            select(Product.id, Product.name, Product.quantity).where(Product.id.in_(requested))
         )
-        db.add(transaction)
-    
-    new_order.total_amount = total_amount
-    new_order.order_items = order_items
+        short = next(
+            (row for row in result if row.quantity < requested[row.id]),
+            None
+        )
+        if short is not None:
+            raise HTTPException(
+                status_code=400, 
+                detail=f"Insufficient stock for {short.name}. Available: {short.quantity}"
+            )
+    else:
+        raise HTTPException(status_code=409, detail="Stock changed while placing the order, please retry")
     
+    # Create order
+    total_amount = sum(products[pid].price * qty for pid, qty in requested.items())
+    new_order = Order(
+        created_by=user_id,
+        notes=order_data.notes,
+        status=OrderStatus.pending,
+        total_amount=total_amount
+    )
     db.add(new_order)
+    await db.flush()
+    
+    # Bulk insert order items and their stock transactions
+    result = await db.scalars(
+        insert(OrderItem).returning(OrderItem),
+        [
+            {
+                "order_id": new_order.id,
+                "product_id": item.product_id,
+                "quantity": item.quantity,
+                "price": products[item.product_id].price
+            } for item in order_data.items
+        ]
+    )
+    order_items = result.all()
+    
+    await db.execute(
+        insert(StockTransaction),
+        [
+            {
+                "product_id": item.product_id,
+                "transaction_type": TransactionType.out_stock,
+                "quantity": item.quantity,
+                "user_id": user_id,
+                "notes": f"Order #{new_order.id} created"
+            } for item in order_data.items
+        ]
+    )
+    await ai_cache.invalidate_forecasts(db, requested)
+    
     await db.commit()
-    await db.refresh(new_order)
+    events.publish(events.stock_event(row, row.quantity + requested[row.id]) for row in updated)
     
-    return new_order
+    return OrderResponse(
+        id=new_order.id,
+        order_date=new_order.order_date,
+        status=new_order.status,
+        total_amount=new_order.total_amount,
+        created_by=new_order.created_by,
+        notes=new_order.notes,
+        items=[OrderItemResponse.model_validate(i) for i in order_items],
+        created_at=new_order.created_at
+    )
+
+def select_orders_with_items():
+    """Orders plus their items in one extra SELECT ... WHERE order_id IN (...)"""
+    return select(Order).options(selectinload(Order.order_items))
 
 @api_router.get("/orders", response_model=List[OrderResponse])
-async def get_orders(db: AsyncSession = Depends(get_db)):
-    """Get all orders"""
-    result = await db.execute(select(Order))
-    orders = result.scalars().all()
-    return orders
+async def get_orders(
+    response: Response,
+    page: PageParams = Depends(),
+    status: Optional[OrderStatus] = None,
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None,
+    db: AsyncSession = Depends(get_read_db)
+):
+    """Get orders newest first with their items, one keyset page at a time"""
+    query = select(*columns_for(OrderResponse, Order, exclude=["items"]))
+    if status is not None:
+        query = query.where(Order.status == status)
+    if date_from is not None:
+        query = query.where(Order.order_date >= date_from)
+    if date_to is not None:
+        query = query.where(Order.order_date < date_to)
+    
+    keys = [Order.id]
+    result = await db.execute(paginate(query, keys, page, descending=True))
+    orders = row_dicts(finish_page(result.all(), keys, page, response))
+    
+    # Items for the whole page in one IN query, grouped onto their orders
+    items = {order["id"]: [] for order in orders}
+    if items:
+        result = await db.execute(
+            select(OrderItem.order_id, *columns_for(OrderItemResponse, OrderItem))
+            .where(OrderItem.order_id.in_(items))
+            .order_by(OrderItem.id)
+        )
+        for order_id, *values in result:
+            items[order_id].append(dict(zip(OrderItemResponse.model_fields, values)))
+    for order in orders:
+        order["items"] = items[order["id"]]
+    
+    return json_list(orders, response)
 
 @api_router.get("/orders/{order_id}", response_model=OrderResponse)
-async def get_order(order_id: int, db: AsyncSession = Depends(get_db)):
-    """Get a single order"""
-    result = await db.execute(select(Order).where(Order.id == order_id))
+async def get_order(order_id: int, db: AsyncSession = Depends(get_read_db)):
+    """Get a single order with its items"""
+    result = await db.execute(select_orders_with_items().where(Order.id == order_id))
     order = result.scalar_one_or_none()
     
     if not order:
@@ -352,239 +612,421 @@ async def update_order_status(order_id: int, status: OrderStatus, db: AsyncSessi
 @api_router.post("/stock/transactions", response_model=StockTransactionResponse)
 async def create_stock_transaction(
     transaction_data: StockTransactionCreate, 
-    db: AsyncSession = Depends(get_db)
+    current_user: SessionUser = Depends(get_current_user)
 ):
-    """Create a stock transaction"""
-    # Get user (use first user for now)
-    result = await db.execute(select(User).limit(1))
-    user = result.scalar_one_or_none()
-    
-    if not user:
-        raise HTTPException(status_code=400, detail="No users found")
-    
-    # Get product
-    result = await db.execute(select(Product).where(Product.id == transaction_data.product_id))
-    product = result.scalar_one_or_none()
-    
-    if not product:
-        raise HTTPException(status_code=404, detail="Product not found")
-    
-    # Update product quantity
-    if transaction_data.transaction_type == TransactionType.in_stock:
-        product.quantity += transaction_data.quantity
-    elif transaction_data.transaction_type == TransactionType.out_stock:
-        if product.quantity < transaction_data.quantity:
-            raise HTTPException(status_code=400, detail="Insufficient stock")
-        product.quantity -= transaction_data.quantity
-    else:  # adjustment
-        product.quantity = transaction_data.quantity
-    
-    # Create transaction
-    transaction = StockTransaction(
-        product_id=transaction_data.product_id,
-        transaction_type=transaction_data.transaction_type,
-        quantity=transaction_data.quantity,
-        user_id=user.id,
-        notes=transaction_data.notes
+    """Create a stock transaction; concurrent requests share one commit"""
+    return await stock_writer.record_transaction(transaction_data, current_user.id)
+
+@api_router.post("/stock/transactions/bulk", response_model=List[StockTransactionResponse])
+async def create_stock_transactions_bulk(
+    bulk_data: StockTransactionBulkCreate,
+    current_user: SessionUser = Depends(get_current_user)
+):
+    """Record many stock transactions in order as one all-or-nothing transaction"""
+    return await stock_writer.record_transactions(
+        [(data, current_user.id) for data in bulk_data.transactions]
     )
-    
-    db.add(transaction)
-    await db.commit()
-    await db.refresh(transaction)
-    
-    return transaction
 
 @api_router.get("/stock/transactions", response_model=List[StockTransactionResponse])
-async def get_stock_transactions(db: AsyncSession = Depends(get_db)):
-    """Get all stock transactions"""
-    result = await db.execute(select(StockTransaction).order_by(StockTransaction.transaction_date.desc()))
-    transactions = result.scalars().all()
-    return transactions
-
-# ==================== AI ROUTES ====================
-@api_router.post("/ai/forecast")
-async def ai_forecast(request: AIForecastRequest, db: AsyncSession = Depends(get_db)):
-    """AI-powered inventory forecasting"""
-    # Get product
-    result = await db.execute(select(Product).where(Product.id == request.product_id))
-    product = result.scalar_one_or_none()
-    
-    if not product:
-        raise HTTPException(status_code=404, detail="Product not found")
-    
-    # Get recent transactions
-    result = await db.execute(
-        select(StockTransaction)
-        .where(StockTransaction.product_id == request.product_id)
-        .order_by(StockTransaction.transaction_date.desc())
-        .limit(30)
-    )
-    transactions = result.scalars().all()
-    
-    # Prepare data for AI
-    transaction_data = [
-        {
-            "date": t.transaction_date.isoformat(),
-            "type": t.transaction_type.value,
-            "quantity": t.quantity
-        } for t in transactions
-    ]
-    
-    # Get AI insights
-    chat = get_ai_chat()
-    message = UserMessage(
-        text=f"""Analyze this product's inventory data and provide a forecast for the next {request.days} days:
-        
-Product: {product.name} (SKU: {product.sku})
-Current Stock: {product.quantity}
-Reorder Level: {product.reorder_level}
-Recent Transactions: {json.dumps(transaction_data)}
-
-Provide:
-1. Predicted demand for next {request.days} days
-2. Recommended reorder date
-3. Suggested order quantity
-4. Risk assessment (low/medium/high)
-
-Format as JSON with keys: predicted_demand, reorder_date, order_quantity, risk_level, analysis"""
-    )
+async def get_stock_transactions(
+    response: Response,
+    page: PageParams = Depends(),
+    product_id: Optional[int] = None,
+    transaction_type: Optional[TransactionType] = None,
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None,
+    db: AsyncSession = Depends(get_read_db)
+):
+    """Get stock transactions newest first, one keyset page at a time"""
+    query = select(*columns_for(StockTransactionResponse, StockTransaction))
+    if product_id is not None:
+        query = query.where(StockTransaction.product_id == product_id)
+    if transaction_type is not None:
+        query = query.where(StockTransaction.transaction_type == transaction_type)
+    if date_from is not None:
+        query = query.where(StockTransaction.transaction_date >= date_from)
+    if date_to is not None:
+        query = query.where(StockTransaction.transaction_date < date_to)
     
-    try:
-        response = await chat.send_message(message)
-        return {
-            "product_id": product.id,
-            "product_name": product.name,
-            "current_stock": product.quantity,
-            "forecast": response
-        }
-    except Exception as e:
-        logger.error(f"AI forecast error: {e}")
-        raise HTTPException(status_code=500, detail="AI forecast failed")
-
-@api_router.post("/ai/reorder-suggestions")
-async def ai_reorder_suggestions(request: AIReorderRequest, db: AsyncSession = Depends(get_db)):
-    """Get AI-powered reorder suggestions"""
-    # Get low stock products
-    result = await db.execute(
-        select(Product).where(Product.quantity <= Product.reorder_level)
+    keys = [StockTransaction.transaction_date, StockTransaction.id]
+    result = await db.execute(paginate(query, keys, page, descending=True))
+    return json_list(row_dicts(finish_page(result.all(), keys, page, response)), response)
+
+@api_router.get("/stock/transactions/archive")
+async def get_archived_stock_transactions(
+    product_id: Optional[int] = None,
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None,
+    db: AsyncSession = Depends(get_read_db)
+):
+    """Stream archived stock transactions as NDJSON, oldest first"""
+    paths = await stock_archive.archive_paths(db, date_from, date_to)
+    return StreamingResponse(
+        stock_archive.iter_archived(paths, product_id, date_from, date_to),
+        media_type="application/x-ndjson"
     )
-    products = result.scalars().all()
-    
-    if not products:
-        return {"message": "No products need reordering", "suggestions": []}
-    
-    suggestions = []
-    chat = get_ai_chat()
+
+@api_router.post("/stock/archive")
+async def archive_stock_transactions():
+    """Move stock transactions past the retention window into archive files"""
+    if stock_archive.ARCHIVE_AFTER_DAYS <= 0:
+        raise HTTPException(status_code=400, detail="Stock transaction archival is disabled")
+    summary = await stock_archive.archive_transactions()
+    if summary is None:
+        raise HTTPException(status_code=409, detail="Stock transaction archival is already running")
+    return summary
+
+@api_router.get("/stock/rollups", response_model=List[StockRollupResponse])
+async def get_stock_rollups(
+    response: Response,
+    page: PageParams = Depends(),
+    product_id: Optional[int] = None,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    db: AsyncSession = Depends(get_read_db)
+):
+    """Daily in / out / adjustment totals per product, newest day first"""
+    query = select(*columns_for(StockRollupResponse, StockDailyRollup))
+    if product_id is not None:
+        query = query.where(StockDailyRollup.product_id == product_id)
+    if date_from is not None:
+        query = query.where(StockDailyRollup.day >= date_from)
+    if date_to is not None:
+        query = query.where(StockDailyRollup.day < date_to)
     
-    for product in products[:5]:  # Limit to 5 for performance
-        message = UserMessage(
-            text=f"""Product needs reordering:
-Name: {product.name}
-Current Stock: {product.quantity}
-Reorder Level: {product.reorder_level}
-Price: ${product.price}
-Cost: ${product.cost}
+    keys = [StockDailyRollup.day, StockDailyRollup.product_id]
+    result = await db.execute(paginate(query, keys, page, descending=True))
+    return json_list(row_dicts(finish_page(result.all(), keys, page, response)), response)
 
-Suggest optimal order quantity considering:
-- Stock level
-- Typical turnover
-- Cost efficiency
+@api_router.post("/stock/snapshots")
+async def create_stock_snapshot(db: AsyncSession = Depends(get_db)):
+    """Snapshot every product whose stock changed since its last snapshot"""
+    written = await snapshots.take_snapshot(db)
+    await db.commit()
+    return {"snapshotted": written}
 
-Return only a number representing the suggested quantity."""
+# Helper: point-in-time replays need the raw rows, which archival removes
+async def ensure_not_archived(db: AsyncSession, at: datetime):
+    horizon = await stock_archive.archived_before(db)
+    if horizon is not None and at < horizon:
+        raise HTTPException(
+            status_code=410,
+            detail=f"Stock history before {horizon.isoformat()} is archived; "
+                   "see /api/stock/rollups and /api/stock/transactions/archive"
         )
-        
-        try:
-            response = await chat.send_message(message)
-            suggestions.append({
-                "product_id": product.id,
-                "product_name": product.name,
-                "sku": product.sku,
-                "current_stock": product.quantity,
-                "reorder_level": product.reorder_level,
-                "suggested_quantity": response.strip()
-            })
-        except Exception as e:
-            logger.error(f"AI suggestion error for product {product.id}: {e}")
-    
-    return {"suggestions": suggestions}
-
-@api_router.post("/ai/categorize")
-async def ai_categorize_product(request: AICategorizationRequest):
-    """AI-powered product categorization"""
-    chat = get_ai_chat()
-    
-    message = UserMessage(
-        text=f"""Categorize this product and generate a professional description:
-        
-Product Name: {request.product_name}
-Description: {request.product_description or 'Not provided'}
 
-Return JSON with:
-1. category (single category from: Electronics, Food & Beverage, Household, Personal Care, Clothing, Other)
-2. enhanced_description (professional, 2-3 sentences)
-3. tags (array of 3-5 relevant tags)"""
-    )
+@api_router.get("/stock/as-of")
+async def get_catalog_stock_as_of(
+    at: datetime,
+    response: Response,
+    page: PageParams = Depends(),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """Stock of every product at a point in time, one keyset page at a time"""
+    await ensure_not_archived(db, at)
+    query, anchor = snapshots.stock_as_of_query(at)
+    keys = [anchor.c.product_id]
+    result = await db.execute(paginate(query, keys, page))
+    rows = finish_page(result.all(), keys, page, response)
+    return {
+        "at": at.isoformat(),
+        "products": [
+            {
+                "product_id": r.product_id,
+                "sku": r.sku,
+                "name": r.name,
+                "quantity": int(r.quantity),
+                "replayed_from": r.replayed_from.isoformat()
+            } for r in rows
+        ]
+    }
+
+@api_router.get("/stock/as-of/{product_id}")
+async def get_product_stock_as_of(product_id: int, at: datetime, db: AsyncSession = Depends(get_read_db)):
+    """Stock of one product at a point in time"""
+    await ensure_not_archived(db, at)
+    row = await snapshots.product_stock_as_of(db, product_id, at)
+    if row is None:
+        raise HTTPException(status_code=404, detail="No stock history for this product at that time")
+    return {
+        "product_id": row.product_id,
+        "sku": row.sku,
+        "name": row.name,
+        "at": at.isoformat(),
+        "quantity": int(row.quantity),
+        "replayed_from": row.replayed_from.isoformat()
+    }
+
+# ==================== STORE ROUTES ====================
+@api_router.post("/stores", response_model=StoreResponse)
+async def create_store(store_data: StoreCreate, db: AsyncSession = Depends(get_db)):
+    """Create a store and its stock shard"""
+    existing = await db.scalar(select(Store.id).where(Store.code == store_data.code))
+    if existing:
+        raise HTTPException(status_code=400, detail="Store code already exists")
     
-    try:
-        response = await chat.send_message(message)
-        return {
-            "product_name": request.product_name,
-            "ai_response": response
-        }
-    except Exception as e:
-        logger.error(f"AI categorization error: {e}")
-        raise HTTPException(status_code=500, detail="AI categorization failed")
+    store = Store(**store_data.model_dump())
+    db.add(store)
+    await db.commit()
+    await db.refresh(store)
+    await shards.ensure(store.id)
+    return store
 
-# ==================== DASHBOARD ROUTES ====================
-@api_router.get("/dashboard/stats")
-async def get_dashboard_stats(db: AsyncSession = Depends(get_db)):
-    """Get dashboard statistics"""
-    # Total products
-    result = await db.execute(select(func.count(Product.id)))
-    total_products = result.scalar()
+@api_router.get("/stores", response_model=List[StoreResponse])
+async def get_stores(db: AsyncSession = Depends(get_read_db)):
+    """Get all stores"""
+    result = await db.execute(select(Store).order_by(Store.id))
+    return result.scalars().all()
+
+@api_router.get("/stores/stock/totals", response_model=List[StockTotalResponse])
+async def get_store_stock_totals(
+    response: Response,
+    page: PageParams = Depends(),
+    sku: Optional[List[str]] = Query(None),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """Stock per product summed over every store; the shards are read concurrently"""
+    product_ids = None
+    if sku:
+        product_ids = (await db.scalars(select(Product.id).where(Product.sku.in_(sku)))).all()
+    return await stores.stock_totals(db, page, response, product_ids)
+
+@api_router.get("/stores/low-stock")
+async def get_chain_low_stock(db: AsyncSession = Depends(get_read_db)):
+    """Products at or below their reorder level in any store, largest shortfall first"""
+    products = await stores.chain_low_stock(db)
+    return {"count": len(products), "products": products}
+
+@api_router.get("/stores/{store_id}", response_model=StoreResponse)
+async def get_store(store_id: int, db: AsyncSession = Depends(get_read_db)):
+    """Get a single store"""
+    store = await db.get(Store, store_id)
+    if not store:
+        raise HTTPException(status_code=404, detail="Store not found")
+    return store
+
+@api_router.get("/stores/{store_id}/stock", response_model=List[StoreStockResponse])
+async def get_store_stock(
+    response: Response,
+    page: PageParams = Depends(),
+    low_stock_only: bool = False,
+    db: AsyncSession = Depends(stores.get_store_db),
+    catalog: AsyncSession = Depends(get_read_db)
+):
+    """Stock of one store by product id, one keyset page at a time"""
+    query = select(StoreStock.product_id, StoreStock.quantity, StoreStock.reorder_level, StoreStock.updated_at)
+    if low_stock_only:
+        query = query.where(StoreStock.quantity <= StoreStock.reorder_level)
     
-    # Low stock count
-    result = await db.execute(
-        select(func.count(Product.id)).where(Product.quantity <= Product.reorder_level)
-    )
-    low_stock_count = result.scalar()
+    keys = [StoreStock.product_id]
+    result = await db.execute(paginate(query, keys, page))
+    rows = row_dicts(finish_page(result.all(), keys, page, response))
+    products = await stores.product_lookup(catalog, (row["product_id"] for row in rows))
+    return json_list(stores.with_catalog(rows, products), response)
+
+@api_router.post(
+    "/stores/{store_id}/stock/transactions",
+    response_model=StockTransactionResponse,
+    dependencies=[Depends(stores.require_store)]
+)
+async def create_store_stock_transaction(
+    store_id: int,
+    transaction_data: StockTransactionCreate,
+    current_user: SessionUser = Depends(get_current_user)
+):
+    """Record a stock move at one store; concurrent moves at a store share one shard commit"""
+    return await stores.record_transaction(store_id, transaction_data, current_user.id)
+
+@api_router.get("/stores/{store_id}/stock/transactions", response_model=List[StockTransactionResponse])
+async def get_store_stock_transactions(
+    response: Response,
+    page: PageParams = Depends(),
+    product_id: Optional[int] = None,
+    db: AsyncSession = Depends(stores.get_store_db)
+):
+    """Stock moves of one store newest first, one keyset page at a time"""
+    query = select(*columns_for(StockTransactionResponse, StoreStockTransaction))
+    if product_id is not None:
+        query = query.where(StoreStockTransaction.product_id == product_id)
     
-    # Total orders
-    result = await db.execute(select(func.count(Order.id)))
-    total_orders = result.scalar()
+    keys = [StoreStockTransaction.transaction_date, StoreStockTransaction.id]
+    result = await db.execute(paginate(query, keys, page, descending=True))
+    return json_list(row_dicts(finish_page(result.all(), keys, page, response)), response)
+
+# ==================== FORECAST ROUTES ====================
+@api_router.get("/forecasts")
+async def get_catalog_forecast(
+    days: int = Query(30, ge=1, le=365),
+    lead_time_days: Optional[int] = Query(None, ge=0, le=365, description="Defaults to FORECAST_LEAD_TIME_DAYS"),
+    risk_level: Optional[str] = Query(None, pattern="^(low|medium|high)$"),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """Forecast every product in one vectorized pass"""
+    if lead_time_days is None:
+        lead_time_days = forecasting.DEFAULT_LEAD_TIME_DAYS
     
-    # Pending orders
-    result = await db.execute(
-        select(func.count(Order.id)).where(Order.status == OrderStatus.pending)
+    plan = await forecasting.forecast(db, None, days, lead_time_days)
+    if risk_level is not None:
+        plan = plan[plan["risk_level"] == risk_level]
+    return {
+        "generated_at": datetime.utcnow().isoformat(),
+        "count": len(plan),
+        "forecasts": forecasting.to_records(plan)
+    }
+
+# ==================== ANALYTICS ROUTES ====================
+@api_router.get("/analytics/velocity")
+async def get_sales_velocity(
+    days: int = Query(90, ge=1, le=3650),
+    limit: int = Query(100, ge=1, le=10000),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """Units sold per day for every SKU, fastest movers first"""
+    report = await analytics.velocity_report(db, days, limit)
+    return Response(content=report, media_type="application/json")
+
+@api_router.get("/analytics/days-of-cover")
+async def get_days_of_cover(
+    days: int = Query(90, ge=1, le=3650),
+    max_days: Optional[float] = Query(None, ge=0),
+    limit: int = Query(100, ge=1, le=10000),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """Days the stock on hand lasts at the window's sales rate, shortest first"""
+    report = await analytics.days_of_cover_report(db, days, max_days, limit)
+    return Response(content=report, media_type="application/json")
+
+@api_router.get("/analytics/abc")
+async def get_abc_classification(
+    days: int = Query(365, ge=1, le=3650),
+    abc_class: Optional[str] = Query(None, pattern="^[ABC]$"),
+    limit: int = Query(100, ge=1, le=10000),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """ABC classification of products by revenue over the window"""
+    report = await analytics.abc_report(db, days, abc_class, limit)
+    return Response(content=report, media_type="application/json")
+
+@api_router.get("/analytics/turnover")
+async def get_inventory_turnover(
+    days: int = Query(365, ge=1, le=3650),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """Inventory turnover and days of inventory per category and overall"""
+    report = await analytics.turnover_report(db, days)
+    return Response(content=report, media_type="application/json")
+
+@api_router.get("/analytics/dead-stock")
+async def get_dead_stock(
+    days: int = Query(90, ge=1, le=3650),
+    limit: int = Query(100, ge=1, le=10000),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """Products holding stock that sold nothing in the window"""
+    report = await analytics.dead_stock_report(db, days, limit)
+    return Response(content=report, media_type="application/json")
+
+@api_router.get("/analytics/revenue")
+async def get_revenue_breakdown(
+    days: int = Query(30, ge=1, le=3650),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """Revenue and units by day, by category and by day and category"""
+    report = await analytics.revenue_report(db, days)
+    return Response(content=report, media_type="application/json")
+
+# ==================== EVENT ROUTES ====================
+@api_router.get("/events/stock")
+async def stream_stock_events(
+    product_id: Optional[List[int]] = Query(None),
+    category: Optional[str] = None,
+    low_stock_only: bool = False
+):
+    """Server-Sent Events for stock changes, optionally filtered per client"""
+    subscriber = events.Subscriber(
+        product_ids=set(product_id) if product_id else None,
+        category=category,
+        low_stock_only=low_stock_only
     )
-    pending_orders = result.scalar()
-    
-    # Total inventory value
-    result = await db.execute(select(Product))
-    products = result.scalars().all()
-    inventory_value = sum(p.quantity * p.cost for p in products)
-    
-    # Recent orders
-    result = await db.execute(
-        select(Order).order_by(Order.created_at.desc()).limit(5)
+    return StreamingResponse(
+        events.stream(subscriber),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
     )
-    recent_orders = result.scalars().all()
+
+# ==================== JOB ROUTES ====================
+@api_router.post("/jobs", response_model=JobResponse, status_code=202)
+async def submit_job(
+    job_data: JobCreate,
+    current_user: SessionUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """Queue a catalog-wide job; poll its status and fetch the result when it succeeds"""
+    return await jobs.submit(db, job_data.kind, job_data.params, current_user.id)
+
+@api_router.get("/jobs", response_model=List[JobResponse])
+async def get_jobs(
+    response: Response,
+    page: PageParams = Depends(),
+    status: Optional[JobStatus] = None,
+    kind: Optional[JobKind] = None,
+    db: AsyncSession = Depends(get_read_db)
+):
+    """Get jobs newest first, one keyset page at a time"""
+    query = select(*columns_for(JobResponse, Job))
+    if status is not None:
+        query = query.where(Job.status == status)
+    if kind is not None:
+        query = query.where(Job.kind == kind)
     
-    return {
-        "total_products": total_products,
-        "low_stock_count": low_stock_count,
-        "total_orders": total_orders,
-        "pending_orders": pending_orders,
-        "inventory_value": round(inventory_value, 2),
-        "recent_orders": [
-            {
-                "id": o.id,
-                "order_date": o.order_date.isoformat(),
-                "status": o.status.value,
-                "total_amount": o.total_amount
-            } for o in recent_orders
-        ]
-    }
+    keys = [Job.id]
+    result = await db.execute(paginate(query, keys, page, descending=True))
+    return json_list(row_dicts(finish_page(result.all(), keys, page, response)), response)
+
+@api_router.get("/jobs/{job_id}", response_model=JobResponse)
+async def get_job(job_id: int, db: AsyncSession = Depends(get_read_db)):
+    """Get a job's status and progress"""
+    job = await db.get(Job, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+@api_router.get("/jobs/{job_id}/result")
+async def get_job_result(job_id: int, db: AsyncSession = Depends(get_read_db)):
+    """Stream the result items of a succeeded job as a JSON array"""
+    job_status = await db.scalar(select(Job.status).where(Job.id == job_id))
+    if job_status is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    if job_status != JobStatus.succeeded:
+        raise HTTPException(status_code=409, detail=f"Job is {job_status.value}")
+    return StreamingResponse(jobs.iter_results(job_id), media_type="application/json")
+
+@api_router.post("/jobs/{job_id}/cancel", response_model=JobResponse)
+async def cancel_job(job_id: int, db: AsyncSession = Depends(get_db)):
+    """Cancel a queued or running job"""
+    job = await jobs.cancel(db, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    if job.status != JobStatus.cancelled:
+        raise HTTPException(status_code=409, detail=f"Job already {job.status.value}")
+    return job
+
+# ==================== DASHBOARD ROUTES ====================
+@api_router.get("/dashboard/stats")
+async def get_dashboard_stats(db: AsyncSession = Depends(get_read_db)):
+    """Get dashboard statistics"""
+    return await aggregates.get_dashboard_stats(db)
+
+# ==================== METRICS ROUTES ====================
+@api_router.get("/metrics")
+async def get_metrics():
+    """Request, SQL and LLM metrics in Prometheus text format"""
+    return Response(content=metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+@api_router.get("/startup")
+async def get_startup_report():
+    """Import, startup and first-request timings, and which deferred modules are loaded"""
+    return coldstart.report()
 
 # ==================== ROOT ROUTE ====================
 @api_router.get("/")
@@ -604,6 +1046,10 @@ async def root():
         ]
     }
 
+# AI routes are optional; CRUD-only deployments run without the LLM stack installed
+if ai_routes.AI_ENABLED:
+    api_router.include_router(ai_routes.router)
+
 # Include the router in the main app
 app.include_router(api_router)
 
@@ -614,11 +1060,40 @@ app.add_middleware(
     allow_origins=os.environ.get('CORS_ORIGINS', '*').split(','),
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER, "ETag", "Last-Modified"],
 )
 
+# Per-route latency and SQL metrics, served at /api/metrics
+app.add_middleware(metrics.MetricsMiddleware)
+
 # Initialize database on startup
 @app.on_event("startup")
 async def startup_event():
     logger.info("Initializing database...")
     await init_db()
+    coldstart.mark("init_db")
+    applied = await migrations.run_migrations()
+    if applied:
+        logger.info(f"Applied migrations: {applied}")
+    coldstart.mark("migrations")
     logger.info("Database initialized successfully!")
+    sessions.start_sweeper()
+    snapshots.start_scheduler()
+    stock_writer.start_writer()
+    stock_archive.start_archiver()
+    await jobs.start_workers()
+    coldstart.mark("ready")
+    coldstart.start_warmup()
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    await sessions.stop_sweeper()
+    await snapshots.stop_scheduler()
+    await stock_writer.stop_writer()
+    await stock_archive.stop_archiver()
+    await jobs.stop_workers()
+    await stores.stop_writers()
+    await shards.dispose()
+    await coldstart.stop_warmup()
+
+coldstart.mark("import")
@@ -0,0 +1,159 @@
+from fastapi import Depends, HTTPException
+from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, delete
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Optional, Tuple
+import asyncio
+import hashlib
+import logging
+import os
+import secrets
+import time
+
+from database import AsyncSessionLocal
+from models import User, UserSession
+
+logger = logging.getLogger(__name__)
+
+# Session lifetime and front-cache settings (override through env vars)
+SESSION_TTL = timedelta(hours=float(os.getenv("SESSION_TTL_HOURS", "12")))
+CACHE_SIZE = int(os.getenv("SESSION_CACHE_SIZE", "10000"))
+# How long a worker trusts its cached copy before re-checking the table
+# (bounds how late a logout in another worker is noticed)
+CACHE_SECONDS = float(os.getenv("SESSION_CACHE_SECONDS", "60"))
+SWEEP_INTERVAL = float(os.getenv("SESSION_SWEEP_INTERVAL_SECONDS", "300"))
+
+bearer = HTTPBearer(auto_error=False)
+
+
+@dataclass(frozen=True)
+class SessionUser:
+    id: int
+    username: str
+    email: str
+    role: str
+
+
+# token hash -> (user, session expiry, cached-until monotonic time), least recent first
+_cache: "OrderedDict[str, Tuple[SessionUser, datetime, float]]" = OrderedDict()
+_sweeper: Optional[asyncio.Task] = None
+
+
+def hash_token(token: str) -> str:
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+def _remember(key: str, user: SessionUser, expires_at: datetime) -> None:
+    _cache[key] = (user, expires_at, time.monotonic() + CACHE_SECONDS)
+    _cache.move_to_end(key)
+    while len(_cache) > CACHE_SIZE:
+        _cache.popitem(last=False)
+
+
+# ==================== SESSION LIFECYCLE ====================
+async def create_session(db: AsyncSession, user: User) -> str:
+    """Persist a new session for the user and return its bearer token"""
+    token = secrets.token_urlsafe(32)
+    key = hash_token(token)
+    expires_at = datetime.utcnow() + SESSION_TTL
+    db.add(UserSession(token_hash=key, user_id=user.id, expires_at=expires_at))
+    await db.commit()
+    _remember(key, SessionUser(user.id, user.username, user.email, user.role.value), expires_at)
+    return token
+
+
+async def resolve_session(token: str) -> Optional[SessionUser]:
+    """The user behind a bearer token, or None if unknown or expired"""
+    key = hash_token(token)
+    now = datetime.utcnow()
+
+    cached = _cache.get(key)
+    if cached is not None:
+        user, expires_at, cached_until = cached
+        if expires_at > now and cached_until > time.monotonic():
+            _cache.move_to_end(key)
+            return user
+        _cache.pop(key, None)
+
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(
+            select(User.id, User.username, User.email, User.role, UserSession.expires_at)
+            .join(UserSession, UserSession.user_id == User.id)
+            .where(UserSession.token_hash == key, UserSession.expires_at > now)
+        )
+        row = result.one_or_none()
+    if row is None:
+        return None
+
+    user = SessionUser(row.id, row.username, row.email, row.role.value)
+    _remember(key, user, row.expires_at)
+    return user
+
+
+async def revoke_session(db: AsyncSession, token: str) -> None:
+    key = hash_token(token)
+    _cache.pop(key, None)
+    await db.execute(delete(UserSession).where(UserSession.token_hash == key))
+    await db.commit()
+
+
+async def sweep_expired_sessions() -> int:
+    """Delete expired sessions; returns how many were removed"""
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(delete(UserSession).where(UserSession.expires_at <= datetime.utcnow()))
+        await db.commit()
+    return result.rowcount
+
+
+async def _sweep_forever() -> None:
+    while True:
+        await asyncio.sleep(SWEEP_INTERVAL)
+        try:
+            removed = await sweep_expired_sessions()
+            if removed:
+                logger.info(f"Swept {removed} expired sessions")
+        except Exception as e:
+            logger.error(f"Session sweep failed: {e}")
+
+
+def start_sweeper() -> None:
+    global _sweeper
+    if _sweeper is None or _sweeper.done():
+        _sweeper = asyncio.create_task(_sweep_forever())
+
+
+async def stop_sweeper() -> None:
+    global _sweeper
+    if _sweeper is not None:
+        _sweeper.cancel()
+        try:
+            await _sweeper
+        except asyncio.CancelledError:
+            pass
+        _sweeper = None
+
+
+# ==================== DEPENDENCIES ====================
+async def get_optional_user(
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(bearer)
+) -> Optional[SessionUser]:
+    """Acting user if a valid bearer token was sent"""
+    if credentials is None:
+        return None
+    return await resolve_session(credentials.credentials)
+
+
+async def get_current_user(
+    user: Optional[SessionUser] = Depends(get_optional_user)
+) -> SessionUser:
+    """Acting user; 401 without a valid session"""
+    if user is None:
+        raise HTTPException(
+            status_code=401,
+            detail="Not authenticated",
+            headers={"WWW-Authenticate": "Bearer"}
+        )
+    return user
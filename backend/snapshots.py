@@ -0,0 +1,161 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, insert, func, case, or_, literal, DateTime
+from datetime import datetime
+from typing import Optional, Sequence
+import asyncio
+import logging
+import os
+
+from database import AsyncSessionLocal
+from models import Product, StockSnapshot, StockTransaction, TransactionType
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_INTERVAL = float(os.getenv("STOCK_SNAPSHOT_INTERVAL_HOURS", "24")) * 3600
+
+_scheduler: Optional[asyncio.Task] = None
+
+
+# ==================== TAKING SNAPSHOTS ====================
+async def take_snapshot(db: AsyncSession, product_ids: Optional[Sequence[int]] = None) -> int:
+    """Record the current quantity of products changed since their last snapshot
+
+    With product_ids, those products are snapshotted unconditionally; this is
+    used when quantity is set directly instead of through a stock transaction.
+    Runs in the caller's transaction; returns the number of rows written.
+    """
+    # A transaction can commit between taking `now` and this INSERT getting the
+    # write lock; its quantity is in the snapshot, so the snapshot must not be
+    # dated before it or point-in-time replays would count it twice
+    now = literal(datetime.utcnow(), DateTime)
+    latest = select(func.max(StockTransaction.transaction_date)).scalar_subquery()
+    snapshot_date = func.max(now, func.coalesce(latest, now), type_=DateTime)
+    query = select(Product.id, snapshot_date, Product.quantity)
+    if product_ids is not None:
+        query = query.where(Product.id.in_(product_ids))
+    else:
+        last_snapshot = (
+            select(func.max(StockSnapshot.snapshot_date))
+            .where(StockSnapshot.product_id == Product.id)
+            .scalar_subquery()
+        )
+        query = query.where(or_(last_snapshot.is_(None), Product.updated_at > last_snapshot))
+
+    result = await db.execute(
+        insert(StockSnapshot).from_select(["product_id", "snapshot_date", "quantity"], query)
+    )
+    return result.rowcount
+
+
+async def _snapshot_forever() -> None:
+    while True:
+        try:
+            async with AsyncSessionLocal() as db:
+                written = await take_snapshot(db)
+                await db.commit()
+            if written:
+                logger.info(f"Stock snapshot recorded {written} products")
+        except Exception as e:
+            logger.error(f"Stock snapshot failed: {e}")
+        await asyncio.sleep(SNAPSHOT_INTERVAL)
+
+
+def start_scheduler() -> None:
+    global _scheduler
+    if _scheduler is None or _scheduler.done():
+        _scheduler = asyncio.create_task(_snapshot_forever())
+
+
+async def stop_scheduler() -> None:
+    global _scheduler
+    if _scheduler is not None:
+        _scheduler.cancel()
+        try:
+            await _scheduler
+        except asyncio.CancelledError:
+            pass
+        _scheduler = None
+
+
+# ==================== POINT-IN-TIME QUERIES ====================
+def stock_as_of_query(at: datetime):
+    """Per-product stock at `at`: nearest snapshot, then only the transactions after it
+
+    Every lookup is an index range scan on (product_id, snapshot_date) or
+    (product_id, transaction_date), so the cost is O(delta) per product.
+    """
+    S, T = StockSnapshot, StockTransaction
+
+    base_date = (
+        select(func.max(S.snapshot_date))
+        .where(S.product_id == Product.id, S.snapshot_date <= at)
+        .correlate(Product)
+        .scalar_subquery()
+    )
+    base = select(
+        Product.id.label("product_id"),
+        Product.sku,
+        Product.name,
+        base_date.label("base_date")
+    ).subquery()
+
+    base_quantity = (
+        select(S.quantity)
+        .where(S.product_id == base.c.product_id, S.snapshot_date == base.c.base_date)
+        .order_by(S.id.desc())
+        .limit(1)
+        .scalar_subquery()
+    )
+    # Adjustments set an absolute quantity, so the latest one restarts the replay
+    last_adjustment = (
+        select(T.id)
+        .where(
+            T.product_id == base.c.product_id,
+            T.transaction_type == TransactionType.adjustment,
+            T.transaction_date > base.c.base_date,
+            T.transaction_date <= at
+        )
+        .order_by(T.transaction_date.desc(), T.id.desc())
+        .limit(1)
+        .scalar_subquery()
+    )
+    anchor = select(
+        base.c.product_id,
+        base.c.sku,
+        base.c.name,
+        base.c.base_date,
+        base_quantity.label("base_quantity"),
+        last_adjustment.label("adjustment_id")
+    ).where(base.c.base_date.is_not(None)).subquery()
+
+    adjustment = T.__table__.alias("adjustment")
+    since = func.coalesce(adjustment.c.transaction_date, anchor.c.base_date)
+    start_quantity = func.coalesce(adjustment.c.quantity, anchor.c.base_quantity)
+    delta = (
+        select(func.total(case(
+            (T.transaction_type == TransactionType.in_stock, T.quantity),
+            (T.transaction_type == TransactionType.out_stock, -T.quantity),
+            else_=0
+        )))
+        .where(T.product_id == anchor.c.product_id, T.transaction_date > since, T.transaction_date <= at)
+        .correlate(anchor, adjustment)
+        .scalar_subquery()
+    )
+
+    return (
+        select(
+            anchor.c.product_id,
+            anchor.c.sku,
+            anchor.c.name,
+            (start_quantity + delta).label("quantity"),
+            since.label("replayed_from")
+        )
+        .select_from(anchor.outerjoin(adjustment, adjustment.c.id == anchor.c.adjustment_id))
+    ), anchor
+
+
+async def product_stock_as_of(db: AsyncSession, product_id: int, at: datetime):
+    """Stock of one product at `at`, or None if it predates the first snapshot"""
+    query, anchor = stock_as_of_query(at)
+    result = await db.execute(query.where(anchor.c.product_id == product_id))
+    return result.one_or_none()
@@ -0,0 +1,273 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, insert, delete, func, literal
+from datetime import datetime, timedelta
+from itertools import groupby
+from pathlib import Path
+from typing import Iterator, List, Optional, Set
+import asyncio
+import gzip
+import json
+import logging
+import os
+import time
+
+from database import AsyncSessionLocal
+from models import StockArchiveFile, StockSnapshot, StockTransaction
+import leases
+import snapshots
+
+logger = logging.getLogger(__name__)
+
+# Retention settings (override through env vars); 0 days keeps every raw row
+ARCHIVE_AFTER_DAYS = int(os.getenv("STOCK_ARCHIVE_AFTER_DAYS", "365"))
+ARCHIVE_DIR = Path(os.getenv("STOCK_ARCHIVE_DIR", str(Path(__file__).parent / "instance" / "archive")))
+ARCHIVE_BATCH_ROWS = int(os.getenv("STOCK_ARCHIVE_BATCH_ROWS", "50000"))
+ARCHIVE_INTERVAL = float(os.getenv("STOCK_ARCHIVE_INTERVAL_HOURS", "24")) * 3600
+# Only one process archives at a time; a crashed run's lease lapses after this long
+ARCHIVE_LEASE_TTL = float(os.getenv("STOCK_ARCHIVE_LEASE_S", "600"))
+# Unregistered files younger than this may belong to a batch that is about to commit
+ARCHIVE_ORPHAN_GRACE = float(os.getenv("STOCK_ARCHIVE_ORPHAN_GRACE_S", "3600"))
+# Seconds shutdown waits for a run to finish its batch before cancelling it
+ARCHIVE_STOP_GRACE = float(os.getenv("STOCK_ARCHIVE_STOP_GRACE_S", "10"))
+ARCHIVE_LEASE = "stock_archive"
+
+ARCHIVED_COLUMNS = [
+    StockTransaction.id, StockTransaction.product_id, StockTransaction.transaction_type,
+    StockTransaction.quantity, StockTransaction.user_id, StockTransaction.notes,
+    StockTransaction.transaction_date
+]
+
+_scheduler: Optional[asyncio.Task] = None
+# The lease keeps other processes out; this keeps a second run in this one out
+_running = asyncio.Lock()
+_stopping = False
+
+
+def archive_cutoff(now: Optional[datetime] = None) -> datetime:
+    """Start of the oldest day kept in stock_transactions"""
+    now = now or datetime.utcnow()
+    return datetime.combine((now - timedelta(days=ARCHIVE_AFTER_DAYS)).date(), datetime.min.time())
+
+
+async def archived_before(db: AsyncSession) -> Optional[datetime]:
+    """Raw rows older than this live only in archive files (None if nothing is archived)"""
+    return await db.scalar(select(func.max(StockArchiveFile.archived_before)))
+
+
+# ==================== WRITING ARCHIVES ====================
+def _write_file(path: Path, rows: list) -> None:
+    """Write rows as gzipped NDJSON, visible under its final name only once complete"""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    partial = path.with_name(path.name + ".tmp")
+    with open(partial, "wb") as raw:
+        with gzip.GzipFile(fileobj=raw, mode="wb") as archive:
+            for row in rows:
+                archive.write((json.dumps({
+                    "id": row.id,
+                    "product_id": row.product_id,
+                    "transaction_type": row.transaction_type.value,
+                    "quantity": row.quantity,
+                    "user_id": row.user_id,
+                    "notes": row.notes,
+                    "transaction_date": row.transaction_date.isoformat()
+                }) + "\n").encode())
+        raw.flush()
+        os.fsync(raw.fileno())
+    os.replace(partial, path)
+
+
+def _remove_orphans(registered: Set[str]) -> int:
+    """Delete files left by a run that crashed before its rows were deleted
+
+    Files written within ARCHIVE_ORPHAN_GRACE are kept even when unregistered,
+    since their batch may still commit.
+    """
+    if not ARCHIVE_DIR.exists():
+        return 0
+    removed = 0
+    stale_before = time.time() - ARCHIVE_ORPHAN_GRACE
+    for path in ARCHIVE_DIR.rglob("stock_transactions-*"):
+        if path.relative_to(ARCHIVE_DIR).as_posix() in registered:
+            continue
+        try:
+            if path.stat().st_mtime < stale_before:
+                path.unlink()
+                removed += 1
+        except FileNotFoundError:
+            pass
+    return removed
+
+
+async def _snapshot_at(db: AsyncSession, at: datetime) -> None:
+    """Snapshot stock as of `at` so point-in-time queries after it no longer need older rows"""
+    query, anchor = snapshots.stock_as_of_query(at)
+    replayed = query.where(anchor.c.base_date < at).subquery()
+    await db.execute(
+        insert(StockSnapshot).from_select(
+            ["product_id", "snapshot_date", "quantity"],
+            select(replayed.c.product_id, literal(at), replayed.c.quantity)
+        )
+    )
+
+
+async def archive_transactions(cutoff: Optional[datetime] = None) -> Optional[dict]:
+    """Move raw stock transactions older than the cutoff into gzipped NDJSON files
+
+    Each batch is written to disk first and registered in stock_archive_files
+    in the same transaction that deletes its rows, so a crash can only leave
+    unregistered files behind, which a later run removes. Runs hold a lease,
+    so they never overlap across processes; returns None when another run
+    holds it.
+    """
+    if _running.locked() or _stopping:
+        return None
+    async with _running:
+        if not await leases.acquire(ARCHIVE_LEASE, ARCHIVE_LEASE_TTL):
+            return None
+        try:
+            return await _archive(cutoff or archive_cutoff())
+        finally:
+            await leases.release(ARCHIVE_LEASE)
+
+
+async def _archive(cutoff: datetime) -> dict:
+    # Registrations are read under the lease, after every earlier run has committed
+    async with AsyncSessionLocal() as db:
+        registered = set((await db.scalars(select(StockArchiveFile.path))).all())
+        oldest = await db.scalar(select(func.min(StockTransaction.transaction_date)))
+    orphans = await asyncio.to_thread(_remove_orphans, registered)
+    if orphans:
+        logger.warning(f"Removed {orphans} stock archive files from an interrupted run")
+    if oldest is None or oldest >= cutoff:
+        return {"archived": 0, "files": 0, "archived_before": None}
+
+    async with AsyncSessionLocal() as db:
+        await _snapshot_at(db, cutoff)
+        await db.commit()
+
+    archived = files = 0
+    while not _stopping:
+        if not await leases.acquire(ARCHIVE_LEASE, ARCHIVE_LEASE_TTL):
+            raise RuntimeError("Lost the stock archive lease to another process")
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(
+                select(*ARCHIVED_COLUMNS)
+                .where(StockTransaction.transaction_date < cutoff)
+                .order_by(StockTransaction.id)
+                .limit(ARCHIVE_BATCH_ROWS)
+            )
+            rows = result.all()
+            if not rows:
+                break
+
+            # One file per month per batch keeps date-range reads to the files that matter
+            month_of = lambda r: r.transaction_date.strftime("%Y-%m")
+            for month, month_rows in groupby(sorted(rows, key=month_of), key=month_of):
+                month_rows = list(month_rows)
+                path = f"{month}/stock_transactions-{month_rows[0].id:010d}-{month_rows[-1].id:010d}.ndjson.gz"
+                await asyncio.to_thread(_write_file, ARCHIVE_DIR / path, month_rows)
+                db.add(StockArchiveFile(
+                    path=path,
+                    first_id=month_rows[0].id,
+                    last_id=month_rows[-1].id,
+                    first_date=min(r.transaction_date for r in month_rows),
+                    last_date=max(r.transaction_date for r in month_rows),
+                    rows=len(month_rows),
+                    archived_before=cutoff
+                ))
+                files += 1
+
+            # Every row before the cutoff with an id up to the batch's last one was just written
+            await db.execute(
+                delete(StockTransaction)
+                .where(StockTransaction.transaction_date < cutoff, StockTransaction.id <= rows[-1].id)
+            )
+            await db.commit()
+            archived += len(rows)
+
+    return {"archived": archived, "files": files, "archived_before": cutoff.isoformat()}
+
+
+async def _archive_forever() -> None:
+    while not _stopping:
+        try:
+            summary = await archive_transactions()
+            if summary is None:
+                logger.info("Skipping stock transaction archival, another process is running it")
+            elif summary["archived"]:
+                logger.info(
+                    f"Archived {summary['archived']} stock transactions before "
+                    f"{summary['archived_before']} into {summary['files']} files"
+                )
+        except Exception as e:
+            logger.error(f"Stock transaction archival failed: {e}")
+        await asyncio.sleep(ARCHIVE_INTERVAL)
+
+
+def start_archiver() -> None:
+    global _scheduler, _stopping
+    if ARCHIVE_AFTER_DAYS <= 0:
+        return
+    _stopping = False
+    if _scheduler is None or _scheduler.done():
+        _scheduler = asyncio.create_task(_archive_forever())
+
+
+async def stop_archiver() -> None:
+    """Let a run in progress stop after its current batch, cancelling it after the grace period
+
+    Cancelling in the middle of a database call can leave its connection
+    broken, so the scheduler is cancelled once no run is in progress.
+    """
+    global _scheduler, _stopping
+    _stopping = True
+    if _scheduler is not None:
+        try:
+            await asyncio.wait_for(_running.acquire(), ARCHIVE_STOP_GRACE)
+            _running.release()
+        except asyncio.TimeoutError:
+            pass
+        _scheduler.cancel()
+        try:
+            await _scheduler
+        except asyncio.CancelledError:
+            pass
+        _scheduler = None
+
+
+# ==================== READING ARCHIVES ====================
+async def archive_paths(
+    db: AsyncSession,
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None
+) -> List[Path]:
+    """Archive files that may hold rows in [date_from, date_to), oldest first"""
+    query = select(StockArchiveFile.path).order_by(StockArchiveFile.first_id)
+    if date_from is not None:
+        query = query.where(StockArchiveFile.last_date >= date_from)
+    if date_to is not None:
+        query = query.where(StockArchiveFile.first_date < date_to)
+    return [ARCHIVE_DIR / path for path in (await db.scalars(query)).all()]
+
+
+def iter_archived(
+    paths: List[Path],
+    product_id: Optional[int] = None,
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None
+) -> Iterator[str]:
+    """NDJSON lines of archived rows matching the filters; runs in a worker thread"""
+    # ISO timestamps compare correctly as strings
+    low = date_from.isoformat() if date_from else None
+    high = date_to.isoformat() if date_to else None
+    for path in paths:
+        with gzip.open(path, "rt") as archive:
+            for line in archive:
+                record = json.loads(line)
+                if product_id is not None and record["product_id"] != product_id:
+                    continue
+                if low and record["transaction_date"] < low:
+                    continue
+                if high and record["transaction_date"] >= high:
+                    continue
+                yield line
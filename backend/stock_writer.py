@@ -0,0 +1,289 @@
+from fastapi import HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, update, insert, case
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Dict, List, Optional, Sequence, Tuple
+import asyncio
+import logging
+import os
+import random
+
+from database import AsyncSessionLocal
+from models import Product, StockTransaction, TransactionType
+from schemas import StockTransactionCreate
+import ai_cache
+import events
+import metrics
+
+logger = logging.getLogger(__name__)
+
+# Group-commit settings (override through env vars)
+GROUP_COMMIT_ENABLED = os.getenv("STOCK_GROUP_COMMIT", "true").lower() in ("1", "true", "yes")
+# How long the writer waits for more requests once one is queued; commits
+# already in flight batch the requests that arrive meanwhile regardless
+GROUP_COMMIT_WAIT = float(os.getenv("STOCK_GROUP_COMMIT_WAIT_MS", "2")) / 1000
+GROUP_COMMIT_MAX_BATCH = int(os.getenv("STOCK_GROUP_COMMIT_MAX_BATCH", "500"))
+# Attempts when quantities change between reading and writing them, with
+# jittered exponential backoff between them
+WRITE_ATTEMPTS = int(os.getenv("WRITE_ATTEMPTS", "5"))
+WRITE_BACKOFF = float(os.getenv("WRITE_BACKOFF_MS", "2")) / 1000
+
+batch_sizes = metrics.Histogram(
+    "stock_group_commit_batch_size", "Stock transactions merged into one commit",
+    (), (1, 2, 5, 10, 20, 50, 100, 200, 500)
+)
+
+Move = Tuple[StockTransactionCreate, int]
+
+
+class StockConflict(Exception):
+    """Quantities changed under the batch; it must be re-read and re-applied"""
+
+
+@dataclass
+class AppliedBatch:
+    transactions: List[Optional[StockTransaction]]
+    errors: Dict[int, HTTPException] = field(default_factory=dict)
+    stock_events: List[dict] = field(default_factory=list)
+
+
+async def backoff(attempt: int) -> None:
+    """Sleep before retry `attempt` of a compare-and-swap write"""
+    await asyncio.sleep(random.uniform(0, WRITE_BACKOFF * 2 ** attempt))
+
+
+# ==================== APPLYING TRANSACTIONS ====================
+async def apply_transactions(db: AsyncSession, moves: Sequence[Move]) -> AppliedBatch:
+    """Apply stock moves in order with one read, one UPDATE and one INSERT
+
+    Moves that name a missing product or take more stock than is left at
+    that point are skipped and reported in `errors` by index. Runs in the
+    caller's transaction; raises StockConflict when a concurrent writer
+    changed a quantity after it was read.
+    """
+    product_ids = {data.product_id for data, _ in moves}
+    result = await db.execute(
+        select(Product.id, Product.quantity).where(Product.id.in_(product_ids))
+    )
+    start = {row.id: row.quantity for row in result}
+
+    # Replay the moves in memory so each one sees the stock left by the ones before it
+    quantity = dict(start)
+    errors: Dict[int, HTTPException] = {}
+    accepted = []
+    for index, (data, user_id) in enumerate(moves):
+        current = quantity.get(data.product_id)
+        if current is None:
+            errors[index] = HTTPException(status_code=404, detail="Product not found")
+            continue
+        if data.transaction_type == TransactionType.in_stock:
+            quantity[data.product_id] = current + data.quantity
+        elif data.transaction_type == TransactionType.out_stock:
+            if current < data.quantity:
+                errors[index] = HTTPException(status_code=400, detail="Insufficient stock")
+                continue
+            quantity[data.product_id] = current - data.quantity
+        else:  # adjustment
+            quantity[data.product_id] = data.quantity
+        accepted.append(index)
+
+    transactions: List[Optional[StockTransaction]] = [None] * len(moves)
+    if not accepted:
+        return AppliedBatch(transactions, errors)
+
+    # Write every final quantity in one UPDATE, guarded on the quantities the replay started
+    # from: stock moves depend on nothing else, so edits to other fields never conflict
+    touched = {moves[i][0].product_id for i in accepted}
+    result = await db.execute(
+        update(Product)
+        .where(
+            Product.id.in_(touched),
+            Product.quantity == case({pid: start[pid] for pid in touched}, value=Product.id)
+        )
+        .values(
+            quantity=case({pid: quantity[pid] for pid in touched}, value=Product.id),
+            version=Product.version + 1,
+            updated_at=datetime.utcnow()
+        )
+        .returning(
+            Product.id, Product.sku, Product.name, Product.category,
+            Product.quantity, Product.reorder_level
+        )
+        .execution_options(synchronize_session=False)
+    )
+    updated = result.all()
+    if len(updated) != len(touched):
+        raise StockConflict()
+
+    result = await db.scalars(
+        insert(StockTransaction).returning(StockTransaction, sort_by_parameter_order=True),
+        [
+            {
+                "product_id": moves[i][0].product_id,
+                "transaction_type": moves[i][0].transaction_type,
+                "quantity": moves[i][0].quantity,
+                "user_id": moves[i][1],
+                "notes": moves[i][0].notes
+            } for i in accepted
+        ]
+    )
+    for index, transaction in zip(accepted, result.all()):
+        transactions[index] = transaction
+    await ai_cache.invalidate_forecasts(db, touched)
+
+    return AppliedBatch(
+        transactions,
+        errors,
+        [events.stock_event(row, start[row.id]) for row in updated if row.quantity != start[row.id]]
+    )
+
+
+async def apply_with_retry(db: AsyncSession, moves: Sequence[Move], atomic: bool = False) -> AppliedBatch:
+    """apply_transactions and commit, re-reading on conflicts
+
+    With atomic=True any failed move rolls the whole batch back and is raised.
+    """
+    for attempt in range(WRITE_ATTEMPTS):
+        if attempt:
+            await backoff(attempt)
+        try:
+            batch = await apply_transactions(db, moves)
+        except StockConflict:
+            await db.rollback()
+            continue
+        if atomic and batch.errors:
+            await db.rollback()
+            index, error = next(iter(batch.errors.items()))
+            if len(moves) == 1:
+                raise error
+            raise HTTPException(status_code=error.status_code, detail=f"Transaction {index}: {error.detail}")
+        await db.commit()
+        events.publish(batch.stock_events)
+        return batch
+    raise HTTPException(status_code=409, detail="Stock changed while recording the transactions, please retry")
+
+
+# ==================== GROUP COMMIT ====================
+# Stock writes queue here and are applied by one writer task. Concurrent
+# single-transaction requests are merged into one commit, so commits (and
+# fsyncs) stop scaling with the request rate; bulk requests get a commit of
+# their own. One writer also means stock writes never conflict with each other.
+@dataclass
+class _Job:
+    moves: List[Move]
+    atomic: bool
+    future: asyncio.Future
+
+
+_queue: Optional[asyncio.Queue] = None
+_writer: Optional[asyncio.Task] = None
+
+
+async def _collect_batch(queue: asyncio.Queue) -> List[_Job]:
+    batch = [await queue.get()]
+    deadline = asyncio.get_running_loop().time() + GROUP_COMMIT_WAIT
+    while len(batch) < GROUP_COMMIT_MAX_BATCH:
+        if not queue.empty():
+            batch.append(queue.get_nowait())
+            continue
+        remaining = deadline - asyncio.get_running_loop().time()
+        if remaining <= 0:
+            break
+        try:
+            batch.append(await asyncio.wait_for(queue.get(), remaining))
+        except asyncio.TimeoutError:
+            break
+    return batch
+
+
+async def _commit(jobs: List[_Job]) -> None:
+    """Apply either one atomic job or many single-move jobs in one transaction"""
+    if not jobs:
+        return
+    atomic = jobs[0].atomic
+    moves = [move for job in jobs for move in job.moves]
+    batch_sizes.observe((), len(moves))
+    try:
+        async with AsyncSessionLocal() as db:
+            applied = await apply_with_retry(db, moves, atomic=atomic)
+    except Exception as e:
+        if not isinstance(e, HTTPException):
+            logger.error(f"Group commit of {len(moves)} stock transactions failed: {e}")
+        for job in jobs:
+            if not job.future.done():
+                job.future.set_exception(e)
+        return
+
+    if atomic:
+        if not jobs[0].future.done():
+            jobs[0].future.set_result(applied.transactions)
+        return
+    for index, job in enumerate(jobs):
+        if job.future.done():
+            continue
+        if index in applied.errors:
+            job.future.set_exception(applied.errors[index])
+        else:
+            job.future.set_result([applied.transactions[index]])
+
+
+async def _write_forever(queue: asyncio.Queue) -> None:
+    while True:
+        # Requests whose clients went away are not applied
+        jobs = [job for job in await _collect_batch(queue) if not job.future.done()]
+        merged: List[_Job] = []
+        for job in jobs:
+            if job.atomic:
+                await _commit(merged)
+                merged = []
+                await _commit([job])
+            else:
+                merged.append(job)
+        await _commit(merged)
+
+
+def start_writer() -> None:
+    global _queue, _writer
+    if _writer is None or _writer.done():
+        _queue = asyncio.Queue()
+        _writer = asyncio.create_task(_write_forever(_queue))
+
+
+async def stop_writer() -> None:
+    global _writer
+    if _writer is not None:
+        _writer.cancel()
+        try:
+            await _writer
+        except asyncio.CancelledError:
+            pass
+        _writer = None
+    # Nothing will pick up requests still queued
+    while _queue is not None and not _queue.empty():
+        job = _queue.get_nowait()
+        if not job.future.done():
+            job.future.set_exception(HTTPException(status_code=503, detail="Server is shutting down"))
+
+
+async def _submit(moves: List[Move], atomic: bool) -> List[StockTransaction]:
+    if not GROUP_COMMIT_ENABLED:
+        async with AsyncSessionLocal() as db:
+            applied = await apply_with_retry(db, moves, atomic=True)
+        return applied.transactions
+
+    start_writer()
+    future = asyncio.get_running_loop().create_future()
+    await _queue.put(_Job(moves, atomic, future))
+    return await future
+
+
+async def record_transaction(data: StockTransactionCreate, user_id: int) -> StockTransaction:
+    """Record one stock transaction, sharing a commit with concurrent requests"""
+    transactions = await _submit([(data, user_id)], atomic=False)
+    return transactions[0]
+
+
+async def record_transactions(moves: List[Move]) -> List[StockTransaction]:
+    """Record stock transactions in order as one all-or-nothing commit"""
+    return await _submit(moves, atomic=True)
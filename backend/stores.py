@@ -0,0 +1,306 @@
+from fastapi import HTTPException, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, update, insert, case
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Sequence
+import asyncio
+import heapq
+import logging
+
+from database import ReadSessionLocal, shards
+from models import Product, Store, StoreStock, StoreStockTransaction, TransactionType
+from pagination import PageParams, NEXT_CURSOR_HEADER, decode_cursor, encode_cursor
+from schemas import StockTransactionCreate
+
+logger = logging.getLogger(__name__)
+
+# Stores are never deleted, so a store seen once needs no further catalog lookups
+_known_stores = set()
+
+
+# ==================== ROUTING ====================
+async def require_store(store_id: int) -> None:
+    """404 unless the catalog has the store; creates its shard on first use
+
+    The catalog lookup uses its own short session, so requests waiting on a
+    shard hold no catalog connection.
+    """
+    if store_id not in _known_stores:
+        async with ReadSessionLocal() as catalog:
+            if await catalog.get(Store, store_id) is None:
+                raise HTTPException(status_code=404, detail="Store not found")
+        await shards.ensure(store_id)
+        _known_stores.add(store_id)
+
+
+async def get_store_db(store_id: int):
+    """Session on the store's shard; 404 when the catalog has no such store"""
+    await require_store(store_id)
+    async with shards.session(store_id) as session:
+        yield session
+
+
+async def store_ids(catalog: AsyncSession) -> List[int]:
+    return list((await catalog.scalars(select(Store.id).order_by(Store.id))).all())
+
+
+async def product_lookup(catalog: AsyncSession, product_ids: Iterable[int]) -> Dict[int, object]:
+    """Catalog sku, name and reorder level by product id"""
+    ids = set(product_ids)
+    if not ids:
+        return {}
+    result = await catalog.execute(
+        select(Product.id, Product.sku, Product.name, Product.reorder_level).where(Product.id.in_(ids))
+    )
+    return {row.id: row for row in result}
+
+
+def with_catalog(rows: Iterable[dict], products: Dict[int, object]) -> List[dict]:
+    rows = list(rows)
+    for row in rows:
+        product = products.get(row["product_id"])
+        row["sku"] = product.sku if product else None
+        row["name"] = product.name if product else None
+    return rows
+
+
+# ==================== WRITES ====================
+@dataclass
+class _PendingMove:
+    data: StockTransactionCreate
+    user_id: int
+    future: asyncio.Future
+
+
+# Moves waiting for their store's next shard commit, and the task committing them, by store id
+_pending: Dict[int, List[_PendingMove]] = {}
+_writers: Dict[int, asyncio.Task] = {}
+
+
+async def _apply_moves(db: AsyncSession, moves: List[_PendingMove], products: Dict[int, object]) -> List[object]:
+    """Apply moves in order with one insert, read, UPDATE and INSERT; returns a transaction or error per move
+
+    Moves of products missing from the catalog get a 404.
+    """
+    now = datetime.utcnow()
+    outcomes: List[object] = [None] * len(moves)
+    levels = {}
+    for index, move in enumerate(moves):
+        product = products.get(move.data.product_id)
+        if product is None:
+            outcomes[index] = HTTPException(status_code=404, detail="Product not found")
+        else:
+            levels[move.data.product_id] = product.reorder_level
+    if not levels:
+        return outcomes
+
+    # The first move of a product at this store creates its stock row. Writing
+    # before reading takes the shard's write lock, so the quantities read below
+    # cannot change before this transaction commits.
+    await db.execute(
+        sqlite_insert(StoreStock).on_conflict_do_nothing(),
+        [
+            {"product_id": pid, "quantity": 0, "reorder_level": level, "updated_at": now}
+            for pid, level in levels.items()
+        ]
+    )
+    result = await db.execute(
+        select(StoreStock.product_id, StoreStock.quantity).where(StoreStock.product_id.in_(levels))
+    )
+    quantity = {row.product_id: row.quantity for row in result}
+
+    # Replay the moves in memory so each one sees the stock left by the ones before it
+    accepted = []
+    for index, move in enumerate(moves):
+        data = move.data
+        if outcomes[index] is not None:
+            continue
+        if data.transaction_type == TransactionType.in_stock:
+            quantity[data.product_id] += data.quantity
+        elif data.transaction_type == TransactionType.out_stock:
+            if quantity[data.product_id] < data.quantity:
+                outcomes[index] = HTTPException(status_code=400, detail="Insufficient stock")
+                continue
+            quantity[data.product_id] -= data.quantity
+        else:  # adjustment
+            quantity[data.product_id] = data.quantity
+        accepted.append(index)
+    if not accepted:
+        return outcomes
+
+    touched = {moves[i].data.product_id for i in accepted}
+    await db.execute(
+        update(StoreStock)
+        .where(StoreStock.product_id.in_(touched))
+        .values(
+            quantity=case({pid: quantity[pid] for pid in touched}, value=StoreStock.product_id),
+            version=StoreStock.version + 1,
+            updated_at=now
+        )
+        .execution_options(synchronize_session=False)
+    )
+    result = await db.scalars(
+        insert(StoreStockTransaction).returning(StoreStockTransaction, sort_by_parameter_order=True),
+        [
+            {
+                "product_id": moves[i].data.product_id,
+                "transaction_type": moves[i].data.transaction_type,
+                "quantity": moves[i].data.quantity,
+                "user_id": moves[i].user_id,
+                "notes": moves[i].data.notes,
+                "transaction_date": now
+            } for i in accepted
+        ]
+    )
+    for index, transaction in zip(accepted, result.all()):
+        outcomes[index] = transaction
+    return outcomes
+
+
+async def _commit(store_id: int, moves: List[_PendingMove]) -> None:
+    """Apply the moves in one shard transaction and resolve every one of their futures"""
+    outcomes: List[object] = []
+    try:
+        async with ReadSessionLocal() as catalog:
+            products = await product_lookup(catalog, (move.data.product_id for move in moves))
+        async with shards.session(store_id) as db:
+            applied = await _apply_moves(db, moves, products)
+            await db.commit()
+        outcomes = applied
+    except Exception as e:
+        if not isinstance(e, HTTPException):
+            logger.error(f"Commit of {len(moves)} stock moves at store {store_id} failed: {e}")
+        outcomes = [e] * len(moves)
+    finally:
+        # Also runs when the writer is cancelled mid-commit, so no request waits forever
+        for index, move in enumerate(moves):
+            if move.future.done():
+                continue
+            outcome = outcomes[index] if outcomes else HTTPException(
+                status_code=503, detail="Stock move was interrupted, please retry"
+            )
+            if isinstance(outcome, BaseException):
+                move.future.set_exception(outcome)
+            else:
+                move.future.set_result(outcome)
+
+
+async def _write_forever(store_id: int) -> None:
+    try:
+        while True:
+            # Taking the queue and retiring the writer happen without yielding in
+            # between, so a move queued after this always finds a running writer
+            moves = _pending.pop(store_id, [])
+            if not moves:
+                return
+            # Requests whose clients went away are not applied
+            moves = [move for move in moves if not move.future.done()]
+            if moves:
+                await _commit(store_id, moves)
+    finally:
+        _writers.pop(store_id, None)
+
+
+async def record_transaction(
+    store_id: int,
+    data: StockTransactionCreate,
+    user_id: int
+) -> StoreStockTransaction:
+    """Apply one stock move to the store's shard and log it
+
+    Moves queue per store and one writer task per store commits them, so
+    moves that arrive during a commit share the next one and only this
+    store's database is locked. A product's first move at a store copies its
+    catalog reorder level.
+    """
+    future = asyncio.get_running_loop().create_future()
+    _pending.setdefault(store_id, []).append(_PendingMove(data, user_id, future))
+    if store_id not in _writers:
+        _writers[store_id] = asyncio.create_task(_write_forever(store_id))
+    return await future
+
+
+async def stop_writers() -> None:
+    """Cancel the store writers; moves they or the queues still hold fail with 503"""
+    writers = list(_writers.values())
+    for writer in writers:
+        writer.cancel()
+    await asyncio.gather(*writers, return_exceptions=True)
+    for moves in _pending.values():
+        for move in moves:
+            if not move.future.done():
+                move.future.set_exception(HTTPException(status_code=503, detail="Server is shutting down"))
+    _pending.clear()
+
+
+# ==================== CROSS-STORE READS ====================
+async def stock_totals(
+    catalog: AsyncSession,
+    page: PageParams,
+    response: Response,
+    product_ids: Optional[Sequence[int]] = None
+) -> List[dict]:
+    """Stock per product summed over every store, one keyset page of product ids at a time
+
+    Each shard returns its first limit + 1 products past the cursor. Any product
+    among the first `limit` of the merged ids is in those lists of every shard
+    that stocks it, so its totals are complete.
+    """
+    keys = [StoreStock.product_id]
+    after = decode_cursor(page.cursor, keys)[0] if page.cursor else None
+
+    query = select(StoreStock.product_id, StoreStock.quantity)
+    if product_ids is not None:
+        query = query.where(StoreStock.product_id.in_(product_ids))
+    if after is not None:
+        query = query.where(StoreStock.product_id > after)
+    query = query.order_by(StoreStock.product_id).limit(page.limit + 1)
+
+    async def shard_rows(db: AsyncSession):
+        return (await db.execute(query)).all()
+
+    per_store = await shards.fan_out(await store_ids(catalog), shard_rows)
+
+    totals: Dict[int, dict] = {}
+    merged = heapq.merge(
+        *([(row.product_id, store_id, row.quantity) for row in rows] for store_id, rows in per_store.items())
+    )
+    for product_id, store_id, quantity in merged:
+        if product_id not in totals:
+            if len(totals) == page.limit:
+                response.headers[NEXT_CURSOR_HEADER] = encode_cursor([max(totals)])
+                break
+            totals[product_id] = {"product_id": product_id, "total_quantity": 0, "stores": []}
+        totals[product_id]["total_quantity"] += quantity
+        totals[product_id]["stores"].append({"store_id": store_id, "quantity": quantity})
+
+    return with_catalog(totals.values(), await product_lookup(catalog, totals))
+
+
+async def chain_low_stock(catalog: AsyncSession) -> List[dict]:
+    """Products at or below their reorder level in any store, largest shortfall first"""
+    stores = {row.id: row.code for row in await catalog.execute(select(Store.id, Store.code))}
+    query = (
+        select(StoreStock.product_id, StoreStock.quantity, StoreStock.reorder_level)
+        .where(StoreStock.quantity <= StoreStock.reorder_level)
+    )
+
+    async def shard_rows(db: AsyncSession):
+        return (await db.execute(query)).all()
+
+    per_store = await shards.fan_out(sorted(stores), shard_rows)
+    rows = [
+        {
+            "store_id": store_id,
+            "store_code": stores[store_id],
+            "product_id": row.product_id,
+            "quantity": row.quantity,
+            "reorder_level": row.reorder_level
+        }
+        for store_id, shard in per_store.items()
+        for row in shard
+    ]
+    rows.sort(key=lambda r: (r["quantity"] - r["reorder_level"], r["store_id"], r["product_id"]))
+    return with_catalog(rows, await product_lookup(catalog, (r["product_id"] for r in rows)))
@@ -20,6 +20,27 @@ export const api = axios.create({
   baseURL: API,
 });
 
+// Fetch every row of a paginated list by following X-Next-Cursor until it runs out
+export const fetchAll = async (path, params = {}) => {
+  const rows = [];
+  let cursor = null;
+  do {
+    const response = await api.get(path, { params: { ...params, limit: 500, cursor } });
+    rows.push(...response.data);
+    cursor = response.headers["x-next-cursor"] || null;
+  } while (cursor);
+  return rows;
+};
+
+// Send the session token with every request
+export const setAuthToken = (token) => {
+  if (token) {
+    api.defaults.headers.common.Authorization = `Bearer ${token}`;
+  } else {
+    delete api.defaults.headers.common.Authorization;
+  }
+};
+
 function App() {
   const [user, setUser] = useState(null);
   const [loading, setLoading] = useState(true);
@@ -28,17 +49,42 @@ function App() {
     // Check if user is logged in
     const storedUser = localStorage.getItem("user");
     if (storedUser) {
-      setUser(JSON.parse(storedUser));
+      const parsedUser = JSON.parse(storedUser);
+      // Logins saved before session tokens existed must sign in again
+      if (parsedUser.token) {
+        setAuthToken(parsedUser.token);
+        setUser(parsedUser);
+      } else {
+        localStorage.removeItem("user");
+      }
     }
+
+    // An expired or revoked session sends the user back to the login page
+    const interceptor = api.interceptors.response.use(
+      (response) => response,
+      (error) => {
+        if (error.response?.status === 401 && api.defaults.headers.common.Authorization) {
+          setAuthToken(null);
+          setUser(null);
+          localStorage.removeItem("user");
+        }
+        return Promise.reject(error);
+      }
+    );
     setLoading(false);
+
+    return () => api.interceptors.response.eject(interceptor);
   }, []);
 
   const handleLogin = (userData) => {
+    setAuthToken(userData.token);
     setUser(userData);
     localStorage.setItem("user", JSON.stringify(userData));
   };
 
   const handleLogout = () => {
+    api.post("/auth/logout").catch(() => {});
+    setAuthToken(null);
     setUser(null);
     localStorage.removeItem("user");
   };
@@ -5,7 +5,7 @@ import { Button } from "@/components/ui/button";
 import { Input } from "@/components/ui/input";
 import { Label } from "@/components/ui/label";
 import { Sparkles, TrendingUp, Lightbulb, Tag } from "lucide-react";
-import { api } from "../App";
+import { api, fetchAll } from "../App";
 import { toast } from "sonner";
 
 export default function AIFeatures({ user, onLogout }) {
@@ -31,8 +31,8 @@ export default function AIFeatures({ user, onLogout }) {
 
   const fetchProducts = async () => {
     try {
-      const response = await api.get("/products");
-      setProducts(response.data);
+      const rows = await fetchAll("/products");
+      setProducts(rows);
     } catch (error) {
       console.error("Failed to fetch products");
     }
@@ -47,6 +47,7 @@ export default function AIFeatures({ user, onLogout }) {
       const response = await api.post("/ai/forecast", {
         product_id: parseInt(forecastProductId),
         days: parseInt(forecastDays),
+        narrative: true,
       });
       setForecastResult(response.data);
       toast.success("Forecast generated!");
@@ -64,7 +65,11 @@ export default function AIFeatures({ user, onLogout }) {
     try {
       const response = await api.post("/ai/reorder-suggestions", {});
       setReorderSuggestions(response.data);
-      toast.success("Reorder suggestions generated!");
+      if (response.data.failed?.length) {
+        toast.warning(`No suggestion for ${response.data.failed.length} product(s), please retry`);
+      } else {
+        toast.success("Reorder suggestions generated!");
+      }
     } catch (error) {
       toast.error("Failed to generate suggestions");
     } finally {
@@ -164,8 +169,14 @@ export default function AIFeatures({ user, onLogout }) {
                 <div data-testid="forecast-result" className="mt-6 p-4 bg-slate-700/30 rounded-lg border border-slate-600">
                   <h4 className="text-white font-semibold mb-2">Forecast for {forecastResult.product_name}</h4>
                   <p className="text-sm text-slate-400 mb-2">Current Stock: {forecastResult.current_stock}</p>
+                  <div className="grid grid-cols-2 gap-2 text-sm mb-3">
+                    <p className="text-slate-400">Predicted Demand: <span className="text-white">{forecastResult.forecast.predicted_demand}</span></p>
+                    <p className="text-slate-400">Order Quantity: <span className="text-white">{forecastResult.forecast.order_quantity}</span></p>
+                    <p className="text-slate-400">Reorder Date: <span className="text-white">{forecastResult.forecast.reorder_date || "N/A"}</span></p>
+                    <p className="text-slate-400">Risk: <span className="text-white capitalize">{forecastResult.forecast.risk_level}</span></p>
+                  </div>
                   <div className="text-slate-300 text-sm whitespace-pre-wrap">
-                    {forecastResult.forecast}
+                    {forecastResult.forecast.analysis}
                   </div>
                 </div>
               )}
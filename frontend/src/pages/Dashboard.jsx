@@ -1,16 +1,35 @@
-import { useState, useEffect } from "react";
+import { useState, useEffect, useRef } from "react";
 import Layout from "../components/Layout";
 import { Card, CardContent, CardHeader, CardTitle } from "@/components/ui/card";
 import { Package, ShoppingCart, AlertTriangle, DollarSign, TrendingUp } from "lucide-react";
-import { api } from "../App";
+import { api, API } from "../App";
 import { toast } from "sonner";
 
 export default function Dashboard({ user, onLogout }) {
   const [stats, setStats] = useState(null);
   const [loading, setLoading] = useState(true);
 
+  const refreshTimer = useRef(null);
+
   useEffect(() => {
     fetchDashboardStats();
+
+    // Refresh on stock changes instead of polling; bursts collapse into one refetch
+    const source = new EventSource(`${API}/events/stock`);
+    const scheduleRefresh = () => {
+      if (refreshTimer.current) return;
+      refreshTimer.current = setTimeout(() => {
+        refreshTimer.current = null;
+        fetchDashboardStats();
+      }, 250);
+    };
+    source.addEventListener("stock", scheduleRefresh);
+    source.addEventListener("resync", scheduleRefresh);
+
+    return () => {
+      source.close();
+      clearTimeout(refreshTimer.current);
+    };
   }, []);
 
   const fetchDashboardStats = async () => {
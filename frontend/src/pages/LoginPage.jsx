@@ -26,7 +26,7 @@ export default function LoginPage({ onLogin }) {
     try {
       const response = await api.post("/auth/login", loginData);
       toast.success("Login successful!");
-      onLogin(response.data.user);
+      onLogin({ ...response.data.user, token: response.data.token });
     } catch (error) {
       toast.error(error.response?.data?.detail || "Login failed");
     } finally {
@@ -5,13 +5,14 @@ import { Button } from "@/components/ui/button";
 import { Dialog, DialogContent, DialogHeader, DialogTitle, DialogTrigger } from "@/components/ui/dialog";
 import { Select, SelectContent, SelectItem, SelectTrigger, SelectValue } from "@/components/ui/select";
 import { Plus, ShoppingCart, Package } from "lucide-react";
-import { api } from "../App";
+import { api, fetchAll } from "../App";
 import { toast } from "sonner";
 
 export default function Orders({ user, onLogout }) {
   const [orders, setOrders] = useState([]);
   const [products, setProducts] = useState([]);
   const [loading, setLoading] = useState(true);
+  const [nextCursor, setNextCursor] = useState(null);
   const [dialogOpen, setDialogOpen] = useState(false);
   const [orderItems, setOrderItems] = useState([{ product_id: "", quantity: "" }]);
   const [notes, setNotes] = useState("");
@@ -21,10 +22,11 @@ export default function Orders({ user, onLogout }) {
     fetchProducts();
   }, []);
 
-  const fetchOrders = async () => {
+  const fetchOrders = async (cursor = null) => {
     try {
-      const response = await api.get("/orders");
-      setOrders(response.data);
+      const response = await api.get("/orders", { params: { cursor } });
+      setOrders((prev) => (cursor ? [...prev, ...response.data] : response.data));
+      setNextCursor(response.headers["x-next-cursor"] || null);
     } catch (error) {
       toast.error("Failed to fetch orders");
     } finally {
@@ -34,8 +36,8 @@ export default function Orders({ user, onLogout }) {
 
   const fetchProducts = async () => {
     try {
-      const response = await api.get("/products");
-      setProducts(response.data);
+      const rows = await fetchAll("/products");
+      setProducts(rows);
     } catch (error) {
       console.error("Failed to fetch products");
     }
@@ -203,69 +205,83 @@ export default function Orders({ user, onLogout }) {
             ) : orders.length === 0 ? (
               <p className="text-slate-400 text-center py-8">No orders yet. Create your first order!</p>
             ) : (
-              <div className="overflow-x-auto">
-                <table data-testid="orders-table" className="w-full">
-                  <thead>
-                    <tr>
-                      <th>Order ID</th>
-                      <th>Date</th>
-                      <th>Items</th>
-                      <th>Total Amount</th>
-                      <th>Status</th>
-                      <th>Actions</th>
-                    </tr>
-                  </thead>
-                  <tbody>
-                    {orders.map((order) => (
-                      <tr key={order.id}>
-                        <td className="text-slate-300 font-mono">#{order.id}</td>
-                        <td className="text-slate-300">
-                          {new Date(order.order_date).toLocaleDateString()}
-                        </td>
-                        <td className="text-slate-300">{order.items?.length || 0} items</td>
-                        <td className="text-white font-semibold">₱{order.total_amount.toLocaleString()}</td>
-                        <td>
-                          <span
-                            className={`badge ${
-                              order.status === "completed"
-                                ? "badge-success"
-                                : order.status === "pending"
-                                ? "badge-warning"
-                                : order.status === "cancelled"
-                                ? "badge-danger"
-                                : "badge-info"
-                            }`}
-                          >
-                            {order.status}
-                          </span>
-                        </td>
-                        <td>
-                          {order.status !== "completed" && order.status !== "cancelled" && (
-                            <div className="flex gap-2">
-                              <Button
-                                size="sm"
-                                onClick={() => handleStatusUpdate(order.id, "completed")}
-                                className="bg-green-600 hover:bg-green-700 text-white"
-                                data-testid={`complete-order-${order.id}`}
-                              >
-                                Complete
-                              </Button>
-                              <Button
-                                size="sm"
-                                onClick={() => handleStatusUpdate(order.id, "cancelled")}
-                                className="bg-red-600 hover:bg-red-700 text-white"
-                                data-testid={`cancel-order-${order.id}`}
-                              >
-                                Cancel
-                              </Button>
-                            </div>
-                          )}
-                        </td>
+              <>
+                <div className="overflow-x-auto">
+                  <table data-testid="orders-table" className="w-full">
+                    <thead>
+                      <tr>
+                        <th>Order ID</th>
+                        <th>Date</th>
+                        <th>Items</th>
+                        <th>Total Amount</th>
+                        <th>Status</th>
+                        <th>Actions</th>
                       </tr>
-                    ))}
-                  </tbody>
-                </table>
-              </div>
+                    </thead>
+                    <tbody>
+                      {orders.map((order) => (
+                        <tr key={order.id}>
+                          <td className="text-slate-300 font-mono">#{order.id}</td>
+                          <td className="text-slate-300">
+                            {new Date(order.order_date).toLocaleDateString()}
+                          </td>
+                          <td className="text-slate-300">{order.items?.length || 0} items</td>
+                          <td className="text-white font-semibold">₱{order.total_amount.toLocaleString()}</td>
+                          <td>
+                            <span
+                              className={`badge ${
+                                order.status === "completed"
+                                  ? "badge-success"
+                                  : order.status === "pending"
+                                  ? "badge-warning"
+                                  : order.status === "cancelled"
+                                  ? "badge-danger"
+                                  : "badge-info"
+                              }`}
+                            >
+                              {order.status}
+                            </span>
+                          </td>
+                          <td>
+                            {order.status !== "completed" && order.status !== "cancelled" && (
+                              <div className="flex gap-2">
+                                <Button
+                                  size="sm"
+                                  onClick={() => handleStatusUpdate(order.id, "completed")}
+                                  className="bg-green-600 hover:bg-green-700 text-white"
+                                  data-testid={`complete-order-${order.id}`}
+                                >
+                                  Complete
+                                </Button>
+                                <Button
+                                  size="sm"
+                                  onClick={() => handleStatusUpdate(order.id, "cancelled")}
+                                  className="bg-red-600 hover:bg-red-700 text-white"
+                                  data-testid={`cancel-order-${order.id}`}
+                                >
+                                  Cancel
+                                </Button>
+                              </div>
+                            )}
+                          </td>
+                        </tr>
+                      ))}
+                    </tbody>
+                  </table>
+                </div>
+                {nextCursor && (
+                  <div className="flex justify-center pt-4">
+                    <Button
+                      variant="outline"
+                      data-testid="load-more-orders"
+                      onClick={() => fetchOrders(nextCursor)}
+                      className="border-slate-600 text-slate-300 hover:bg-slate-700"
+                    >
+                      Load more
+                    </Button>
+                  </div>
+                )}
+              </>
             )}
           </CardContent>
         </Card>
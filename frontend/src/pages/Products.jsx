@@ -1,18 +1,21 @@
-import { useState, useEffect } from "react";
+import { useState, useEffect, useRef } from "react";
 import Layout from "../components/Layout";
 import { Card, CardContent, CardHeader, CardTitle } from "@/components/ui/card";
 import { Button } from "@/components/ui/button";
 import { Input } from "@/components/ui/input";
 import { Label } from "@/components/ui/label";
 import { Dialog, DialogContent, DialogHeader, DialogTitle, DialogTrigger } from "@/components/ui/dialog";
-import { Plus, Edit, Trash2, AlertCircle, Package } from "lucide-react";
-import { api } from "../App";
+import { Plus, Edit, Trash2, AlertCircle, Package, Search } from "lucide-react";
+import { api, fetchAll } from "../App";
 import { toast } from "sonner";
 
 export default function Products({ user, onLogout }) {
   const [products, setProducts] = useState([]);
   const [suppliers, setSuppliers] = useState([]);
   const [loading, setLoading] = useState(true);
+  const [nextCursor, setNextCursor] = useState(null);
+  const [query, setQuery] = useState("");
+  const latestRequest = useRef(0);
   const [dialogOpen, setDialogOpen] = useState(false);
   const [editMode, setEditMode] = useState(false);
   const [currentProduct, setCurrentProduct] = useState(null);
@@ -29,14 +32,27 @@ export default function Products({ user, onLogout }) {
   });
 
   useEffect(() => {
-    fetchProducts();
     fetchSuppliers();
   }, []);
 
-  const fetchProducts = async () => {
+  // Debounce typeahead; an empty query lists the catalog immediately
+  useEffect(() => {
+    const timer = setTimeout(() => fetchProducts(), query ? 150 : 0);
+    return () => clearTimeout(timer);
+  }, [query]);
+
+  const fetchProducts = async (cursor = null) => {
+    const request = ++latestRequest.current;
+    const q = query.trim();
     try {
-      const response = await api.get("/products");
-      setProducts(response.data);
+      const response = q
+        ? await api.get("/products/search", { params: { q, cursor, facets: false } })
+        : await api.get("/products", { params: { cursor } });
+      // Drop responses to keystrokes that have since been superseded
+      if (request !== latestRequest.current) return;
+      const rows = q ? response.data.results.map((hit) => hit.product) : response.data;
+      setProducts((prev) => (cursor ? [...prev, ...rows] : rows));
+      setNextCursor(response.headers["x-next-cursor"] || null);
     } catch (error) {
       toast.error("Failed to fetch products");
     } finally {
@@ -46,8 +62,8 @@ export default function Products({ user, onLogout }) {
 
   const fetchSuppliers = async () => {
     try {
-      const response = await api.get("/suppliers");
-      setSuppliers(response.data);
+      const rows = await fetchAll("/suppliers");
+      setSuppliers(rows);
     } catch (error) {
       console.error("Failed to fetch suppliers");
     }
@@ -280,76 +296,102 @@ export default function Products({ user, onLogout }) {
 
         {/* Products Table */}
         <Card className="bg-slate-800/50 border-slate-700 backdrop-blur-lg">
-          <CardHeader>
+          <CardHeader className="flex flex-row items-center justify-between space-y-0">
             <CardTitle className="text-white flex items-center gap-2">
               <Package className="w-5 h-5 text-blue-400" />
-              All Products ({products.length})
+              {query ? "Search Results" : "All Products"} ({products.length})
             </CardTitle>
+            <div className="relative w-72">
+              <Search className="w-4 h-4 text-slate-400 absolute left-3 top-1/2 -translate-y-1/2" />
+              <Input
+                data-testid="product-search-input"
+                value={query}
+                onChange={(e) => setQuery(e.target.value)}
+                placeholder="Search name, SKU, category..."
+                className="pl-9 bg-slate-700/50 border-slate-600 text-white"
+              />
+            </div>
           </CardHeader>
           <CardContent>
             {loading ? (
               <p className="text-slate-400 text-center py-8">Loading products...</p>
             ) : products.length === 0 ? (
-              <p className="text-slate-400 text-center py-8">No products found. Add your first product!</p>
+              <p className="text-slate-400 text-center py-8">
+                {query ? "No products match your search." : "No products found. Add your first product!"}
+              </p>
             ) : (
-              <div className="overflow-x-auto">
-                <table data-testid="products-table" className="w-full">
-                  <thead>
-                    <tr>
-                      <th>SKU</th>
-                      <th>Name</th>
-                      <th>Category</th>
-                      <th>Price</th>
-                      <th>Stock</th>
-                      <th>Status</th>
-                      <th>Actions</th>
-                    </tr>
-                  </thead>
-                  <tbody>
-                    {products.map((product) => (
-                      <tr key={product.id}>
-                        <td className="text-slate-300 font-mono">{product.sku}</td>
-                        <td className="text-white font-medium">{product.name}</td>
-                        <td className="text-slate-300">{product.category || "N/A"}</td>
-                        <td className="text-slate-300">₱{product.price.toLocaleString()}</td>
-                        <td className="text-slate-300">{product.quantity}</td>
-                        <td>
-                          {product.quantity <= product.reorder_level ? (
-                            <span className="badge badge-danger flex items-center gap-1 w-fit">
-                              <AlertCircle className="w-3 h-3" />
-                              Low Stock
-                            </span>
-                          ) : (
-                            <span className="badge badge-success">In Stock</span>
-                          )}
-                        </td>
-                        <td>
-                          <div className="flex gap-2">
-                            <Button
-                              size="sm"
-                              variant="outline"
-                              data-testid={`edit-product-${product.id}`}
-                              onClick={() => handleEdit(product)}
-                              className="border-slate-600 text-slate-300 hover:bg-slate-700"
-                            >
-                              <Edit className="w-4 h-4" />
-                            </Button>
-                            <Button
-                              size="sm"
-                              variant="outline"
-                              data-testid={`delete-product-${product.id}`}
-                              onClick={() => handleDelete(product.id)}
-                              className="border-red-600 text-red-400 hover:bg-red-900/20"
-                            >
-                              <Trash2 className="w-4 h-4" />
-                            </Button>
-                          </div>
-                        </td>
+              <>
+                <div className="overflow-x-auto">
+                  <table data-testid="products-table" className="w-full">
+                    <thead>
+                      <tr>
+                        <th>SKU</th>
+                        <th>Name</th>
+                        <th>Category</th>
+                        <th>Price</th>
+                        <th>Stock</th>
+                        <th>Status</th>
+                        <th>Actions</th>
                       </tr>
-                    ))}
-                  </tbody>
-                </table>
-              </div>
+                    </thead>
+                    <tbody>
+                      {products.map((product) => (
+                        <tr key={product.id}>
+                          <td className="text-slate-300 font-mono">{product.sku}</td>
+                          <td className="text-white font-medium">{product.name}</td>
+                          <td className="text-slate-300">{product.category || "N/A"}</td>
+                          <td className="text-slate-300">₱{product.price.toLocaleString()}</td>
+                          <td className="text-slate-300">{product.quantity}</td>
+                          <td>
+                            {product.quantity <= product.reorder_level ? (
+                              <span className="badge badge-danger flex items-center gap-1 w-fit">
+                                <AlertCircle className="w-3 h-3" />
+                                Low Stock
+                              </span>
+                            ) : (
+                              <span className="badge badge-success">In Stock</span>
+                            )}
+                          </td>
+                          <td>
+                            <div className="flex gap-2">
+                              <Button
+                                size="sm"
+                                variant="outline"
+                                data-testid={`edit-product-${product.id}`}
+                                onClick={() => handleEdit(product)}
+                                className="border-slate-600 text-slate-300 hover:bg-slate-700"
+                              >
+                                <Edit className="w-4 h-4" />
+                              </Button>
+                              <Button
+                                size="sm"
+                                variant="outline"
+                                data-testid={`delete-product-${product.id}`}
+                                onClick={() => handleDelete(product.id)}
+                                className="border-red-600 text-red-400 hover:bg-red-900/20"
+                              >
+                                <Trash2 className="w-4 h-4" />
+                              </Button>
+                            </div>
+                          </td>
+                        </tr>
+                      ))}
+                    </tbody>
+                  </table>
+                </div>
+                {nextCursor && (
+                  <div className="flex justify-center pt-4">
+                    <Button
+                      variant="outline"
+                      data-testid="load-more-products"
+                      onClick={() => fetchProducts(nextCursor)}
+                      className="border-slate-600 text-slate-300 hover:bg-slate-700"
+                    >
+                      Load more
+                    </Button>
+                  </div>
+                )}
+              </>
             )}
           </CardContent>
         </Card>
@@ -6,13 +6,14 @@ import { Input } from "@/components/ui/input";
 import { Label } from "@/components/ui/label";
 import { Dialog, DialogContent, DialogHeader, DialogTitle, DialogTrigger } from "@/components/ui/dialog";
 import { Plus, ArrowLeftRight, ArrowUpCircle, ArrowDownCircle } from "lucide-react";
-import { api } from "../App";
+import { api, fetchAll } from "../App";
 import { toast } from "sonner";
 
 export default function StockTransactions({ user, onLogout }) {
   const [transactions, setTransactions] = useState([]);
   const [products, setProducts] = useState([]);
   const [loading, setLoading] = useState(true);
+  const [nextCursor, setNextCursor] = useState(null);
   const [dialogOpen, setDialogOpen] = useState(false);
   const [formData, setFormData] = useState({
     product_id: "",
@@ -26,10 +27,11 @@ export default function StockTransactions({ user, onLogout }) {
     fetchProducts();
   }, []);
 
-  const fetchTransactions = async () => {
+  const fetchTransactions = async (cursor = null) => {
     try {
-      const response = await api.get("/stock/transactions");
-      setTransactions(response.data);
+      const response = await api.get("/stock/transactions", { params: { cursor } });
+      setTransactions((prev) => (cursor ? [...prev, ...response.data] : response.data));
+      setNextCursor(response.headers["x-next-cursor"] || null);
     } catch (error) {
       toast.error("Failed to fetch transactions");
     } finally {
@@ -39,8 +41,8 @@ export default function StockTransactions({ user, onLogout }) {
 
   const fetchProducts = async () => {
     try {
-      const response = await api.get("/products");
-      setProducts(response.data);
+      const rows = await fetchAll("/products");
+      setProducts(rows);
     } catch (error) {
       console.error("Failed to fetch products");
     }
@@ -193,62 +195,76 @@ export default function StockTransactions({ user, onLogout }) {
             ) : transactions.length === 0 ? (
               <p className="text-slate-400 text-center py-8">No transactions yet. Record your first transaction!</p>
             ) : (
-              <div className="overflow-x-auto">
-                <table data-testid="transactions-table" className="w-full">
-                  <thead>
-                    <tr>
-                      <th>Date</th>
-                      <th>Product</th>
-                      <th>Type</th>
-                      <th>Quantity</th>
-                      <th>Notes</th>
-                    </tr>
-                  </thead>
-                  <tbody>
-                    {transactions.map((transaction) => {
-                      const isStockIn = transaction.transaction_type === "in";
-                      const isStockOut = transaction.transaction_type === "out";
-                      return (
-                        <tr key={transaction.id}>
-                          <td className="text-slate-300">
-                            {new Date(transaction.transaction_date).toLocaleString()}
-                          </td>
-                          <td className="text-white font-medium">
-                            {getProductName(transaction.product_id)}
-                          </td>
-                          <td>
-                            <div className="flex items-center gap-2">
-                              {isStockIn && (
-                                <>
-                                  <ArrowUpCircle className="w-4 h-4 text-green-400" />
-                                  <span className="badge badge-success">Stock In</span>
-                                </>
-                              )}
-                              {isStockOut && (
-                                <>
-                                  <ArrowDownCircle className="w-4 h-4 text-red-400" />
-                                  <span className="badge badge-danger">Stock Out</span>
-                                </>
-                              )}
-                              {!isStockIn && !isStockOut && (
-                                <span className="badge badge-warning">Adjustment</span>
-                              )}
-                            </div>
-                          </td>
-                          <td className="text-slate-300 font-semibold">
-                            {isStockIn && "+"}
-                            {isStockOut && "-"}
-                            {transaction.quantity}
-                          </td>
-                          <td className="text-slate-400 text-sm">
-                            {transaction.notes || "—"}
-                          </td>
-                        </tr>
-                      );
-                    })}
-                  </tbody>
-                </table>
-              </div>
+              <>
+                <div className="overflow-x-auto">
+                  <table data-testid="transactions-table" className="w-full">
+                    <thead>
+                      <tr>
+                        <th>Date</th>
+                        <th>Product</th>
+                        <th>Type</th>
+                        <th>Quantity</th>
+                        <th>Notes</th>
+                      </tr>
+                    </thead>
+                    <tbody>
+                      {transactions.map((transaction) => {
+                        const isStockIn = transaction.transaction_type === "in";
+                        const isStockOut = transaction.transaction_type === "out";
+                        return (
+                          <tr key={transaction.id}>
+                            <td className="text-slate-300">
+                              {new Date(transaction.transaction_date).toLocaleString()}
+                            </td>
+                            <td className="text-white font-medium">
+                              {getProductName(transaction.product_id)}
+                            </td>
+                            <td>
+                              <div className="flex items-center gap-2">
+                                {isStockIn && (
+                                  <>
+                                    <ArrowUpCircle className="w-4 h-4 text-green-400" />
+                                    <span className="badge badge-success">Stock In</span>
+                                  </>
+                                )}
+                                {isStockOut && (
+                                  <>
+                                    <ArrowDownCircle className="w-4 h-4 text-red-400" />
+                                    <span className="badge badge-danger">Stock Out</span>
+                                  </>
+                                )}
+                                {!isStockIn && !isStockOut && (
+                                  <span className="badge badge-warning">Adjustment</span>
+                                )}
+                              </div>
+                            </td>
+                            <td className="text-slate-300 font-semibold">
+                              {isStockIn && "+"}
+                              {isStockOut && "-"}
+                              {transaction.quantity}
+                            </td>
+                            <td className="text-slate-400 text-sm">
+                              {transaction.notes || "—"}
+                            </td>
+                          </tr>
+                        );
+                      })}
+                    </tbody>
+                  </table>
+                </div>
+                {nextCursor && (
+                  <div className="flex justify-center pt-4">
+                    <Button
+                      variant="outline"
+                      data-testid="load-more-transactions"
+                      onClick={() => fetchTransactions(nextCursor)}
+                      className="border-slate-600 text-slate-300 hover:bg-slate-700"
+                    >
+                      Load more
+                    </Button>
+                  </div>
+                )}
+              </>
             )}
           </CardContent>
         </Card>
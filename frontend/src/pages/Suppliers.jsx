@@ -12,6 +12,7 @@ import { toast } from "sonner";
 export default function Suppliers({ user, onLogout }) {
   const [suppliers, setSuppliers] = useState([]);
   const [loading, setLoading] = useState(true);
+  const [nextCursor, setNextCursor] = useState(null);
   const [dialogOpen, setDialogOpen] = useState(false);
   const [formData, setFormData] = useState({
     name: "",
@@ -25,10 +26,11 @@ export default function Suppliers({ user, onLogout }) {
     fetchSuppliers();
   }, []);
 
-  const fetchSuppliers = async () => {
+  const fetchSuppliers = async (cursor = null) => {
     try {
-      const response = await api.get("/suppliers");
-      setSuppliers(response.data);
+      const response = await api.get("/suppliers", { params: { cursor } });
+      setSuppliers((prev) => (cursor ? [...prev, ...response.data] : response.data));
+      setNextCursor(response.headers["x-next-cursor"] || null);
     } catch (error) {
       toast.error("Failed to fetch suppliers");
     } finally {
@@ -221,6 +223,19 @@ export default function Suppliers({ user, onLogout }) {
             ))
           )}
         </div>
+
+        {nextCursor && (
+          <div className="flex justify-center pt-4">
+            <Button
+              variant="outline"
+              data-testid="load-more-suppliers"
+              onClick={() => fetchSuppliers(nextCursor)}
+              className="border-slate-600 text-slate-300 hover:bg-slate-700"
+            >
+              Load more
+            </Button>
+          </div>
+        )}
       </div>
     </Layout>
   );
@@ -0,0 +1,8 @@
+"""In-process load and benchmark suite for the inventory API
+
+Run from the repository root:
+
+    python -m tests.benchmarks --scale small --out bench.json
+
+See `python -m tests.benchmarks --help` for sizes, concurrency and thresholds.
+"""
@@ -0,0 +1,196 @@
+"""Command-line entry point: seed, run every route and scenario, write a JSON report"""
+from datetime import datetime
+from pathlib import Path
+import argparse
+import asyncio
+import json
+import logging
+import os
+import platform
+import random
+import re
+import sqlite3
+import sys
+import tempfile
+import time
+
+from . import stub_llm
+from .seed import SCALES, BENCH_PASSWORD
+
+BACKEND_DIR = Path(__file__).resolve().parents[2] / "backend"
+DEFAULT_THRESHOLDS = Path(__file__).resolve().parent / "thresholds.json"
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(prog="python -m tests.benchmarks", description=__doc__)
+    parser.add_argument("--scale", choices=sorted(SCALES), default="small")
+    parser.add_argument("--db", help="SQLite file to use; seeded if empty (default: a fresh temp file)")
+    parser.add_argument("--reseed", action="store_true", help="Delete --db before seeding")
+    parser.add_argument("--seed", type=int, default=42, help="Seed for data generation and request mixes")
+    parser.add_argument("--requests", type=int, default=50, help="Timed requests per route")
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--routes", default="", help="Only benchmark routes matching this regex")
+    parser.add_argument("--scenarios", default="all", help="Comma-separated scenario names, 'all' or 'none'")
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds per scenario")
+    parser.add_argument("--llm-latency", type=float, default=0.05, help="Seconds the stub LLM takes to answer")
+    parser.add_argument("--out", help="Write the JSON report here (default: stdout)")
+    parser.add_argument("--thresholds", default=str(DEFAULT_THRESHOLDS))
+    parser.add_argument("--baseline", help="Previous JSON report to check regressions against")
+    parser.add_argument("--fail-on-threshold", action="store_true", help="Exit 1 when any threshold is violated")
+    return parser.parse_args(argv)
+
+
+def log(message: str) -> None:
+    print(message, file=sys.stderr, flush=True)
+
+
+async def table_counts(engine) -> dict:
+    counts = {}
+    async with engine.connect() as conn:
+        for table in ("users", "suppliers", "products", "orders", "order_items", "stock_transactions"):
+            counts[table] = (await conn.exec_driver_sql(f"SELECT count(*) FROM {table}")).scalar()
+    return counts
+
+
+async def run(args: argparse.Namespace) -> int:
+    # The backend reads its configuration at import time
+    import httpx
+    import server
+    from database import engine
+    from .seed import seed, is_seeded
+    from .routes import ROUTES, COVERED_BY_SCENARIO, BenchContext
+    from .driver import bench_route
+    from .scenarios import SCENARIOS
+    from .stats import check_thresholds
+
+    # Per-request access logs would swamp the report and slow the run
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    await server.startup_event()
+    try:
+        scale = SCALES[args.scale]
+        if await is_seeded(engine):
+            log("database already seeded, reusing it")
+            counts = await table_counts(engine)
+        else:
+            log(f"seeding '{args.scale}' dataset...")
+            counts = await seed(engine, scale, args.seed, log)
+
+        transport = httpx.ASGITransport(app=server.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+            response = await client.post("/api/auth/login", json={"username": "bench", "password": BENCH_PASSWORD})
+            response.raise_for_status()
+            client.headers["Authorization"] = f"Bearer {response.json()['token']}"
+
+            async with engine.connect() as conn:
+                stocked_ids = [row[0] for row in await conn.exec_driver_sql(
+                    "SELECT id FROM products WHERE quantity > 100"
+                )]
+            ctx = BenchContext(
+                client=client,
+                rnd=random.Random(args.seed),
+                counts=counts,
+                now=datetime.utcnow(),
+                history_days=scale.history_days,
+                stocked_ids=stocked_ids
+            )
+
+            route_filter = re.compile(args.routes) if args.routes else None
+            route_results = {}
+            for name, spec in ROUTES.items():
+                if route_filter and not route_filter.search(name):
+                    continue
+                route_results[name] = await bench_route(ctx, spec, args.requests, args.concurrency)
+                summary = route_results[name]
+                log(f"{name:45} p50 {summary['p50_ms']:9.2f}ms  p95 {summary['p95_ms']:9.2f}ms  "
+                    f"errors {summary['errors']}")
+
+            # Every API route needs a recipe or a scenario, so new endpoints cannot slip through unmeasured
+            unbenchmarked = sorted(
+                f"{method} {api_route.path}"
+                for api_route in server.app.routes
+                if api_route.path.startswith("/api")
+                for method in getattr(api_route, "methods", ()) or ()
+                if method != "HEAD"
+                and f"{method} {api_route.path}" not in ROUTES
+                and f"{method} {api_route.path}" not in COVERED_BY_SCENARIO
+            )
+            for name in unbenchmarked:
+                log(f"no benchmark for {name}")
+
+            if args.scenarios == "all":
+                scenario_names = list(SCENARIOS)
+            elif args.scenarios == "none":
+                scenario_names = []
+            else:
+                scenario_names = [name.strip() for name in args.scenarios.split(",") if name.strip()]
+            scenario_results = {}
+            for name in scenario_names:
+                if name not in SCENARIOS:
+                    log(f"unknown scenario '{name}', choose from: {', '.join(SCENARIOS)}")
+                    return 2
+                scenario_results[name] = await SCENARIOS[name](ctx, args.duration, args.concurrency)
+                summary = scenario_results[name]
+                log(f"scenario {name:36} {summary['throughput_rps']:8.1f} req/s  "
+                    f"p95 {summary['p95_ms']:9.2f}ms  errors {summary['errors']}")
+
+        report = {
+            "meta": {
+                "scale": args.scale,
+                "counts": counts,
+                "seed": args.seed,
+                "requests_per_route": args.requests,
+                "concurrency": args.concurrency,
+                "scenario_duration_s": args.duration,
+                "llm_latency_s": args.llm_latency,
+                "llm_calls": stub_llm.StubLlmChat.calls,
+                "startup": server.coldstart.report(),
+                "python": platform.python_version(),
+                "sqlite": sqlite3.sqlite_version,
+                "platform": platform.platform(),
+                "timestamp": datetime.utcnow().isoformat() + "Z"
+            },
+            "routes": route_results,
+            "scenarios": scenario_results,
+            "unbenchmarked": unbenchmarked
+        }
+        thresholds = json.loads(Path(args.thresholds).read_text()) if args.thresholds else {}
+        baseline = json.loads(Path(args.baseline).read_text()) if args.baseline else None
+        report["violations"] = check_thresholds(report, thresholds, baseline)
+        for violation in report["violations"]:
+            log(f"THRESHOLD {violation}")
+
+        output = json.dumps(report, indent=2)
+        if args.out:
+            Path(args.out).write_text(output + "\n")
+            log(f"report written to {args.out}")
+        else:
+            print(output)
+        return 1 if args.fail_on_threshold and report["violations"] else 0
+    finally:
+        await server.shutdown_event()
+        await engine.dispose()
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    if args.db:
+        db_path = Path(args.db).resolve()
+        if args.reseed and db_path.exists():
+            db_path.unlink()
+    else:
+        db_path = Path(tempfile.mkdtemp(prefix="puregold-bench-")) / "bench.db"
+    os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{db_path}"
+    log(f"database: {db_path}")
+
+    # Must happen before the server module is imported
+    sys.path.insert(0, str(BACKEND_DIR))
+    stub_llm.install(args.llm_latency)
+
+    started = time.perf_counter()
+    code = asyncio.run(run(args))
+    log(f"finished in {time.perf_counter() - started:.1f}s")
+    return code
+
+
+if __name__ == "__main__":
+    sys.exit(main())
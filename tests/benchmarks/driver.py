@@ -0,0 +1,65 @@
+"""Timed request execution and worker pools"""
+from typing import Awaitable, Callable, Iterable
+import asyncio
+import time
+
+from .routes import BenchContext, Request, RouteSpec
+from .stats import Recorder, summarize
+
+
+async def send(client, request: Request, recorder: Recorder, ok_statuses: Iterable[int] = (200,)):
+    started = time.perf_counter()
+    response = await client.request(
+        request.method, request.url,
+        params=request.params, json=request.json, files=request.files, headers=request.headers
+    )
+    recorder.record(time.perf_counter() - started, response.status_code, response.status_code in ok_statuses)
+    return response
+
+
+async def run_pool(concurrency: int, count: int, job: Callable[[], Awaitable[None]]) -> float:
+    """Run `count` jobs on `concurrency` workers; returns wall-clock seconds"""
+    remaining = count
+
+    async def worker():
+        nonlocal remaining
+        while remaining > 0:
+            remaining -= 1
+            await job()
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(max(1, min(concurrency, count)))))
+    return time.perf_counter() - started
+
+
+async def run_for(duration: float, workers: int, job: Callable[[], Awaitable[None]]) -> float:
+    """Run `job` back to back on `workers` workers for `duration` seconds"""
+    deadline = time.perf_counter() + duration
+
+    async def worker():
+        while time.perf_counter() < deadline:
+            await job()
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(workers)))
+    return time.perf_counter() - started
+
+
+async def bench_route(ctx: BenchContext, spec: RouteSpec, requests: int, concurrency: int) -> dict:
+    recorder = Recorder()
+
+    async def job():
+        request = await spec.build(ctx)
+        await send(ctx.client, request, recorder, spec.ok_statuses)
+
+    # One untimed warm-up request fills statement and page caches
+    await ctx.client.request(**_request_kwargs(await spec.build(ctx)))
+    wall = await run_pool(concurrency, spec.requests or requests, job)
+    return summarize(recorder, wall)
+
+
+def _request_kwargs(request: Request) -> dict:
+    return {
+        "method": request.method, "url": request.url, "params": request.params,
+        "json": request.json, "files": request.files, "headers": request.headers
+    }
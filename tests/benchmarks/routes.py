@@ -0,0 +1,482 @@
+"""One request recipe per /api route
+
+Each recipe builds a request from the benchmark context. Builders may do
+untimed setup calls of their own (e.g. create a product before timing its
+DELETE). Only the request they return is timed.
+"""
+from dataclasses import dataclass, field
+from datetime import timedelta
+from typing import Awaitable, Callable, Dict, Optional, Set
+import asyncio
+import io
+import random
+
+from .seed import BENCH_PASSWORD, CATEGORIES, WORDS
+
+
+@dataclass
+class Request:
+    method: str
+    url: str
+    params: Optional[dict] = None
+    json: Optional[dict] = None
+    files: Optional[dict] = None
+    headers: Optional[dict] = None
+
+
+@dataclass
+class BenchContext:
+    client: "object"
+    rnd: random.Random
+    counts: Dict[str, int]
+    now: "object"
+    history_days: int
+    # Products with plenty of stock, so orders and stock-outs succeed
+    stocked_ids: list = field(default_factory=list)
+    serial: int = 0
+    # A succeeded background job, submitted on first use
+    job_id: Optional[int] = None
+    # Store ids, created on first use
+    store_ids: list = field(default_factory=list)
+
+    def next_serial(self) -> int:
+        self.serial += 1
+        return self.serial
+
+    def product_id(self) -> int:
+        return self.rnd.randint(1, self.counts["products"])
+
+    def supplier_id(self) -> int:
+        return self.rnd.randint(1, self.counts["suppliers"])
+
+    def order_id(self) -> int:
+        return self.rnd.randint(1, self.counts["orders"])
+
+    def past(self):
+        return self.now - timedelta(days=self.rnd.uniform(0, self.history_days))
+
+
+Builder = Callable[[BenchContext], Awaitable[Request]]
+
+
+@dataclass
+class RouteSpec:
+    method: str
+    path: str
+    build: Builder
+    requests: Optional[int] = None      # overrides the per-route default for slow routes
+    ok_statuses: Set[int] = field(default_factory=lambda: {200})
+
+
+ROUTES: Dict[str, RouteSpec] = {}
+# Routes measured by a scenario instead of request/response timing
+COVERED_BY_SCENARIO = {"GET /api/events/stock": "stock_events"}
+
+
+def route(method: str, path: str, requests: Optional[int] = None, ok_statuses: Optional[Set[int]] = None):
+    def register(build: Builder) -> Builder:
+        ROUTES[f"{method} {path}"] = RouteSpec(method, path, build, requests, ok_statuses or {200})
+        return build
+    return register
+
+
+def product_payload(ctx: BenchContext) -> dict:
+    serial = ctx.next_serial()
+    cost = round(ctx.rnd.uniform(5, 500), 2)
+    return {
+        "name": " ".join(ctx.rnd.sample(WORDS, 3)).title(),
+        "sku": f"BENCH-{serial:08d}-{ctx.rnd.randint(0, 10**6)}",
+        "description": " ".join(ctx.rnd.choices(WORDS, k=8)),
+        "category": ctx.rnd.choice(CATEGORIES),
+        "price": round(cost * 1.3, 2),
+        "cost": cost,
+        "quantity": 100,
+        "reorder_level": 10,
+        "supplier_id": ctx.supplier_id()
+    }
+
+
+# ==================== AUTH ====================
+@route("POST", "/api/auth/register")
+async def register(ctx):
+    serial = ctx.next_serial()
+    tag = f"{serial}-{ctx.rnd.randint(0, 10**9)}"
+    return Request("POST", "/api/auth/register", json={
+        "username": f"reg{tag}", "email": f"reg{tag}@bench.example.com", "password": "x", "role": "staff"
+    })
+
+
+@route("POST", "/api/auth/login")
+async def login(ctx):
+    return Request("POST", "/api/auth/login", json={"username": "bench", "password": BENCH_PASSWORD})
+
+
+@route("POST", "/api/auth/logout")
+async def logout(ctx):
+    # Revoke a throwaway session, never the one the benchmark client uses
+    response = await ctx.client.post("/api/auth/login", json={"username": "bench", "password": BENCH_PASSWORD})
+    return Request("POST", "/api/auth/logout", headers={"Authorization": f"Bearer {response.json()['token']}"})
+
+
+@route("GET", "/api/auth/me")
+async def me(ctx):
+    return Request("GET", "/api/auth/me")
+
+
+@route("GET", "/api/auth/users")
+async def users(ctx):
+    return Request("GET", "/api/auth/users")
+
+
+# ==================== PRODUCTS ====================
+@route("POST", "/api/products")
+async def create_product(ctx):
+    return Request("POST", "/api/products", json=product_payload(ctx))
+
+
+@route("POST", "/api/products/import", requests=10)
+async def import_products(ctx):
+    lines = ["sku,name,category,price,cost,quantity,reorder_level"]
+    for _ in range(500):
+        # Half updates of existing SKUs, half new ones
+        if ctx.rnd.random() < 0.5:
+            sku = f"PG-{ctx.product_id():07d}"
+        else:
+            sku = f"IMPORT-{ctx.next_serial():08d}"
+        cost = round(ctx.rnd.uniform(5, 500), 2)
+        lines.append(f"{sku},{ctx.rnd.choice(WORDS).title()} Item,{ctx.rnd.choice(CATEGORIES)},"
+                     f"{round(cost * 1.3, 2)},{cost},{ctx.rnd.randint(50, 400)},20")
+    body = ("\n".join(lines) + "\n").encode()
+    return Request("POST", "/api/products/import", files={"file": ("bench.csv", io.BytesIO(body), "text/csv")})
+
+
+@route("GET", "/api/products/export", requests=3)
+async def export_products(ctx):
+    return Request("GET", "/api/products/export", params={"format": ctx.rnd.choice(["csv", "ndjson"])})
+
+
+@route("GET", "/api/products/search")
+async def search_products(ctx):
+    word = ctx.rnd.choice(WORDS)
+    q = word[:ctx.rnd.randint(2, len(word))]
+    if ctx.rnd.random() < 0.3:
+        q += " " + ctx.rnd.choice(WORDS)[:3]
+    return Request("GET", "/api/products/search", params={"q": q, "limit": 20, "facets": ctx.rnd.random() < 0.3})
+
+
+@route("GET", "/api/products")
+async def list_products(ctx):
+    params = {"limit": 50}
+    if ctx.rnd.random() < 0.3:
+        params["category"] = ctx.rnd.choice(CATEGORIES)
+    return Request("GET", "/api/products", params=params)
+
+
+@route("GET", "/api/products/{product_id}")
+async def get_product(ctx):
+    return Request("GET", f"/api/products/{ctx.product_id()}")
+
+
+@route("PUT", "/api/products/{product_id}")
+async def update_product(ctx):
+    return Request("PUT", f"/api/products/{ctx.product_id()}", json={"price": round(ctx.rnd.uniform(10, 900), 2)})
+
+
+@route("DELETE", "/api/products/{product_id}")
+async def delete_product(ctx):
+    response = await ctx.client.post("/api/products", json=product_payload(ctx))
+    return Request("DELETE", f"/api/products/{response.json()['id']}")
+
+
+@route("GET", "/api/products/low-stock/alerts", requests=20)
+async def low_stock_alerts(ctx):
+    return Request("GET", "/api/products/low-stock/alerts")
+
+
+# ==================== SUPPLIERS ====================
+@route("POST", "/api/suppliers")
+async def create_supplier(ctx):
+    return Request("POST", "/api/suppliers", json={"name": f"Bench Supplier {ctx.next_serial()}"})
+
+
+@route("GET", "/api/suppliers")
+async def list_suppliers(ctx):
+    return Request("GET", "/api/suppliers", params={"limit": 100})
+
+
+@route("GET", "/api/suppliers/{supplier_id}")
+async def get_supplier(ctx):
+    return Request("GET", f"/api/suppliers/{ctx.supplier_id()}")
+
+
+@route("DELETE", "/api/suppliers/{supplier_id}")
+async def delete_supplier(ctx):
+    response = await ctx.client.post("/api/suppliers", json={"name": f"Disposable {ctx.next_serial()}"})
+    return Request("DELETE", f"/api/suppliers/{response.json()['id']}")
+
+
+# ==================== ORDERS ====================
+def order_payload(ctx: BenchContext) -> dict:
+    ids = ctx.rnd.sample(ctx.stocked_ids, ctx.rnd.randint(1, 3))
+    return {"items": [{"product_id": i, "quantity": 1} for i in ids], "notes": "benchmark"}
+
+
+@route("POST", "/api/orders")
+async def create_order(ctx):
+    return Request("POST", "/api/orders", json=order_payload(ctx))
+
+
+@route("GET", "/api/orders")
+async def list_orders(ctx):
+    params = {"limit": 50}
+    if ctx.rnd.random() < 0.3:
+        params["status"] = ctx.rnd.choice(["pending", "processing", "completed"])
+    return Request("GET", "/api/orders", params=params)
+
+
+@route("GET", "/api/orders/{order_id}")
+async def get_order(ctx):
+    return Request("GET", f"/api/orders/{ctx.order_id()}")
+
+
+@route("PUT", "/api/orders/{order_id}/status")
+async def update_order_status(ctx):
+    return Request("PUT", f"/api/orders/{ctx.order_id()}/status", params={
+        "status": ctx.rnd.choice(["pending", "processing", "completed"])
+    })
+
+
+# ==================== STOCK ====================
+@route("POST", "/api/stock/transactions")
+async def create_stock_transaction(ctx):
+    return Request("POST", "/api/stock/transactions", json={
+        "product_id": ctx.product_id(), "transaction_type": "in", "quantity": ctx.rnd.randint(1, 50)
+    })
+
+
+@route("POST", "/api/stock/transactions/bulk")
+async def create_stock_transactions_bulk(ctx):
+    return Request("POST", "/api/stock/transactions/bulk", json={"transactions": [
+        {"product_id": ctx.product_id(), "transaction_type": "in", "quantity": ctx.rnd.randint(1, 50)}
+        for _ in range(50)
+    ]})
+
+
+@route("GET", "/api/stock/transactions")
+async def list_stock_transactions(ctx):
+    params = {"limit": 50}
+    if ctx.rnd.random() < 0.5:
+        params["product_id"] = ctx.product_id()
+    return Request("GET", "/api/stock/transactions", params=params)
+
+
+@route("GET", "/api/stock/transactions/archive", requests=10)
+async def list_archived_transactions(ctx):
+    return Request("GET", "/api/stock/transactions/archive", params={"product_id": ctx.product_id()})
+
+
+@route("POST", "/api/stock/archive", requests=3)
+async def archive_transactions(ctx):
+    return Request("POST", "/api/stock/archive")
+
+
+@route("GET", "/api/stock/rollups")
+async def list_stock_rollups(ctx):
+    params = {"limit": 100}
+    if ctx.rnd.random() < 0.5:
+        params["product_id"] = ctx.product_id()
+    return Request("GET", "/api/stock/rollups", params=params)
+
+
+@route("POST", "/api/stock/snapshots", requests=5)
+async def take_snapshot(ctx):
+    return Request("POST", "/api/stock/snapshots")
+
+
+@route("GET", "/api/stock/as-of")
+async def catalog_as_of(ctx):
+    return Request("GET", "/api/stock/as-of", params={"at": ctx.past().isoformat(), "limit": 50})
+
+
+@route("GET", "/api/stock/as-of/{product_id}")
+async def product_as_of(ctx):
+    return Request("GET", f"/api/stock/as-of/{ctx.product_id()}", params={"at": ctx.past().isoformat()})
+
+
+# ==================== AI & FORECASTS ====================
+@route("POST", "/api/ai/forecast")
+async def ai_forecast(ctx):
+    return Request("POST", "/api/ai/forecast", json={
+        "product_id": ctx.product_id(), "days": 30, "narrative": ctx.rnd.random() < 0.2
+    })
+
+
+@route("POST", "/api/ai/reorder-suggestions", requests=3)
+async def reorder_suggestions(ctx):
+    return Request("POST", "/api/ai/reorder-suggestions", json={})
+
+
+@route("POST", "/api/ai/categorize")
+async def categorize(ctx):
+    return Request("POST", "/api/ai/categorize", json={
+        "product_name": " ".join(ctx.rnd.sample(WORDS, 2)).title()
+    })
+
+
+@route("GET", "/api/forecasts", requests=3)
+async def catalog_forecast(ctx):
+    return Request("GET", "/api/forecasts", params={"days": 30, "risk_level": "high"})
+
+
+# ==================== ANALYTICS ====================
+@route("GET", "/api/analytics/velocity")
+async def sales_velocity(ctx):
+    return Request("GET", "/api/analytics/velocity", params={"days": 90})
+
+
+@route("GET", "/api/analytics/days-of-cover")
+async def days_of_cover(ctx):
+    return Request("GET", "/api/analytics/days-of-cover", params={"days": 90, "max_days": 30})
+
+
+@route("GET", "/api/analytics/abc")
+async def abc_classification(ctx):
+    return Request("GET", "/api/analytics/abc", params={"days": 365, "abc_class": "A"})
+
+
+@route("GET", "/api/analytics/turnover")
+async def inventory_turnover(ctx):
+    return Request("GET", "/api/analytics/turnover", params={"days": 365})
+
+
+@route("GET", "/api/analytics/dead-stock")
+async def dead_stock(ctx):
+    return Request("GET", "/api/analytics/dead-stock", params={"days": 90})
+
+
+@route("GET", "/api/analytics/revenue")
+async def revenue_breakdown(ctx):
+    return Request("GET", "/api/analytics/revenue", params={"days": 30})
+
+
+# ==================== STORES ====================
+BENCH_STORES = 4
+
+
+async def bench_stores(ctx) -> list:
+    """Ids of the benchmark stores, creating them (untimed) the first time"""
+    if not ctx.store_ids:
+        existing = {store["code"]: store["id"] for store in (await ctx.client.get("/api/stores")).json()}
+        for n in range(1, BENCH_STORES + 1):
+            code = f"BENCH-{n}"
+            if code not in existing:
+                existing[code] = (await ctx.client.post("/api/stores", json={"code": code, "name": f"Bench {n}"})).json()["id"]
+            ctx.store_ids.append(existing[code])
+    return ctx.store_ids
+
+
+@route("POST", "/api/stores")
+async def create_store(ctx):
+    serial = ctx.next_serial()
+    return Request("POST", "/api/stores", json={
+        "code": f"S{serial}-{ctx.rnd.randint(0, 10**6)}", "name": f"Branch {serial}"
+    })
+
+
+@route("GET", "/api/stores")
+async def list_stores(ctx):
+    return Request("GET", "/api/stores")
+
+
+@route("GET", "/api/stores/{store_id}")
+async def get_store(ctx):
+    return Request("GET", f"/api/stores/{ctx.rnd.choice(await bench_stores(ctx))}")
+
+
+@route("POST", "/api/stores/{store_id}/stock/transactions")
+async def create_store_stock_transaction(ctx):
+    return Request("POST", f"/api/stores/{ctx.rnd.choice(await bench_stores(ctx))}/stock/transactions", json={
+        "product_id": ctx.product_id(), "transaction_type": "in", "quantity": ctx.rnd.randint(1, 50)
+    })
+
+
+@route("GET", "/api/stores/{store_id}/stock")
+async def list_store_stock(ctx):
+    return Request("GET", f"/api/stores/{ctx.rnd.choice(await bench_stores(ctx))}/stock", params={"limit": 50})
+
+
+@route("GET", "/api/stores/{store_id}/stock/transactions")
+async def list_store_stock_transactions(ctx):
+    return Request("GET", f"/api/stores/{ctx.rnd.choice(await bench_stores(ctx))}/stock/transactions", params={"limit": 50})
+
+
+@route("GET", "/api/stores/stock/totals")
+async def store_stock_totals(ctx):
+    await bench_stores(ctx)
+    return Request("GET", "/api/stores/stock/totals", params={"limit": 100})
+
+
+@route("GET", "/api/stores/low-stock")
+async def chain_low_stock(ctx):
+    await bench_stores(ctx)
+    return Request("GET", "/api/stores/low-stock")
+
+
+# ==================== JOBS ====================
+async def finished_job(ctx) -> int:
+    """Id of a succeeded job, submitting one (untimed) and waiting for it the first time"""
+    if ctx.job_id is None:
+        response = await ctx.client.post("/api/jobs", json={"kind": "forecast", "params": {"risk_level": "high"}})
+        job_id = response.json()["id"]
+        while (await ctx.client.get(f"/api/jobs/{job_id}")).json()["status"] != "succeeded":
+            await asyncio.sleep(0.05)
+        ctx.job_id = job_id
+    return ctx.job_id
+
+
+@route("POST", "/api/jobs", requests=5, ok_statuses={202})
+async def submit_job(ctx):
+    return Request("POST", "/api/jobs", json={"kind": "reorder"})
+
+
+@route("GET", "/api/jobs")
+async def list_jobs(ctx):
+    return Request("GET", "/api/jobs", params={"limit": 50})
+
+
+@route("GET", "/api/jobs/{job_id}")
+async def get_job(ctx):
+    return Request("GET", f"/api/jobs/{await finished_job(ctx)}")
+
+
+@route("GET", "/api/jobs/{job_id}/result")
+async def job_result(ctx):
+    return Request("GET", f"/api/jobs/{await finished_job(ctx)}/result")
+
+
+@route("POST", "/api/jobs/{job_id}/cancel", ok_statuses={200, 409})
+async def cancel_job(ctx):
+    # 409 when a worker finished the job before the cancel arrived
+    response = await ctx.client.post("/api/jobs", json={"kind": "reorder"})
+    return Request("POST", f"/api/jobs/{response.json()['id']}/cancel")
+
+
+# ==================== DASHBOARD ====================
+@route("GET", "/api/dashboard/stats")
+async def dashboard_stats(ctx):
+    return Request("GET", "/api/dashboard/stats")
+
+
+@route("GET", "/api/metrics")
+async def get_metrics(ctx):
+    return Request("GET", "/api/metrics")
+
+
+@route("GET", "/api/startup")
+async def startup_report(ctx):
+    return Request("GET", "/api/startup")
+
+
+@route("GET", "/api/")
+async def root(ctx):
+    return Request("GET", "/api/")
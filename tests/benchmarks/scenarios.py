@@ -0,0 +1,160 @@
+"""Mixed read/write workloads that model how the app is actually used"""
+from typing import Awaitable, Callable, Dict
+import asyncio
+import time
+
+import events
+
+from . import routes
+from .driver import run_for, send
+from .routes import BenchContext, Request
+from .stats import Recorder, summarize
+
+Scenario = Callable[[BenchContext, float, int], Awaitable[dict]]
+SCENARIOS: Dict[str, Scenario] = {}
+
+
+def scenario(name: str):
+    def register(fn: Scenario) -> Scenario:
+        SCENARIOS[name] = fn
+        return fn
+    return register
+
+
+def report(recorders: Dict[str, Recorder], wall: float) -> dict:
+    """Overall summary across operations plus a per-operation breakdown"""
+    overall = Recorder()
+    for recorder in recorders.values():
+        overall.latencies += recorder.latencies
+        overall.errors += recorder.errors
+        for status, n in recorder.statuses.items():
+            overall.statuses[status] = overall.statuses.get(status, 0) + n
+    summary = summarize(overall, wall)
+    summary["operations"] = {name: summarize(r, wall) for name, r in recorders.items()}
+    return summary
+
+
+@scenario("checkout_burst")
+async def checkout_burst(ctx: BenchContext, duration: float, concurrency: int) -> dict:
+    """Many cashiers placing orders at once; every order contends for the writer"""
+    recorders = {"create_order": Recorder()}
+
+    async def job():
+        request = await routes.create_order(ctx)
+        await send(ctx.client, request, recorders["create_order"])
+
+    wall = await run_for(duration, concurrency * 4, job)
+    return report(recorders, wall)
+
+
+@scenario("scan_burst")
+async def scan_burst(ctx: BenchContext, duration: float, concurrency: int) -> dict:
+    """Receiving docks and POS scanners posting one stock transaction per scan"""
+    recorders = {"stock_transaction": Recorder()}
+
+    async def job():
+        request = await routes.create_stock_transaction(ctx)
+        await send(ctx.client, request, recorders["stock_transaction"])
+
+    wall = await run_for(duration, concurrency * 8, job)
+    return report(recorders, wall)
+
+
+@scenario("store_scan_burst")
+async def store_scan_burst(ctx: BenchContext, duration: float, concurrency: int) -> dict:
+    """scan_burst spread over several stores, each writing to its own shard"""
+    recorders = {"store_stock_transaction": Recorder()}
+    await routes.bench_stores(ctx)
+
+    async def job():
+        request = await routes.create_store_stock_transaction(ctx)
+        await send(ctx.client, request, recorders["store_stock_transaction"])
+
+    wall = await run_for(duration, concurrency * 8, job)
+    return report(recorders, wall)
+
+
+@scenario("dashboard_polling")
+async def dashboard_polling(ctx: BenchContext, duration: float, concurrency: int) -> dict:
+    """Dashboards polling stats and alerts while stock keeps moving underneath"""
+    recorders = {name: Recorder() for name in ("dashboard_stats", "low_stock_alerts", "stock_transaction")}
+    poll_interval = 0.05
+
+    async def poller():
+        await send(ctx.client, Request("GET", "/api/dashboard/stats"), recorders["dashboard_stats"])
+        await send(ctx.client, Request("GET", "/api/products/low-stock/alerts"), recorders["low_stock_alerts"])
+        await asyncio.sleep(poll_interval)
+
+    async def writer():
+        request = await routes.create_stock_transaction(ctx)
+        await send(ctx.client, request, recorders["stock_transaction"])
+
+    started = time.perf_counter()
+    await asyncio.gather(
+        run_for(duration, concurrency * 2, poller),
+        run_for(duration, max(1, concurrency // 2), writer)
+    )
+    return report(recorders, time.perf_counter() - started)
+
+
+@scenario("mixed_read_write")
+async def mixed_read_write(ctx: BenchContext, duration: float, concurrency: int) -> dict:
+    """Typical staff traffic: mostly browsing and search, some orders and stock moves"""
+    mix = [
+        ("list_products", routes.list_products, 25),
+        ("get_product", routes.get_product, 20),
+        ("search_products", routes.search_products, 20),
+        ("list_orders", routes.list_orders, 10),
+        ("dashboard_stats", routes.dashboard_stats, 5),
+        ("create_order", routes.create_order, 12),
+        ("create_stock_transaction", routes.create_stock_transaction, 8),
+    ]
+    names = [name for name, _, _ in mix]
+    builders = {name: build for name, build, _ in mix}
+    weights = [weight for _, _, weight in mix]
+    recorders = {name: Recorder() for name in names}
+
+    async def job():
+        name = ctx.rnd.choices(names, weights=weights)[0]
+        await send(ctx.client, await builders[name](ctx), recorders[name])
+
+    wall = await run_for(duration, concurrency * 2, job)
+    return report(recorders, wall)
+
+
+@scenario("stock_events")
+async def stock_events(ctx: BenchContext, duration: float, concurrency: int) -> dict:
+    """Write-to-delivery latency of stock events to SSE subscribers during a write load
+
+    Delivery is timed from the start of the write request. The httpx ASGI
+    transport buffers whole responses, so subscribers read the same
+    generator GET /api/events/stock streams from.
+    """
+    recorders = {"stock_transaction": Recorder(), "event_delivery": Recorder()}
+    sent_at: Dict[int, float] = {}
+    subscriber_count = concurrency * 4
+
+    async def subscriber():
+        async for chunk in events.stream(events.Subscriber()):
+            if not chunk.startswith("event: stock"):
+                continue
+            received = time.perf_counter()
+            product_id = int(chunk.split('"product_id": ', 1)[1].split(",", 1)[0])
+            if product_id in sent_at:
+                recorders["event_delivery"].record(received - sent_at[product_id], 200, True)
+
+    async def writer():
+        request = await routes.create_stock_transaction(ctx)
+        sent_at[request.json["product_id"]] = time.perf_counter()
+        await send(ctx.client, request, recorders["stock_transaction"])
+
+    listeners = [asyncio.create_task(subscriber()) for _ in range(subscriber_count)]
+    await asyncio.sleep(0)
+    wall = await run_for(duration, concurrency, writer)
+    await asyncio.sleep(0.05)
+    for listener in listeners:
+        listener.cancel()
+    await asyncio.gather(*listeners, return_exceptions=True)
+    summary = report(recorders, wall)
+    summary["subscribers"] = subscriber_count
+    return summary
@@ -0,0 +1,199 @@
+"""Deterministic synthetic data for benchmarks
+
+Rows are generated day by day across the history window so ids grow with
+dates, as they do in production. The same seed and scale always produce
+the same database.
+"""
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncEngine
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from itertools import accumulate
+from typing import Callable, Dict, List
+import random
+import time
+
+
+@dataclass(frozen=True)
+class Scale:
+    products: int
+    suppliers: int
+    orders: int
+    stock_transactions: int
+    users: int = 20
+    history_days: int = 180
+
+
+SCALES: Dict[str, Scale] = {
+    "tiny": Scale(products=1_000, suppliers=20, orders=2_000, stock_transactions=20_000, history_days=30),
+    "small": Scale(products=10_000, suppliers=100, orders=20_000, stock_transactions=200_000),
+    "full": Scale(products=100_000, suppliers=1_000, orders=200_000, stock_transactions=2_000_000),
+}
+
+BENCH_PASSWORD = "bench-password"
+CATEGORIES = [
+    "Beverages", "Snacks", "Canned Goods", "Dairy", "Frozen", "Bakery", "Produce",
+    "Household", "Personal Care", "Baby Care", "Pet Supplies", "Electronics"
+]
+WORDS = [
+    "classic", "premium", "family", "value", "fresh", "organic", "crispy", "creamy", "spicy",
+    "sweet", "original", "light", "extra", "mini", "jumbo", "instant", "natural", "golden",
+    "coffee", "tea", "juice", "soda", "water", "milk", "cheese", "butter", "bread", "rice",
+    "noodles", "sardines", "tuna", "corned", "beef", "chicken", "pork", "soap", "shampoo",
+    "detergent", "tissue", "diapers", "biscuits", "chips", "chocolate", "candy", "sugar",
+    "salt", "vinegar", "soy", "sauce", "ketchup", "mayonnaise", "oil", "flour", "oats",
+    "cereal", "yogurt", "ice", "cream", "battery", "charger", "cable", "bulb", "towel"
+]
+SIZES = ["100g", "250g", "500g", "1kg", "330ml", "500ml", "1L", "1.5L", "2L", "6-pack", "12-pack"]
+BATCH_ROWS = 10_000
+
+
+async def _insert(conn, model, rows: List[dict]) -> None:
+    for start in range(0, len(rows), BATCH_ROWS):
+        await conn.execute(insert(model), rows[start:start + BATCH_ROWS])
+
+
+async def is_seeded(engine: AsyncEngine) -> bool:
+    async with engine.connect() as conn:
+        return bool((await conn.exec_driver_sql("SELECT count(*) FROM products")).scalar())
+
+
+async def seed(
+    engine: AsyncEngine,
+    scale: Scale,
+    seed: int = 42,
+    log: Callable[[str], None] = print
+) -> Dict[str, int]:
+    """Fill an empty, migrated database; returns row counts per table"""
+    # Imported late: the backend binds its engine to DATABASE_URL on import
+    from models import (
+        User, UserRole, Supplier, Product, Order, OrderItem, OrderStatus,
+        StockTransaction, StockSnapshot, TransactionType
+    )
+
+    rnd = random.Random(seed)
+    now = datetime.utcnow().replace(microsecond=0)
+    start = now - timedelta(days=scale.history_days)
+    started = time.perf_counter()
+
+    users = [
+        {
+            "id": i + 1,
+            "username": "bench" if i == 0 else f"user{i}",
+            "email": f"user{i}@bench.example.com",
+            "password": BENCH_PASSWORD,
+            "role": UserRole.admin if i == 0 else rnd.choice([UserRole.manager, UserRole.staff]),
+            "created_at": start
+        } for i in range(scale.users)
+    ]
+    suppliers = [
+        {
+            "id": i + 1,
+            "name": f"{rnd.choice(WORDS).title()} {rnd.choice(['Trading', 'Foods', 'Distributors', 'Corp'])} {i + 1}",
+            "contact_person": f"Contact {i + 1}",
+            "email": f"supplier{i + 1}@bench.example.com",
+            "phone": f"+63 2 {rnd.randint(1000000, 9999999)}",
+            "address": f"{rnd.randint(1, 999)} Benchmark St.",
+            "created_at": start
+        } for i in range(scale.suppliers)
+    ]
+    products = []
+    for i in range(scale.products):
+        cost = round(rnd.uniform(5, 900), 2)
+        products.append({
+            "id": i + 1,
+            "name": " ".join(rnd.sample(WORDS, 3)).title() + " " + rnd.choice(SIZES),
+            "sku": f"PG-{i + 1:07d}",
+            "description": " ".join(rnd.choices(WORDS, k=12)),
+            "category": rnd.choice(CATEGORIES),
+            "price": round(cost * rnd.uniform(1.1, 1.6), 2),
+            "cost": cost,
+            "quantity": rnd.randint(0, 400),
+            "reorder_level": rnd.randint(10, 50),
+            "supplier_id": rnd.randint(1, scale.suppliers),
+            "created_at": start,
+            "updated_at": now
+        })
+
+    async with engine.begin() as conn:
+        await _insert(conn, User, users)
+        await _insert(conn, Supplier, suppliers)
+        await _insert(conn, Product, products)
+        # One baseline snapshot per product so point-in-time queries have a base
+        await _insert(conn, StockSnapshot, [
+            {"product_id": p["id"], "snapshot_date": start, "quantity": p["quantity"]} for p in products
+        ])
+    log(f"seeded {len(users)} users, {len(suppliers)} suppliers, {len(products)} products")
+
+    # Skewed popularity: a few products sell far more than the rest
+    popularity = list(accumulate(1.0 / (rank + 1) ** 0.8 for rank in range(scale.products)))
+    prices = [p["price"] for p in products]
+    statuses = [OrderStatus.completed] * 7 + [OrderStatus.processing, OrderStatus.pending, OrderStatus.cancelled]
+
+    order_id = item_id = 0
+    transactions = 0
+    for day in range(scale.history_days):
+        day_start = start + timedelta(days=day)
+        orders_today = scale.orders * (day + 1) // scale.history_days - scale.orders * day // scale.history_days
+        tx_target = (
+            scale.stock_transactions * (day + 1) // scale.history_days
+            - scale.stock_transactions * day // scale.history_days
+        )
+
+        orders, items, moves = [], [], []
+        for moment in sorted(rnd.random() * 86400 for _ in range(orders_today)):
+            order_id += 1
+            at = day_start + timedelta(seconds=moment)
+            user_id = rnd.randint(1, scale.users)
+            total = 0.0
+            for product_index in set(rnd.choices(range(scale.products), cum_weights=popularity, k=rnd.randint(1, 4))):
+                item_id += 1
+                quantity = rnd.randint(1, 6)
+                total += prices[product_index] * quantity
+                items.append({
+                    "id": item_id, "order_id": order_id, "product_id": product_index + 1,
+                    "quantity": quantity, "price": prices[product_index]
+                })
+                moves.append({
+                    "product_id": product_index + 1, "transaction_type": TransactionType.out_stock,
+                    "quantity": quantity, "user_id": user_id,
+                    "notes": f"Order #{order_id} created", "transaction_date": at
+                })
+            orders.append({
+                "id": order_id, "order_date": at, "status": rnd.choice(statuses),
+                "total_amount": round(total, 2), "created_by": user_id,
+                "notes": None, "created_at": at, "updated_at": at
+            })
+
+        # Restocks, manual pulls and cycle counts make up the rest of the day's volume
+        for _ in range(max(0, tx_target - len(moves))):
+            kind = rnd.choices(
+                [TransactionType.in_stock, TransactionType.out_stock, TransactionType.adjustment],
+                weights=[6, 3, 1]
+            )[0]
+            moves.append({
+                "product_id": rnd.randint(1, scale.products), "transaction_type": kind,
+                "quantity": rnd.randint(1, 200), "user_id": rnd.randint(1, scale.users),
+                "notes": None, "transaction_date": day_start + timedelta(seconds=rnd.random() * 86400)
+            })
+        moves.sort(key=lambda m: m["transaction_date"])
+        transactions += len(moves)
+
+        async with engine.begin() as conn:
+            await _insert(conn, Order, orders)
+            await _insert(conn, OrderItem, items)
+            await _insert(conn, StockTransaction, moves)
+        if (day + 1) % 30 == 0 or day + 1 == scale.history_days:
+            log(f"  day {day + 1}/{scale.history_days}: {order_id} orders, {transactions} transactions")
+
+    async with engine.begin() as conn:
+        await conn.exec_driver_sql("ANALYZE")
+    log(f"seeding took {time.perf_counter() - started:.1f}s")
+    return {
+        "users": len(users),
+        "suppliers": len(suppliers),
+        "products": len(products),
+        "orders": order_id,
+        "order_items": item_id,
+        "stock_transactions": transactions
+    }
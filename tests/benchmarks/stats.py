@@ -0,0 +1,97 @@
+"""Latency recording, percentile summaries and threshold checks"""
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+import math
+
+
+@dataclass
+class Recorder:
+    """Latencies (seconds) and failures for one route or scenario step"""
+    latencies: List[float] = field(default_factory=list)
+    errors: int = 0
+    statuses: Dict[int, int] = field(default_factory=dict)
+
+    def record(self, seconds: float, status: int, ok: bool) -> None:
+        self.latencies.append(seconds)
+        self.statuses[status] = self.statuses.get(status, 0) + 1
+        if not ok:
+            self.errors += 1
+
+
+def percentile(sorted_values: List[float], q: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(q / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+def summarize(recorder: Recorder, wall_seconds: float) -> dict:
+    values = sorted(recorder.latencies)
+    count = len(values)
+    ms = lambda seconds: round(seconds * 1000, 3)
+    return {
+        "requests": count,
+        "errors": recorder.errors,
+        "error_rate": round(recorder.errors / count, 4) if count else 0.0,
+        "statuses": {str(k): v for k, v in sorted(recorder.statuses.items())},
+        "throughput_rps": round(count / wall_seconds, 2) if wall_seconds > 0 else 0.0,
+        "mean_ms": ms(sum(values) / count) if count else 0.0,
+        "p50_ms": ms(percentile(values, 50)),
+        "p95_ms": ms(percentile(values, 95)),
+        "p99_ms": ms(percentile(values, 99)),
+        "max_ms": ms(values[-1]) if values else 0.0
+    }
+
+
+# ==================== THRESHOLDS ====================
+LIMIT_KEYS = ("p50_ms", "p95_ms", "p99_ms", "max_ms", "error_rate")
+
+
+def _limits_for(name: str, section: dict, defaults: dict) -> dict:
+    limits = dict(defaults)
+    limits.update(section.get(name, {}))
+    return limits
+
+
+def check_thresholds(results: dict, thresholds: dict, baseline: Optional[dict] = None) -> List[str]:
+    """Violations of absolute limits and, with a baseline run, of allowed regressions
+
+    thresholds = {
+        "defaults": {"p95_ms": 250, "error_rate": 0},
+        "routes": {"GET /api/forecasts": {"p95_ms": 5000}},
+        "scenarios": {"checkout_burst": {"p99_ms": 500, "min_throughput_rps": 50}},
+        "max_regression": 0.25   # vs baseline, fraction of the baseline value
+    }
+    """
+    violations = []
+    defaults = thresholds.get("defaults", {})
+    max_regression = thresholds.get("max_regression")
+    min_baseline_ms = thresholds.get("regression_floor_ms", 5.0)
+
+    for section in ("routes", "scenarios"):
+        for name, summary in results.get(section, {}).items():
+            limits = _limits_for(name, thresholds.get(section, {}), defaults)
+            for key in LIMIT_KEYS:
+                if key in limits and summary.get(key, 0) > limits[key]:
+                    violations.append(f"{section[:-1]} {name}: {key} {summary[key]} > {limits[key]}")
+            if "min_throughput_rps" in limits and summary["throughput_rps"] < limits["min_throughput_rps"]:
+                violations.append(
+                    f"{section[:-1]} {name}: throughput_rps {summary['throughput_rps']} "
+                    f"< {limits['min_throughput_rps']}"
+                )
+
+            previous = (baseline or {}).get(section, {}).get(name)
+            if max_regression is None or previous is None:
+                continue
+            for key in ("p50_ms", "p95_ms", "p99_ms"):
+                # Ignore noise on routes that are fast in both runs
+                if max(previous[key], summary[key]) < min_baseline_ms:
+                    continue
+                allowed = previous[key] * (1 + max_regression)
+                if summary[key] > allowed:
+                    violations.append(
+                        f"{section[:-1]} {name}: {key} {summary[key]} regressed more than "
+                        f"{max_regression:.0%} over baseline {previous[key]}"
+                    )
+    return violations
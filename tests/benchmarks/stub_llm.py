@@ -0,0 +1,56 @@
+"""Stand-in for emergentintegrations' LlmChat so benchmarks never reach a real model"""
+import asyncio
+import json
+import re
+import sys
+import types
+
+PRODUCT_ID = re.compile(r'"product_id": (\d+)')
+
+
+class UserMessage:
+    def __init__(self, text: str):
+        self.text = text
+
+
+class StubLlmChat:
+    """Answers after a fixed delay with payloads shaped like the prompts ask for"""
+    latency = 0.05
+    calls = 0
+
+    def __init__(self, api_key=None, session_id=None, system_message=None):
+        pass
+
+    def with_model(self, provider, model):
+        return self
+
+    async def send_message(self, message: UserMessage) -> str:
+        StubLlmChat.calls += 1
+        await asyncio.sleep(StubLlmChat.latency)
+        if "JSON array" in message.text:
+            ids = PRODUCT_ID.findall(message.text)
+            if "category" in message.text:
+                return json.dumps([{"product_id": int(i), "category": "Other"} for i in ids])
+            return json.dumps([{"product_id": int(i), "suggested_quantity": 50} for i in ids])
+        return json.dumps({
+            "category": "Other",
+            "enhanced_description": "Benchmark stub response.",
+            "tags": ["benchmark"]
+        })
+
+
+def install(latency: float = 0.05) -> None:
+    """Register the stub as emergentintegrations.llm.chat before the server is imported"""
+    StubLlmChat.latency = latency
+    chat = types.ModuleType("emergentintegrations.llm.chat")
+    chat.LlmChat = StubLlmChat
+    chat.UserMessage = UserMessage
+    llm = types.ModuleType("emergentintegrations.llm")
+    llm.chat = chat
+    root = types.ModuleType("emergentintegrations")
+    root.llm = llm
+    sys.modules.update({
+        "emergentintegrations": root,
+        "emergentintegrations.llm": llm,
+        "emergentintegrations.llm.chat": chat,
+    })
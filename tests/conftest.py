@@ -0,0 +1,42 @@
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+import pytest
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent / "backend"
+
+# The backend reads its configuration at import time: point it at a scratch
+# database and keep background work that is not under test switched off
+_scratch = Path(tempfile.mkdtemp(prefix="puregold-tests-"))
+os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{_scratch / 'test.db'}"
+os.environ["STOCK_ARCHIVE_DIR"] = str(_scratch / "archive")
+os.environ.setdefault("AI_ENABLED", "false")
+os.environ.setdefault("LAZY_WARMUP", "false")
+sys.path.insert(0, str(BACKEND_DIR))
+
+
+# One event loop for the whole run: the backend keeps loop-bound pools and locks in module globals
+@pytest.fixture(scope="session")
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.fixture(scope="session")
+async def client(anyio_backend):
+    """HTTP client for the app, logged in as an admin, with startup and shutdown run around it"""
+    import httpx
+    import server
+
+    await server.startup_event()
+    try:
+        transport = httpx.ASGITransport(app=server.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as http:
+            credentials = {"username": "admin", "password": "secret"}
+            await http.post("/api/auth/register", json={**credentials, "email": "admin@example.com", "role": "admin"})
+            response = await http.post("/api/auth/login", json=credentials)
+            http.headers["Authorization"] = f"Bearer {response.json()['token']}"
+            yield http
+    finally:
+        await server.shutdown_event()
@@ -0,0 +1,116 @@
+from datetime import datetime
+from typing import List
+
+import pytest
+from fastapi import Response
+from pydantic import TypeAdapter
+
+import serialization
+from models import TransactionType
+from pagination import NEXT_CURSOR_HEADER
+from schemas import ProductResponse, StockTransactionResponse, SupplierResponse
+
+PRODUCT_ROWS = [
+    {
+        "name": "Evaporated Milk", "sku": "MLK-001", "description": None, "category": "Food",
+        "quantity": 12, "reorder_level": 5, "price": 38.5, "cost": 30.0, "supplier_id": None,
+        "id": 1, "version": 3,
+        "created_at": datetime(2026, 1, 2, 3, 4, 5, 678901), "updated_at": datetime(2026, 1, 2, 3, 4, 5)
+    },
+    {
+        "name": "Café Latte Mix", "sku": "CFE-002", "description": "3-in-1", "category": None,
+        "quantity": 0, "reorder_level": 0, "price": 10.0, "cost": 7.25, "supplier_id": 4,
+        "id": 2, "version": 1,
+        "created_at": datetime(2026, 1, 2), "updated_at": datetime(2026, 1, 2)
+    },
+]
+TRANSACTION_ROWS = [
+    {
+        "id": 7, "product_id": 1, "transaction_type": TransactionType.out_stock, "quantity": 2,
+        "user_id": 1, "notes": None, "transaction_date": datetime(2026, 3, 4, 5, 6, 7, 89)
+    },
+]
+
+
+def validated(schema, rows) -> list:
+    """What FastAPI returns for these rows through response_model=List[schema]"""
+    adapter = TypeAdapter(List[schema])
+    return adapter.dump_python(adapter.validate_python(rows), mode="json")
+
+
+def decoded(response: Response):
+    return TypeAdapter(list).validate_json(response.body)
+
+
+@pytest.fixture(params=["orjson", "stdlib"])
+def encoder(request, monkeypatch):
+    if request.param == "stdlib":
+        monkeypatch.setattr(serialization, "orjson", None)
+    elif serialization.orjson is None:
+        pytest.skip("orjson is not installed")
+    return request.param
+
+
+@pytest.mark.parametrize("schema, rows", [
+    (ProductResponse, PRODUCT_ROWS),
+    (StockTransactionResponse, TRANSACTION_ROWS),
+    (ProductResponse, []),
+])
+def test_json_list_matches_response_model(encoder, schema, rows):
+    response = serialization.json_list(rows, Response())
+    assert response.media_type == "application/json"
+    assert decoded(response) == validated(schema, rows)
+
+
+def test_json_list_keeps_cursor_header(encoder):
+    page = Response()
+    page.headers[NEXT_CURSOR_HEADER] = "WzJd"
+    response = serialization.json_list(PRODUCT_ROWS, page)
+    assert response.headers[NEXT_CURSOR_HEADER] == "WzJd"
+    assert response.headers["content-type"] == "application/json"
+    assert int(response.headers["content-length"]) == len(response.body)
+
+
+async def pages(client, path: str, **params) -> List[list]:
+    """Every page of a list endpoint, following X-Next-Cursor"""
+    collected, cursor = [], None
+    while True:
+        query = dict(params, limit=2, **({"cursor": cursor} if cursor else {}))
+        response = await client.get(path, params=query)
+        assert response.status_code == 200, response.text
+        collected.append(response.json())
+        cursor = response.headers.get(NEXT_CURSOR_HEADER)
+        if cursor is None:
+            return collected
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize("encoder_name", ["orjson", "stdlib"])
+async def test_cursor_pages_match_response_model(client, monkeypatch, encoder_name):
+    if encoder_name == "stdlib":
+        monkeypatch.setattr(serialization, "orjson", None)
+    supplier = (await client.post("/api/suppliers", json={"name": f"Acme {encoder_name}"})).json()
+    product_ids = []
+    for i in range(5):
+        response = await client.post("/api/products", json={
+            "name": f"Product {encoder_name} {i}", "sku": f"{encoder_name}-{i}", "price": 9.99, "cost": 5,
+            "quantity": 10, "reorder_level": 2, "supplier_id": supplier["id"] if i % 2 else None
+        })
+        product_ids.append(response.json()["id"])
+        await client.post("/api/stock/transactions", json={
+            "product_id": product_ids[-1], "transaction_type": "out", "quantity": 1, "notes": None if i % 2 else "sold"
+        })
+
+    for path, schema in [
+        ("/api/products", ProductResponse),
+        ("/api/suppliers", SupplierResponse),
+        ("/api/stock/transactions", StockTransactionResponse),
+    ]:
+        seen = []
+        for page in await pages(client, path):
+            assert page == validated(schema, page)
+            seen += [row["id"] for row in page]
+        # Every row exactly once across the pages
+        assert len(seen) == len(set(seen))
+        if path == "/api/products":
+            assert set(product_ids) <= set(seen)